@@ -0,0 +1,94 @@
+"""
+Benchmark di memoria e CPU per finding: dict contro Finding.
+
+Per ciascuna rappresentazione crea N finding come farebbe un plugin
+(dict con timestamp per finding, oppure Finding con un timestamp per
+esecuzione), li valida, li serializza per il database (evidence e meta)
+e per l'output, e misura tempo e memoria occupata dai finding in lista.
+
+    python -m benchmarks.bench_findings --count 1000000
+"""
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+from datetime import datetime
+
+from reconx.core.finding import Finding, encode, utc_timestamp
+from reconx.core.schema import validate_findings
+
+_META = {"source": "benchmark", "ttl_seconds": 86400}
+
+
+def _dicts(count):
+    # Come i plugin prima di Finding: un timestamp e un meta per ogni finding
+    return [{
+        "target": f"host{i % 1000}.example.com",
+        "scanned_at": datetime.utcnow().isoformat() + "Z",
+        "module": "crtsh_lookup",
+        "type": "certificate",
+        "confidence": 0.8,
+        "priority": 6,
+        "evidence": [{"label": "common_name", "value": f"h{i}.example.com"}],
+        "meta": {"source": "benchmark", "ttl_seconds": 86400},
+    } for i in range(count)]
+
+
+def _findings(count):
+    scanned_at = utc_timestamp()
+    return [Finding(
+        target=f"host{i % 1000}.example.com",
+        scanned_at=scanned_at,
+        module="crtsh_lookup",
+        type="certificate",
+        confidence=0.8,
+        priority=6,
+        evidence=[{"label": "common_name", "value": f"h{i}.example.com"}],
+        meta=_META,
+    ) for i in range(count)]
+
+
+def _run(kind, build, count, dump):
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    items = build(count)
+    built = time.perf_counter()
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    started_cpu = time.perf_counter()
+    valid, _ = validate_findings(items)
+    validated = time.perf_counter()
+    for f in valid:
+        dump(f["evidence"])
+        dump(f["meta"])
+    stored = time.perf_counter()
+    dump(valid)
+    encoded = time.perf_counter()
+
+    return {
+        "benchmark": "findings",
+        "kind": kind,
+        "count": count,
+        "bytes_per_finding": round(memory / count),
+        "build_us": round((built - started) / count * 1e6, 3),
+        "validate_us": round((validated - started_cpu) / count * 1e6, 3),
+        "db_encode_us": round((stored - validated) / count * 1e6, 3),
+        "output_encode_us": round((encoded - stored) / count * 1e6, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--count", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    # Percorso precedente: json.dumps per ogni serializzazione
+    print(json.dumps(_run("dict", _dicts, args.count, json.dumps)))
+    print(json.dumps(_run("finding", _findings, args.count, encode)))
+
+
+if __name__ == "__main__":
+    main()
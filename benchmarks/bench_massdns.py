@@ -0,0 +1,193 @@
+"""
+Benchmark della risoluzione DNS massiva contro un resolver finto locale.
+
+Il resolver finto gira in un processo separato, così il tempo di CPU
+misurato è solo quello del client: di default un risponditore UDP minimo
+(copia la domanda e aggiunge un record A, senza parsing) per non essere il
+collo di bottiglia; con `--server stub` StubDNSServer, anche su TCP con
+`--truncate`. Per ogni modalità risolve `--count` nomi e riporta query al
+secondo, CPU per query (e quindi il massimo teorico su un core), timeout,
+tentativi e query passate su TCP:
+
+- `mass`: lo stesso percorso di `reconx resolve` (ScanContext con
+  ctx.mass_resolver, rate limiter di processo con i limiti di default e
+  `--rate-limit`, ScanEngine.resolve senza salvataggio salvo `--save`);
+- `resolver`: dns.asyncresolver come in dns_basic, con la stessa
+  concorrenza, come riferimento.
+
+    python -m benchmarks.bench_massdns --count 50000 --inflight 1000
+    python -m benchmarks.bench_massdns --rate-limit "massdns:*=100000"
+"""
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import platform
+import socket
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from reconx.cli import _parse_rate_limits
+from reconx.core import storage
+from reconx.core.context import ScanContext
+from reconx.core.engine import ScanEngine
+from reconx.core.ratelimit import configure_rate_limiter
+from tests.stubs import StubDNSServer
+
+ANSWERS = {"A": ["192.0.2.1"]}
+# Risposta: flag QR/RD/RA, una domanda, un record A 192.0.2.1 (TTL 300)
+# con il nome compresso che punta alla domanda
+_RAW_FLAGS = b"\x81\x80\x00\x01\x00\x01\x00\x00\x00\x00"
+_RAW_ANSWER = b"\xc0\x0c\x00\x01\x00\x01\x00\x00\x01\x2c\x00\x04\xc0\x00\x02\x01"
+
+
+def _serve_raw(port_queue, stop, truncate):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+    sock.bind(("127.0.0.1", 0))
+    sock.settimeout(0.2)
+    port_queue.put(sock.getsockname()[1])
+    while not stop.is_set():
+        try:
+            data, addr = sock.recvfrom(512)
+        except socket.timeout:
+            continue
+        sock.sendto(data[:2] + _RAW_FLAGS + data[12:] + _RAW_ANSWER, addr)
+    sock.close()
+
+
+def _serve_stub(port_queue, stop, truncate):
+    # Senza thread per query: il collo di bottiglia non deve essere il server
+    server = StubDNSServer(default=ANSWERS, truncate=truncate, threaded=False).start()
+    port_queue.put(server.port)
+    stop.wait()
+    server.stop()
+
+
+def _names(count, nonce):
+    return (f"h{i}-{nonce}.bench.test" for i in range(count))
+
+
+async def _bench_mass(port, args, nonce):
+    ctx = ScanContext(nameservers=["127.0.0.1"], dns_port=port, dns_sockets=args.sockets,
+                      dns_inflight=args.inflight, dns_timeout=args.timeout,
+                      dns_retries=args.retries)
+    report = {}
+    try:
+        async with ScanEngine(ctx=ctx) as engine:
+            async for _ in engine.resolve(_names(args.count, nonce), save=args.save,
+                                          report=report):
+                pass
+    finally:
+        await ctx.close()
+    return report["statuses"], {k: report[k] for k in ("queries", "timeouts", "retries", "tcp")}
+
+
+async def _bench_resolver(port, args, nonce):
+    import dns.asyncresolver
+
+    resolver = dns.asyncresolver.Resolver(configure=False)
+    resolver.nameservers = ["127.0.0.1"]
+    resolver.port = port
+    resolver.lifetime = args.timeout * (args.retries + 1)
+    names = _names(args.count, nonce)
+    statuses = {}
+
+    async def worker():
+        for name in names:
+            try:
+                await resolver.resolve(name, "A")
+                status = "NOERROR"
+            except Exception as e:
+                status = type(e).__name__
+            statuses[status] = statuses.get(status, 0) + 1
+
+    await asyncio.gather(*(worker() for _ in range(args.inflight)))
+    return statuses, {}
+
+
+def _measure(mode, port, args):
+    bench = _bench_mass if mode == "mass" else _bench_resolver
+    cpu = time.process_time()
+    started = time.perf_counter()
+    statuses, stats = asyncio.run(bench(port, args, time.time_ns()))
+    elapsed = time.perf_counter() - started
+    cpu = time.process_time() - cpu
+    return {
+        "mode": mode,
+        "names": args.count,
+        "seconds": round(elapsed, 3),
+        "queries_per_sec": round(args.count / elapsed),
+        "cpu_us_per_query": round(cpu / args.count * 1e6, 1),
+        # Limite del client se avesse un core tutto per sé
+        "cpu_bound_queries_per_sec": round(args.count / cpu) if cpu else None,
+        "statuses": statuses,
+        **stats,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--count", type=int, default=50_000)
+    parser.add_argument("--inflight", type=int, default=1000)
+    parser.add_argument("--sockets", type=int, default=4)
+    parser.add_argument("--timeout", type=float, default=2.0)
+    parser.add_argument("--retries", type=int, default=2)
+    parser.add_argument("--modes", default="mass,resolver",
+                        type=lambda v: v.split(","))
+    parser.add_argument("--server", default="raw", choices=["raw", "stub"],
+                        help="Resolver finto: risponditore minimo o StubDNSServer.")
+    parser.add_argument("--truncate", action="store_true",
+                        help="Risposte UDP troncate: ogni query passa anche su TCP "
+                             "(solo con --server stub).")
+    parser.add_argument("--rate-limit", "--rate-limits", dest="rate_limits", action="append",
+                        default=[], metavar="SORGENTE=RATE[:BURST]",
+                        help="Come `reconx resolve --rate-limit` (es. massdns:*=100000).")
+    parser.add_argument("--save", action="store_true",
+                        help="Salva i risultati (database temporaneo), come `resolve` "
+                             "senza --no-save.")
+    parser.add_argument("--out", default="bench_massdns.json")
+    args = parser.parse_args()
+    if args.truncate and args.server != "stub":
+        parser.error("--truncate richiede --server stub")
+
+    logging.getLogger("engine").setLevel(logging.CRITICAL)
+    configure_rate_limiter(_parse_rate_limits(args.rate_limits))
+    tmp = tempfile.TemporaryDirectory()
+    storage.DB_PATH = str(Path(tmp.name) / "bench.db")
+    port_queue, stop = multiprocessing.Queue(), multiprocessing.Event()
+    serve = _serve_raw if args.server == "raw" else _serve_stub
+    server = multiprocessing.Process(target=serve, args=(port_queue, stop, args.truncate),
+                                     daemon=True)
+    server.start()
+    try:
+        port = port_queue.get(timeout=10)
+        results = []
+        for mode in args.modes:
+            result = _measure(mode, port, args)
+            print(json.dumps(result))
+            results.append(result)
+    finally:
+        stop.set()
+        server.join(5)
+        storage.close_db()
+        tmp.cleanup()
+
+    report = {
+        "benchmark": "massdns",
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {k: v for k, v in vars(args).items() if k != "out"},
+        "results": results,
+    }
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"[bench] Risultati scritti in {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+Benchmark end-to-end di ScanEngine completamente offline.
+
+Avvia server locali che sostituiscono i servizi esterni (DNS su UDP/TCP,
+WHOIS su TCP, crt.sh su HTTP) con latenza e dimensione del payload
+configurabili, punta i plugin reali verso di essi tramite ScanContext e
+misura, per ogni numero di target, throughput, latenza p50/p99 per target
+e memoria di picco. I risultati sono scritti in JSON per confrontare le run.
+
+    python -m benchmarks.bench_scan --sizes 1,100,10000 --out bench_scan.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+from reconx.core import cache, storage
+from reconx.core.context import ScanContext
+from reconx.core.engine import ScanEngine
+from reconx.core.logging import configure_logging, flush_logging
+from reconx.core.ratelimit import RateLimiter
+from tests.stubs import StubCrtshServer, StubDNSServer, StubWhoisServer
+
+# Risposte del DNS finto per qualunque nome
+DNS_ANSWERS = {
+    "A": ["192.0.2.1"],
+    "AAAA": ["2001:db8::1"],
+    "MX": ["10 mx.bench.test."],
+    "NS": ["ns1.bench.test."],
+    "TXT": ['"v=spf1 -all"'],
+}
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def _run_size(engine, count, concurrency, nonce):
+    """Scansiona `count` target e restituisce le metriche della run."""
+    targets = iter(f"t{i}-{nonce}.bench.test" for i in range(count))
+    latencies = []
+    findings = 0
+
+    async def worker():
+        nonlocal findings
+        for target in targets:
+            started = time.perf_counter()
+            results = await engine.scan(target)
+            latencies.append(time.perf_counter() - started)
+            findings += len(results)
+
+    if tracemalloc.is_tracing():
+        tracemalloc.reset_peak()
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, count))))
+    elapsed = time.perf_counter() - started
+
+    result = {
+        "targets": count,
+        "concurrency": concurrency,
+        "findings": findings,
+        "seconds": round(elapsed, 3),
+        "targets_per_sec": round(count / elapsed, 2),
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 2),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 2),
+        # ru_maxrss è in KiB su Linux (byte su macOS)
+        "peak_rss_mb": round(
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            / (1024 * 1024 if sys.platform == "darwin" else 1024), 1
+        ),
+    }
+    if tracemalloc.is_tracing():
+        result["peak_traced_mb"] = round(tracemalloc.get_traced_memory()[1] / 2**20, 1)
+    return result
+
+
+async def _bench(args, servers):
+    dns_server, whois_server, crtsh_server = servers
+    ctx = ScanContext(
+        nameservers=["127.0.0.1"],
+        dns_port=dns_server.port,
+        crtsh_url=crtsh_server.url,
+        whois_servers={"*": whois_server.address},
+        whois_concurrency=args.concurrency,
+        workers=args.concurrency,
+        http_limit_per_host=args.concurrency,
+        # Nessun rate limit: si misura il motore, non la cortesia verso le sorgenti
+        rate_limiter=RateLimiter({}),
+    )
+    nonce = time.time_ns()
+    results = []
+    async with ScanEngine(ctx=ctx) as engine:
+        for size in args.sizes:
+            result = await _run_size(engine, size, args.concurrency, nonce)
+            print(json.dumps(result), file=sys.stderr)
+            results.append(result)
+    await ctx.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="1,100,10000",
+                        type=lambda v: [int(x) for x in v.split(",")])
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--dns-latency", type=float, default=0.005)
+    parser.add_argument("--whois-latency", type=float, default=0.02)
+    parser.add_argument("--crtsh-latency", type=float, default=0.05)
+    parser.add_argument("--crtsh-entries", type=int, default=200,
+                        help="Certificati restituiti da crt.sh per ogni target.")
+    parser.add_argument("--crtsh-unique", type=int, default=20,
+                        help="common_name distinti tra i certificati.")
+    parser.add_argument("--tracemalloc", action="store_true",
+                        help="Misura anche il picco di memoria Python (più lento).")
+    parser.add_argument("--log", action="store_true",
+                        help="Mantiene i log INFO (su file temporaneo) durante la misura.")
+    parser.add_argument("--out", default="bench_scan.json")
+    args = parser.parse_args()
+
+    if args.tracemalloc:
+        tracemalloc.start()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.log:
+            # Log completi ma solo su file, per misurarne l'impatto
+            configure_logging(log_file=Path(tmp) / "bench.log", console=False)
+        else:
+            logging.getLogger("engine").setLevel(logging.CRITICAL)
+        # Database e cache isolati: ogni run parte a freddo
+        storage.DB_PATH = str(Path(tmp) / "bench.db")
+        cache.CACHE_DB = Path(tmp) / "cache.db"
+
+        servers = (
+            StubDNSServer(default=DNS_ANSWERS, latency=args.dns_latency),
+            StubWhoisServer(latency=args.whois_latency),
+            StubCrtshServer(entries=args.crtsh_entries, unique_names=args.crtsh_unique,
+                            latency=args.crtsh_latency),
+        )
+        for server in servers:
+            server.start()
+        try:
+            results = asyncio.run(_bench(args, servers))
+        finally:
+            for server in servers:
+                server.stop()
+            storage.close_db()
+            flush_logging()
+
+    report = {
+        "benchmark": "engine.scan",
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {k: v for k, v in vars(args).items() if k != "out"},
+        "results": results,
+    }
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"[bench] Risultati scritti in {args.out}")
+
+
+if __name__ == "__main__":
+    main()
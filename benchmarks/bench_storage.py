@@ -0,0 +1,58 @@
+"""
+Benchmark di scrittura del database dei finding.
+
+Inserisce N finding sintetici (default 1.000.000) in lotti tramite
+save_findings su un database temporaneo e stampa il throughput in JSON.
+
+    python -m benchmarks.bench_storage --count 1000000 --batch 10000
+"""
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+
+from reconx.core import storage
+
+
+def _finding(i):
+    return {
+        "target": f"host{i % 1000}.example.com",
+        "module": ("dns_basic", "whois_parser", "crtsh_lookup")[i % 3],
+        "type": "benchmark",
+        "confidence": 0.9,
+        "priority": 5,
+        "evidence": [{"label": "i", "value": i}],
+        "meta": {"source": "benchmark", "ttl_seconds": 86400},
+        "scanned_at": "2025-10-18T12:00:00Z",
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--count", type=int, default=1_000_000)
+    parser.add_argument("--batch", type=int, default=10_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        storage.DB_PATH = str(Path(tmp) / "bench.db")
+        storage.init_db()
+
+        started = time.perf_counter()
+        for offset in range(0, args.count, args.batch):
+            size = min(args.batch, args.count - offset)
+            storage.save_findings([_finding(offset + i) for i in range(size)])
+        elapsed = time.perf_counter() - started
+        storage.close_db()
+
+    print(json.dumps({
+        "benchmark": "storage.save_findings",
+        "count": args.count,
+        "batch": args.batch,
+        "seconds": round(elapsed, 3),
+        "rows_per_sec": round(args.count / elapsed),
+    }))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,147 @@
+import codecs
+import json
 import aiohttp
-from datetime import datetime
+from urllib.parse import urlparse
 from reconx.core.cache import get_cache, set_cache
+from reconx.core.finding import Finding, utc_timestamp
 from reconx.core.logging import setup_logger
 log = setup_logger("engine")
 
 name = "crtsh_lookup"
-version = "1.1.0"
+version = "1.2.1"
 inputs_supported = {"domain"}
 
+CRTSH_URL = "https://crt.sh/"
+# Dimensione dei blocchi letti dalla risposta HTTP
+CHUNK_SIZE = 64 * 1024
+
+
+async def _iter_json_array(stream):
+    """
+    Decodifica in modo incrementale un array JSON di oggetti mentre arriva
+    dalla rete, restituendo un oggetto alla volta. In memoria restano solo
+    il blocco corrente e l'oggetto in corso di decodifica.
+    """
+    decoder = json.JSONDecoder()
+    text = codecs.getincrementaldecoder("utf-8")()
+    buf, pos, opened = "", 0, False
+    async for chunk in stream.iter_chunked(CHUNK_SIZE):
+        buf = buf[pos:] + text.decode(chunk)
+        pos = 0
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n,":
+                pos += 1
+            if pos >= len(buf):
+                break
+            if not opened:
+                if buf[pos] != "[":
+                    raise ValueError("risposta crt.sh non è un array JSON")
+                opened = True
+                pos += 1
+                continue
+            if buf[pos] == "]":
+                return
+            try:
+                obj, pos = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                # oggetto incompleto: serve il blocco successivo
+                break
+            yield obj
+    if not opened or buf[pos:].strip():
+        raise ValueError("risposta crt.sh troncata")
+
+
+def _entry_names(entry):
+    """Nomi citati da un certificato: common_name e SAN (name_value, uno per riga)."""
+    names = [entry.get("common_name") or ""]
+    names.extend((entry.get("name_value") or "").splitlines())
+    return [n for n in names if n]
+
+
+async def _iter_certificates(session, target, base_url):
+    """
+    Interroga crt.sh e produce, man mano che il corpo arriva, una coppia
+    (finding, nomi) per ogni certificato con common_name non ancora visto.
+    """
+    params = {"q": target, "output": "json"}
+    # Nessun timeout totale: le risposte grandi arrivano in streaming e la
+    # durata complessiva è limitata dal timeout per plugin dell'engine
+    timeout = aiohttp.ClientTimeout(total=None, sock_connect=10, sock_read=30)
+    seen = set()
+    # Timestamp e meta condivisi da tutti i certificati della risposta
+    scanned_at = utc_timestamp()
+    meta = {"source": "crt.sh", "ttl_seconds": 86400}
+
+    async with session.get(base_url, params=params, timeout=timeout) as resp:
+        if resp.status != 200:
+            raise Exception(f"HTTP {resp.status} da crt.sh")
+        # Deduplica ed emette i finding man mano che il corpo arriva
+        async for entry in _iter_json_array(resp.content):
+            cn = entry.get("common_name")
+            if not cn or cn in seen:
+                continue
+            seen.add(cn)
+            yield Finding(
+                target=target,
+                scanned_at=scanned_at,
+                module=name,
+                type="certificate",
+                confidence=0.8,
+                priority=6,
+                evidence=[
+                    {"label": "common_name", "value": cn},
+                    {"label": "issuer_name", "value": entry.get("issuer_name")},
+                    {"label": "not_after", "value": entry.get("not_after")},
+                ],
+                meta=meta,
+            ), _entry_names(entry)
+
+
+async def _lookup(session, target, base_url):
+    """Interroga crt.sh e restituisce le coppie (finding, nomi) deduplicate."""
+    return [pair async for pair in _iter_certificates(session, target, base_url)]
+
+
+def _save(target, certificates):
+    """
+    Salva in cache i finding e, a parte, i nomi citati da ciascuno (common
+    name e SAN): i SAN non sono nell'evidence, ma servono a stream().
+    """
+    set_cache(f"crtsh:{target}", [finding for finding, _ in certificates], ttl=86400)
+    set_cache(f"crtsh:names:{target}", [names for _, names in certificates], ttl=86400)
+
+
+def _cached_certificates(target):
+    """Coppie (finding, nomi) dalla cache, None se mancano finding o nomi."""
+    cached = get_cache(f"crtsh:{target}")
+    if not cached:
+        return None
+    names = get_cache(f"crtsh:names:{target}")
+    if names is None or len(names) != len(cached):
+        return None
+    return [(Finding.from_dict(data), n) for data, n in zip(cached, names)]
+
+
+async def stream(target, ctx):
+    """
+    Variante in streaming di run() usata dalla pipeline di espansione
+    (reconx.core.expansion): produce (finding, nomi) per ogni certificato
+    appena decodificato. Gli errori di rete vengono sollevati.
+    """
+    cached = _cached_certificates(target)
+    if cached is not None:
+        for pair in cached:
+            yield pair
+        return
+
+    base_url = ctx.get("crtsh_url", CRTSH_URL)
+    await ctx.throttle(urlparse(base_url).netloc)
+    certificates = []
+    async for pair in _iter_certificates(ctx.http, target, base_url):
+        certificates.append(pair)
+        yield pair
+    _save(target, certificates)
+
 
 async def run(target, ctx=None):
     cache_key = f"crtsh:{target}"
@@ -16,50 +150,31 @@ async def run(target, ctx=None):
         return cached  # Restituisci il risultato da cache
 
     log.info(f"[crtsh_lookup] Avvio ricerca certificati per {target}")
-    base_url = f"https://crt.sh/?q={target}&output=json"
-    findings = []
-
-    async with aiohttp.ClientSession() as session:
-        try:
-            async with session.get(base_url, timeout=10) as resp:
-                if resp.status != 200:
-                    raise Exception(f"HTTP {resp.status} da crt.sh")
-                data = await resp.json(content_type=None)
-        except Exception as e:
-            log.error(f"[crtsh_lookup] Errore durante la richiesta: {e}")
-            return [{
-                "target": target,
-                "scanned_at": datetime.utcnow().isoformat() + "Z",
-                "module": name,
-                "type": "certificate",
-                "confidence": 0.0,
-                "priority": 2,
-                "evidence": [{"label": "error", "value": str(e)}],
-                "meta": {"source": "crtsh_lookup", "ttl_seconds": 86400},
-            }]
+    base_url = ctx.get("crtsh_url", CRTSH_URL) if ctx is not None else CRTSH_URL
 
-    seen = set()
-    for entry in data:
-        cn = entry.get("common_name")
-        if not cn or cn in seen:
-            continue
-        seen.add(cn)
-        findings.append({
-            "target": target,
-            "scanned_at": datetime.utcnow().isoformat() + "Z",
-            "module": name,
-            "type": "certificate",
-            "confidence": 0.8,
-            "priority": 6,
-            "evidence": [
-                {"label": "common_name", "value": cn},
-                {"label": "issuer_name", "value": entry.get("issuer_name")},
-                {"label": "not_after", "value": entry.get("not_after")},
-            ],
-            "meta": {"source": "crt.sh", "ttl_seconds": 86400},
-        })
+    try:
+        if ctx is not None:
+            # Rispetta il rate limit della sorgente, poi usa il pool condiviso
+            await ctx.throttle(urlparse(base_url).netloc)
+            certificates = await _lookup(ctx.http, target, base_url)
+        else:
+            async with aiohttp.ClientSession() as session:
+                certificates = await _lookup(session, target, base_url)
+    except Exception as e:
+        log.error(f"[crtsh_lookup] Errore durante la richiesta: {e}")
+        return [Finding(
+            target=target,
+            scanned_at=utc_timestamp(),
+            module=name,
+            type="certificate",
+            confidence=0.0,
+            priority=2,
+            evidence=[{"label": "error", "value": str(e)}],
+            meta={"source": "crtsh_lookup", "ttl_seconds": 86400},
+        )]
 
     # ✅ Salva il risultato in cache
-    set_cache(cache_key, findings, ttl=86400)
+    findings = [finding for finding, _ in certificates]
+    _save(target, certificates)
     log.info(f"[crtsh_lookup] Trovati {len(findings)} certificati per {target}")
     return findings
@@ -1,47 +1,104 @@
-import dns.resolver
-from datetime import datetime
+import asyncio
+import dns.asyncresolver
+from reconx.core.finding import Finding, utc_timestamp
 from reconx.core.logging import setup_logger
 log = setup_logger("engine")
 
 # === Metadati del plugin ===
 name = "dns_basic"
-version = "1.0.0"
+version = "1.2.1"
 inputs_supported = {"domain"}
 
+RECORD_TYPES = ["A", "AAAA", "MX", "NS", "TXT"]
+
+# Modulo dei finding della modalità massiva: coprono solo i tipi di record
+# richiesti, quindi non devono valere come scansione completa di dns_basic
+# (riuso incrementale, monitoraggio)
+MASS_MODULE = "massdns"
+
+# Resolver di riserva quando il plugin è usato senza contesto
+_fallback_resolver = None
+
+
+def _get_resolver(ctx):
+    global _fallback_resolver
+    if ctx is not None:
+        return ctx.resolver
+    if _fallback_resolver is None:
+        _fallback_resolver = dns.asyncresolver.Resolver()
+        _fallback_resolver.lifetime = 3
+    return _fallback_resolver
+
+
+def _finding(target, record_type, values, scanned_at, module=name):
+    # Crea un singolo risultato per tipo di record
+    return Finding(
+        target=target,
+        scanned_at=scanned_at,
+        module=module,
+        type=f"dns_{record_type.lower()}",
+        confidence=0.9 if values else 0.5,
+        priority=5,
+        evidence=[{"label": record_type, "value": values}],
+        meta={"source": module, "ttl_seconds": 86400},
+    )
+
+
+async def _resolve(resolver, target, record_type, scanned_at, ctx=None):
+    """Esegue una singola query e crea il finding corrispondente."""
+    try:
+        if ctx is not None and resolver.nameservers:
+            await ctx.throttle(f"dns:{resolver.nameservers[0]}")
+        answers = await resolver.resolve(target, record_type)
+        values = [str(rdata) for rdata in answers]
+    except Exception as e:
+        values = []
+        # logging di errore minimo per debug
+        log.error(f"[dns_basic] Nessun record {record_type} trovato ({e})")
+
+    return _finding(target, record_type, values, scanned_at)
+
+
+async def _resolve_mass(ctx, target, record_type, scanned_at):
+    """Come _resolve, tramite il resolver massivo del contesto."""
+    result = await ctx.mass_resolver.resolve(target, record_type)
+    if not result.answers:
+        log.error(f"[dns_basic] Nessun record {record_type} trovato ({result.status})")
+    return _finding(target, record_type, result.answers, scanned_at)
+
+
 # === Funzione principale ===
 async def run(target, ctx=None):
     """
     Raccoglie i record DNS principali (A, AAAA, MX, NS, TXT)
-    per il dominio specificato.
+    per il dominio specificato. Le query partono tutte insieme su un
+    resolver asincrono condiviso (ctx.resolver), senza bloccare l'event loop;
+    con l'opzione `dns_mode="mass"` passano dal resolver massivo
+    (ctx.mass_resolver), che multiplexa le query di tutti i target su pochi
+    socket UDP.
     """
-    resolver = dns.resolver.Resolver()
-    record_types = ["A", "AAAA", "MX", "NS", "TXT"]
-    findings = []
-
     log.info(f"[dns_basic] Avvio risoluzione DNS per {target}")
 
-    for record_type in record_types:
-        try:
-            answers = resolver.resolve(target, record_type, lifetime=3)
-            values = [str(rdata) for rdata in answers]
-        except Exception as e:
-            values = []
-            # logging di errore minimo per debug
-            log.error(f"[dns_basic] Nessun record {record_type} trovato ({e})")
-
-        # Crea un singolo risultato per tipo di record
-        finding = {
-            "target": target,
-            "scanned_at": datetime.utcnow().isoformat() + "Z",
-            "module": name,
-            "type": f"dns_{record_type.lower()}",
-            "confidence": 0.9 if values else 0.5,
-            "priority": 5,
-            "evidence": [{"label": record_type, "value": values}],
-            "meta": {"source": "dns_basic", "ttl_seconds": 86400},
-        }
-
-        findings.append(finding)
+    scanned_at = utc_timestamp()
+    if ctx is not None and ctx.get("dns_mode") == "mass":
+        queries = (_resolve_mass(ctx, target, rt, scanned_at) for rt in RECORD_TYPES)
+    else:
+        resolver = _get_resolver(ctx)
+        queries = (_resolve(resolver, target, rt, scanned_at, ctx) for rt in RECORD_TYPES)
+    findings = await asyncio.gather(*queries)
 
     log.info(f"[dns_basic] Completata risoluzione per {target}")
-    return findings
+    return list(findings)
+
+
+async def resolve_many(names, ctx, record_types=("A",), concurrency=None):
+    """
+    Modalità massiva: risolve un iterabile di nomi (letto in modo lazy)
+    con ctx.mass_resolver e produce un finding per nome e tipo di record
+    man mano che le risposte arrivano, insieme all'esito della query
+    (NOERROR, NXDOMAIN, TIMEOUT, ...). I finding hanno modulo MASS_MODULE.
+    """
+    scanned_at = utc_timestamp()
+    async for result in ctx.mass_resolver.resolve_many(names, record_types, concurrency):
+        finding = _finding(result.name, result.rdtype, result.answers, scanned_at, MASS_MODULE)
+        yield finding, result.status
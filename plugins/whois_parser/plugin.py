@@ -1,13 +1,66 @@
+import asyncio
+import socket
 import whois
-from datetime import datetime
 from reconx.core.cache import get_cache, set_cache
+from reconx.core.finding import Finding, utc_timestamp
 from reconx.core.logging import setup_logger
 log = setup_logger("engine")
 
 name = "whois_parser"
-version = "1.0.1"
+version = "1.1.0"
 inputs_supported = {"domain"}
 
+# Query contemporanee verso lo stesso registro (per TLD)
+PER_REGISTRY_LIMIT = 2
+QUERY_TIMEOUT = 10
+
+
+def _tld(domain):
+    return domain.rstrip(".").rsplit(".", 1)[-1].lower()
+
+
+def _configured_server(domain, ctx):
+    """Server WHOIS configurato nel contesto per il TLD, come (host, porta)."""
+    servers = ctx.get("whois_servers") if ctx is not None else None
+    if not servers:
+        return None
+    spec = servers.get(_tld(domain)) or servers.get("*")
+    if not spec:
+        return None
+    host, _, port = spec.partition(":")
+    return host, int(port or 43)
+
+
+def _raw_query(domain, host, port, timeout):
+    """Query WHOIS diretta (bloccante) su TCP."""
+    with socket.create_connection((host, port), timeout=timeout) as sock:
+        sock.sendall(f"{domain}\r\n".encode("idna"))
+        chunks = []
+        while True:
+            data = sock.recv(4096)
+            if not data:
+                break
+            chunks.append(data)
+    return b"".join(chunks).decode("utf-8", errors="replace")
+
+
+def _lookup(target, server, timeout):
+    """
+    Eseguita nel pool di worker: estrazione del dominio, query di rete
+    bloccante e parsing della risposta restano fuori dall'event loop.
+    """
+    domain = whois.extract_domain(target).encode("idna").decode("utf-8")
+    if server:
+        text = _raw_query(domain, *server, timeout)
+    else:
+        # Il client di python-whois sceglie il server e segue i referral
+        text = whois.NICClient().whois_lookup(
+            None, domain, 0, quiet=True, ignore_socket_errors=False, timeout=timeout
+        )
+    if not text:
+        raise whois.WhoisError("Whois command returned no output")
+    return whois.WhoisEntry.load(domain, text)
+
 
 async def run(target, ctx=None):
     cache_key = f"whois:{target}"
@@ -16,20 +69,38 @@ async def run(target, ctx=None):
         return cached
 
     log.info(f"[whois_parser] Avvio query WHOIS per {target}")
+    server = _configured_server(target, ctx)
+    if ctx is not None:
+        # Sorgente per il rate limit: il server configurato o il registro del TLD
+        source = f"whois:{':'.join(map(str, server)) if server else _tld(target)}"
+        executor = ctx.executor
+        limit = ctx.semaphore(
+            f"whois:{_tld(target)}", ctx.get("whois_concurrency", PER_REGISTRY_LIMIT)
+        )
+        timeout = ctx.get("whois_timeout", QUERY_TIMEOUT)
+    else:
+        executor, limit, timeout = None, asyncio.Semaphore(1), QUERY_TIMEOUT
+
     try:
-        data = whois.whois(target)
+        # Al più N query contemporanee per registro, nel pool di worker
+        async with limit:
+            if ctx is not None:
+                await ctx.throttle(source)
+            data = await asyncio.get_running_loop().run_in_executor(
+                executor, _lookup, target, server, timeout
+            )
     except Exception as e:
         log.error(f"[whois_parser] Errore WHOIS: {e}")
-        result = [{
-            "target": target,
-            "scanned_at": datetime.utcnow().isoformat() + "Z",
-            "module": name,
-            "type": "whois_record",
-            "confidence": 0.0,
-            "priority": 1,
-            "evidence": [{"label": "error", "value": str(e)}],
-            "meta": {"source": "whois_parser", "ttl_seconds": 86400},
-        }]
+        result = [Finding(
+            target=target,
+            scanned_at=utc_timestamp(),
+            module=name,
+            type="whois_record",
+            confidence=0.0,
+            priority=1,
+            evidence=[{"label": "error", "value": str(e)}],
+            meta={"source": "whois_parser", "ttl_seconds": 86400},
+        )]
         set_cache(cache_key, result, ttl=3600)
         return result
 
@@ -37,20 +108,20 @@ async def run(target, ctx=None):
     creation = str(data.get("creation_date")) if data.get("creation_date") else "N/A"
     expiration = str(data.get("expiration_date")) if data.get("expiration_date") else "N/A"
 
-    result = [{
-        "target": target,
-        "scanned_at": datetime.utcnow().isoformat() + "Z",
-        "module": name,
-        "type": "whois_record",
-        "confidence": 0.8,
-        "priority": 6,
-        "evidence": [
+    result = [Finding(
+        target=target,
+        scanned_at=utc_timestamp(),
+        module=name,
+        type="whois_record",
+        confidence=0.8,
+        priority=6,
+        evidence=[
             {"label": "registrant", "value": registrant},
             {"label": "creation_date", "value": creation},
             {"label": "expiration_date", "value": expiration}
         ],
-        "meta": {"source": "whois_parser", "ttl_seconds": 86400},
-    }]
+        meta={"source": "whois_parser", "ttl_seconds": 86400},
+    )]
 
     # ✅ Salva il risultato in cache per 24h
     set_cache(cache_key, result, ttl=86400)
@@ -1,50 +1,550 @@
 import click
-import asyncio
-from reconx.core.engine import run_scan
-from reconx.core.storage import export_results  # <-- nuovo import
+import time
+# Solo dipendenze leggere all'avvio: engine, storage, plugin e logging
+# vengono importati dentro i comandi che ne hanno bisogno
+from reconx.core.settings import (
+    DEFAULT_CONCURRENCY,
+    DEFAULT_DAEMON_HOST,
+    DEFAULT_DAEMON_JOBS,
+    DEFAULT_DAEMON_PORT,
+    DEFAULT_DNS_INFLIGHT,
+    DEFAULT_DNS_RETRIES,
+    DEFAULT_DNS_SOCKETS,
+    DEFAULT_DNS_TIMEOUT,
+    DEFAULT_EXPAND_DEPTH,
+    DEFAULT_EXPAND_FANOUT,
+    DEFAULT_JOB_PRIORITY,
+    DEFAULT_MONITOR_CONCURRENCY,
+    DEFAULT_MONITOR_JITTER,
+    DEFAULT_MONITOR_MAX_INTERVAL,
+    DEFAULT_MONITOR_MIN_INTERVAL,
+    DEFAULT_MONITOR_RETRY,
+    DEFAULT_NEGATIVE_TTL,
+    DEFAULT_PLUGIN_TIMEOUT,
+    DEFAULT_SCAN_TIMEOUT,
+    DEFAULT_WORKERS,
+)
 
 @click.group()
-def main():
+@click.option("--log-json", is_flag=True, help="Scrive i log come JSON Lines.")
+@click.option("--log-file", type=click.Path(), help="File di log (default: reconx.log).")
+@click.option("--log-sample", "log_samples", multiple=True, metavar="LIVELLO=N",
+              help="Tiene un messaggio ogni N per il livello (es. INFO=10). Ripetibile.")
+def main(log_json, log_file, log_samples):
     """CLI principale di ReconX"""
-    pass
+    if log_json or log_file or log_samples:
+        from reconx.core.logging import LOG_FILE, configure_logging
+
+        configure_logging(json_lines=log_json, log_file=log_file or LOG_FILE,
+                          sampling=_parse_log_samples(log_samples))
+
+def _read_targets(fh):
+    """Legge i target da file (uno per riga), ignorando righe vuote e commenti."""
+    for line in fh:
+        line = line.strip()
+        if line and not line.startswith("#"):
+            yield line
+
+
+def _parse_log_samples(values):
+    """Converte opzioni LIVELLO=N in {livello: N}."""
+    rates = {}
+    for value in values:
+        level, _, every = value.partition("=")
+        if not level or not every.isdigit():
+            raise click.BadParameter(f"formato non valido: {value}", param_hint="--log-sample")
+        rates[level.upper()] = int(every)
+    return rates
+
+
+def _parse_rate_limits(values):
+    """Converte opzioni SORGENTE=RATE[:BURST] in {sorgente: (rate, burst)}."""
+    rates = {}
+    for value in values:
+        source, _, spec = value.partition("=")
+        rate, _, burst = spec.partition(":")
+        try:
+            rate = float(rate)
+            burst = float(burst) if burst else max(1.0, rate)
+        except ValueError:
+            source = ""
+        if not source:
+            raise click.BadParameter(f"formato non valido: {value}", param_hint="--rate-limit")
+        rates[source] = (rate, burst)
+    return rates
+
+
+def _configure_runtime(rate_limits, rate_db, negative_ttl, processes):
+    """Applica le opzioni che valgono per tutto il processo (scan e serve)."""
+    if rate_limits or rate_db:
+        from reconx.core.ratelimit import configure_rate_limiter
+
+        configure_rate_limiter(_parse_rate_limits(rate_limits), rate_db)
+    if negative_ttl != DEFAULT_NEGATIVE_TTL:
+        from reconx.core.coalesce import configure_coalescer
+
+        configure_coalescer(negative_ttl)
+    if processes:
+        from reconx.core.executors import configure_process_pool
+
+        configure_process_pool(processes)
+
+
+def _scan_via_daemon(url, token, targets, priority, incremental, concurrency, detach):
+    """Affida la scansione al demone e ne stampa i risultati in NDJSON."""
+    import json
+    from reconx.core.daemon_client import DaemonClient, DaemonError
+
+    client = DaemonClient(url, token)
+    try:
+        job = client.submit(targets, priority=priority, incremental=incremental,
+                            concurrency=concurrency)
+        if detach:
+            click.echo(job["id"])
+            return
+        click.echo(f"[daemon] Job {job['id']} accodato su {url} "
+                   f"({job['targets']} target)", err=True)
+        try:
+            for finding in client.results(job["id"]):
+                click.echo(json.dumps(finding, ensure_ascii=False))
+        except KeyboardInterrupt:
+            client.cancel(job["id"])
+            raise click.Abort()
+        job = client.job(job["id"])
+    except DaemonError as e:
+        raise click.ClickException(str(e))
+    click.echo(
+        f"[daemon] Job {job['id']} {job['status']}: {job['done']} target, "
+        f"{job['findings']} risultati, {job['errors']} errori in {job['elapsed']:.2f}s",
+        err=True,
+    )
+    if job["status"] != "done":
+        raise click.ClickException(job["error"] or f"job {job['status']}")
+
 
 @main.command()
-@click.argument("target")
-def scan(target):
+@click.argument("target", required=False)
+@click.option("--targets-file", type=click.File("r"),
+              help="File con un target per riga ('-' per stdin).")
+@click.option("--concurrency", default=DEFAULT_CONCURRENCY, type=int,
+              show_default=True, help="Target scansionati in parallelo (batch).")
+@click.option("--plugin-timeout", default=DEFAULT_PLUGIN_TIMEOUT, type=float,
+              show_default=True, help="Timeout in secondi per ogni plugin.")
+@click.option("--scan-timeout", default=DEFAULT_SCAN_TIMEOUT, type=float,
+              show_default=True, help="Scadenza in secondi per l'intera scansione.")
+@click.option("--incremental", is_flag=True,
+              help="Riesegue solo i plugin con risultati scaduti (TTL).")
+@click.option("--rate-limit", "rate_limits", multiple=True, metavar="SORGENTE=RATE[:BURST]",
+              help="Limite di richieste/s per sorgente (es. crt.sh=0.5:3). Ripetibile.")
+@click.option("--rate-db", type=click.Path(),
+              help="File SQLite per condividere i rate limit tra processi.")
+@click.option("--negative-ttl", default=DEFAULT_NEGATIVE_TTL, type=float, show_default=True,
+              help="Secondi per cui l'errore di un plugin su un target viene riusato "
+                   "invece di interrogare di nuovo la sorgente (0 per disattivare).")
+@click.option("--workers", default=DEFAULT_WORKERS, type=int, show_default=True,
+              help="Thread per i plugin bloccanti (executor \"thread\").")
+@click.option("--processes", type=int,
+              help="Processi per i plugin CPU-bound (executor \"process\"; "
+                   "default: uno per core).")
+@click.option("--expand", is_flag=True,
+              help="Mappa i sottodomini: nomi dei certificati (crt.sh) risolti via DNS, "
+                   "con output NDJSON in streaming.")
+@click.option("--depth", default=DEFAULT_EXPAND_DEPTH, type=int, show_default=True,
+              help="Livelli di ricorsione dell'espansione.")
+@click.option("--fanout", default=DEFAULT_EXPAND_FANOUT, type=int, show_default=True,
+              help="Nomi nuovi accodati al massimo per ogni ricerca di certificati.")
+@click.option("--metrics", "show_metrics", is_flag=True,
+              help="Stampa su stderr il riepilogo JSON delle metriche per plugin.")
+@click.option("--prometheus", type=click.Path(),
+              help="File in cui scrivere le metriche in formato Prometheus "
+                   "(aggiornato durante i batch).")
+@click.option("--daemon", "daemon_url", envvar="RECONX_DAEMON", metavar="URL",
+              help="Affida la scansione al demone `reconx serve` in ascolto su URL "
+                   "(es. http://127.0.0.1:8731) e ne stampa i risultati in NDJSON.")
+@click.option("--token", envvar="RECONX_DAEMON_TOKEN",
+              help="Token di accesso al demone.")
+@click.option("--priority", default=DEFAULT_JOB_PRIORITY, type=int, show_default=True,
+              help="Priorità del job nel demone (valori più bassi partono prima).")
+@click.option("--detach", is_flag=True,
+              help="Con --daemon: stampa l'id del job senza attenderne i risultati.")
+def scan(target, targets_file, concurrency, plugin_timeout, scan_timeout,
+         incremental, rate_limits, rate_db, negative_ttl, workers, processes, expand,
+         depth, fanout, show_metrics, prometheus, daemon_url, token, priority, detach):
     """Esegue una scansione ReconX"""
-    result = asyncio.run(run_scan(target))
-    click.echo(f"Risultato: {result}")
+    if daemon_url:
+        # Il lavoro (e la configurazione di timeout, limiti e pool) è del demone
+        if expand:
+            raise click.UsageError("--expand non è disponibile con --daemon.")
+        if targets_file is not None:
+            targets = list(_read_targets(targets_file))
+        elif target:
+            targets = [target]
+        else:
+            raise click.UsageError("Specificare un TARGET oppure --targets-file.")
+        _scan_via_daemon(daemon_url, token, targets, priority, incremental, concurrency,
+                         detach)
+        return
+
+    import asyncio
+    import json
+    from reconx.core.context import ScanContext
+    from reconx.core.engine import run_scan, ScanEngine
+    from reconx.core.metrics import get_metrics
+
+    _configure_runtime(rate_limits, rate_db, negative_ttl, processes)
+
+    async def with_context(run):
+        # Contesto con le dimensioni dei pool scelte, chiuso a fine comando
+        ctx = ScanContext(workers=workers)
+        try:
+            return await run(ctx)
+        finally:
+            await ctx.close()
+
+    if expand:
+        if not target or targets_file is not None:
+            raise click.UsageError("--expand richiede un singolo TARGET.")
+        from reconx.core.finding import encode
+
+        async def expansion(ctx):
+            report = {}
+            async with ScanEngine(plugin_timeout=plugin_timeout,
+                                  scan_timeout=scan_timeout, ctx=ctx) as engine:
+                async for finding in engine.expand(target, depth, fanout, report=report):
+                    click.echo(encode(finding))
+            return report
+
+        stats = asyncio.run(with_context(expansion))
+        click.echo(
+            f"[expand] {stats['resolved']} nomi esistenti su {stats['names']} risolti, "
+            f"{stats['certificates']} certificati, {stats['findings']} risultati "
+            f"({stats['truncated']} nomi oltre il fanout, {stats['errors']} errori)",
+            err=True,
+        )
+        return
+
+    if targets_file is None:
+        if not target:
+            raise click.UsageError("Specificare un TARGET oppure --targets-file.")
+        report = {}
+        result = asyncio.run(with_context(
+            lambda ctx: run_scan(target, plugin_timeout, scan_timeout,
+                                 incremental=incremental, report=report, ctx=ctx)
+        ))
+        from reconx.core.finding import dumps
+
+        click.echo(dumps(result, indent=2))
+        if incremental:
+            click.echo(f"[incremental] eseguiti: {', '.join(report['executed']) or '-'}; "
+                       f"riusati: {', '.join(report['skipped']) or '-'}")
+        if show_metrics:
+            click.echo(json.dumps(report["metrics"], indent=2), err=True)
+        if prometheus:
+            get_metrics().write_prometheus(prometheus)
+        return
+
+    started = time.monotonic()
+    progress = {"done": 0, "last": started}
+
+    def on_result(t, results):
+        # Avanzamento su stderr, al massimo una riga al secondo
+        progress["done"] += 1
+        now = time.monotonic()
+        if now - progress["last"] >= 1.0:
+            progress["last"] = now
+            rate = progress["done"] / (now - started)
+            click.echo(f"[batch] {progress['done']} target completati "
+                       f"({rate:.2f} target/s), ultimo: {t}", err=True)
+            if prometheus:
+                get_metrics().write_prometheus(prometheus)
+
+    async def batch(ctx):
+        async with ScanEngine(plugin_timeout=plugin_timeout,
+                              scan_timeout=scan_timeout, ctx=ctx) as engine:
+            return await engine.scan_many(
+                _read_targets(targets_file), concurrency, on_result=on_result,
+                incremental=incremental,
+            )
+
+    stats = asyncio.run(with_context(batch))
+    click.echo(
+        f"[batch] {stats['targets']} target, {stats['findings']} risultati, "
+        f"{stats['errors']} errori in {stats['elapsed']:.2f}s "
+        f"({stats['targets_per_sec']:.2f} target/s)"
+    )
+    if incremental:
+        click.echo(f"[incremental] {stats['skipped_plugins']} esecuzioni di plugin "
+                   "evitate grazie a risultati ancora validi")
+    if show_metrics:
+        click.echo(json.dumps(get_metrics().snapshot(), indent=2), err=True)
+    if prometheus:
+        get_metrics().write_prometheus(prometheus)
+
+
+@main.command()
+@click.option("--host", default=DEFAULT_DAEMON_HOST, show_default=True,
+              help="Indirizzo dell'API HTTP.")
+@click.option("--port", default=DEFAULT_DAEMON_PORT, type=int, show_default=True,
+              help="Porta dell'API HTTP.")
+@click.option("--jobs", "max_jobs", default=DEFAULT_DAEMON_JOBS, type=int, show_default=True,
+              help="Job eseguiti contemporaneamente; gli altri attendono in coda "
+                   "per priorità.")
+@click.option("--token", envvar="RECONX_DAEMON_TOKEN",
+              help="Token richiesto ai client (header Authorization: Bearer).")
+@click.option("--plugin-timeout", default=DEFAULT_PLUGIN_TIMEOUT, type=float,
+              show_default=True, help="Timeout in secondi per ogni plugin.")
+@click.option("--scan-timeout", default=DEFAULT_SCAN_TIMEOUT, type=float,
+              show_default=True, help="Scadenza in secondi per la scansione di un target.")
+@click.option("--rate-limit", "rate_limits", multiple=True, metavar="SORGENTE=RATE[:BURST]",
+              help="Limite di richieste/s per sorgente (es. crt.sh=0.5:3). Ripetibile.")
+@click.option("--rate-db", type=click.Path(),
+              help="File SQLite per condividere i rate limit tra processi.")
+@click.option("--negative-ttl", default=DEFAULT_NEGATIVE_TTL, type=float, show_default=True,
+              help="Secondi per cui l'errore di un plugin su un target viene riusato.")
+@click.option("--workers", default=DEFAULT_WORKERS, type=int, show_default=True,
+              help="Thread per i plugin bloccanti (executor \"thread\").")
+@click.option("--processes", type=int,
+              help="Processi per i plugin CPU-bound (default: uno per core).")
+@click.option("--monitor", "with_monitor", is_flag=True,
+              help="Esegue anche il monitoraggio continuo della watchlist "
+                   "(vedi `monitor`, con le opzioni di default).")
+def serve(host, port, max_jobs, token, plugin_timeout, scan_timeout, rate_limits, rate_db,
+          negative_ttl, workers, processes, with_monitor):
+    """Avvia il demone ReconX: motore sempre pronto e API HTTP/JSON per i job di scansione."""
+    import asyncio
+    from reconx.core.context import ScanContext
+    from reconx.core.daemon import ScanDaemon
+
+    if token is None and host not in ("127.0.0.1", "localhost", "::1"):
+        click.echo(f"[daemon] Attenzione: API esposta su {host} senza --token", err=True)
+    _configure_runtime(rate_limits, rate_db, negative_ttl, processes)
+
+    async def run():
+        ctx = ScanContext(workers=workers)
+        daemon = ScanDaemon(host, port, max_jobs, plugin_timeout, scan_timeout,
+                            ctx=ctx, token=token, monitor={} if with_monitor else None)
+        try:
+            await daemon.serve(ready=lambda: click.echo(
+                f"[daemon] In ascolto su http://{host}:{daemon.port} "
+                f"({max_jobs} job contemporanei, Ctrl+C per terminare)", err=True))
+        finally:
+            await ctx.close()
+
+    asyncio.run(run())
+
+
+@main.group()
+def watch():
+    """Gestisce la watchlist del monitoraggio continuo."""
+
+
+@watch.command("add")
+@click.argument("targets", nargs=-1)
+@click.option("--targets-file", type=click.File("r"),
+              help="File con un target per riga ('-' per stdin).")
+@click.option("--spread", default=0.0, type=float, show_default=True,
+              help="Distribuisce la prima scansione dei nuovi target nei prossimi "
+                   "SECONDI invece di renderli tutti dovuti subito.")
+def watch_add(targets, targets_file, spread):
+    """Aggiunge target alla watchlist."""
+    from reconx.core.monitor import watch as add_targets
+
+    targets = list(targets)
+    if targets_file is not None:
+        targets.extend(_read_targets(targets_file))
+    if not targets:
+        raise click.UsageError("Specificare almeno un TARGET oppure --targets-file.")
+    added = add_targets(targets, spread)
+    click.echo(f"[watch] {added} target aggiunti ({len(targets) - added} già presenti)")
+
+
+@watch.command("remove")
+@click.argument("targets", nargs=-1, required=True)
+def watch_remove(targets):
+    """Rimuove target dalla watchlist."""
+    from reconx.core.storage import init_db, remove_watch
+
+    init_db()
+    click.echo(f"[watch] {remove_watch(targets)} target rimossi")
+
+
+@watch.command("list")
+def watch_list():
+    """Elenca i target sorvegliati, in ordine di prossima scansione."""
+    from reconx.core.storage import init_db, list_watch
+
+    init_db()
+    now = time.time()
+    entries = list_watch()
+    for entry in entries:
+        wait = entry["next_due"] - now
+        due = f"tra {wait:.0f}s" if wait > 0 else "ora"
+        click.echo(f"- {entry['target']}: prossima scansione {due}, "
+                   f"{entry['scans']} scansioni, ultima {entry['last_scanned'] or '-'}"
+                   + (f", {entry['failures']} errori consecutivi" if entry["failures"] else ""))
+    if not entries:
+        click.echo("Watchlist vuota.")
+
 
 @main.command()
-@click.option("--format", default="json", type=click.Choice(["json", "csv"]),
-              help="Formato di esportazione (json o csv).")
+@click.option("--concurrency", default=DEFAULT_MONITOR_CONCURRENCY, type=int,
+              show_default=True, help="Target scansionati in parallelo.")
+@click.option("--min-interval", default=DEFAULT_MONITOR_MIN_INTERVAL, type=float,
+              show_default=True, help="Secondi minimi tra due scansioni di un target.")
+@click.option("--max-interval", default=DEFAULT_MONITOR_MAX_INTERVAL, type=float,
+              show_default=True, help="Secondi massimi tra due scansioni di un target.")
+@click.option("--retry", default=DEFAULT_MONITOR_RETRY, type=float, show_default=True,
+              help="Secondi prima di ritentare i plugin falliti (raddoppiano a ogni "
+                   "errore consecutivo).")
+@click.option("--jitter", default=DEFAULT_MONITOR_JITTER, type=float, show_default=True,
+              help="Allungamento casuale dell'intervallo, come frazione dello stesso.")
+@click.option("--once", is_flag=True,
+              help="Scansiona solo i target già dovuti e termina (es. da cron).")
+@click.option("--plugin-timeout", default=DEFAULT_PLUGIN_TIMEOUT, type=float,
+              show_default=True, help="Timeout in secondi per ogni plugin.")
+@click.option("--scan-timeout", default=DEFAULT_SCAN_TIMEOUT, type=float,
+              show_default=True, help="Scadenza in secondi per la scansione di un target.")
+@click.option("--rate-limit", "rate_limits", multiple=True, metavar="SORGENTE=RATE[:BURST]",
+              help="Limite di richieste/s per sorgente; `monitor` limita le scansioni "
+                   "avviate (es. monitor=2:10). Ripetibile.")
+@click.option("--rate-db", type=click.Path(),
+              help="File SQLite per condividere i rate limit tra processi.")
+@click.option("--workers", default=DEFAULT_WORKERS, type=int, show_default=True,
+              help="Thread per i plugin bloccanti (executor \"thread\").")
+def monitor(concurrency, min_interval, max_interval, retry, jitter, once, plugin_timeout,
+            scan_timeout, rate_limits, rate_db, workers):
+    """Riscansiona di continuo la watchlist secondo il TTL dei risultati."""
+    import asyncio
+    import signal
+    from reconx.core.context import ScanContext
+    from reconx.core.engine import ScanEngine
+    from reconx.core.monitor import Monitor
+
+    _configure_runtime(rate_limits, rate_db, DEFAULT_NEGATIVE_TTL, None)
+
+    async def run():
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+        ctx = ScanContext(workers=workers)
+        try:
+            async with ScanEngine(plugin_timeout=plugin_timeout, scan_timeout=scan_timeout,
+                                  ctx=ctx) as engine:
+                scheduler = Monitor(engine, concurrency, min_interval, max_interval, retry,
+                                    jitter)
+                return await scheduler.run(stop, once=once)
+        finally:
+            await ctx.close()
+
+    if not once:
+        click.echo("[monitor] Monitoraggio avviato (Ctrl+C per terminare)", err=True)
+    stats = asyncio.run(run())
+    click.echo(f"[monitor] {stats['scans']} scansioni, {stats['findings']} risultati, "
+               f"{stats['failures']} con errori", err=True)
+
+
+@main.command()
+@click.argument("names_file", type=click.File("r"))
+@click.option("--type", "record_types", multiple=True, default=["A"], show_default=True,
+              help="Tipo di record da risolvere per ogni nome. Ripetibile.")
+@click.option("--resolver", "resolvers", multiple=True, metavar="IP[:PORTA]",
+              help="Resolver DNS da usare a turno (default: /etc/resolv.conf). Ripetibile.")
+@click.option("--sockets", default=DEFAULT_DNS_SOCKETS, type=int, show_default=True,
+              help="Socket UDP su cui multiplexare le query.")
+@click.option("--concurrency", default=DEFAULT_DNS_INFLIGHT, type=int, show_default=True,
+              help="Query DNS in volo al massimo.")
+@click.option("--timeout", default=DEFAULT_DNS_TIMEOUT, type=float, show_default=True,
+              help="Timeout in secondi per tentativo.")
+@click.option("--retries", default=DEFAULT_DNS_RETRIES, type=int, show_default=True,
+              help="Tentativi aggiuntivi (su un altro resolver) dopo timeout o SERVFAIL.")
+@click.option("--all", "show_all", is_flag=True,
+              help="Stampa anche i nomi senza risposte (NXDOMAIN, timeout...).")
+@click.option("--no-save", is_flag=True, help="Non salva i risultati nel database.")
+@click.option("--rate-limit", "rate_limits", multiple=True, metavar="SORGENTE=RATE[:BURST]",
+              help="Limite di richieste/s per sorgente (es. massdns:*=20000). Ripetibile.")
+def resolve(names_file, record_types, resolvers, sockets, concurrency, timeout, retries,
+            show_all, no_save, rate_limits):
+    """Risolve in massa i nomi di NAMES_FILE (uno per riga, '-' per stdin) in NDJSON."""
+    import asyncio
+    from reconx.core.context import ScanContext
+    from reconx.core.engine import ScanEngine
+    from reconx.core.finding import encode
+    from reconx.core.massdns import parse_server
+
+    if rate_limits:
+        from reconx.core.ratelimit import configure_rate_limiter
+
+        configure_rate_limiter(_parse_rate_limits(rate_limits))
+
+    options = {"dns_sockets": sockets, "dns_inflight": concurrency,
+               "dns_timeout": timeout, "dns_retries": retries}
+    if resolvers:
+        try:
+            servers = [parse_server(r) for r in resolvers]
+        except ValueError as e:
+            raise click.BadParameter(str(e), param_hint="--resolver")
+        # Il resolver massivo usa una sola porta per tutti i nameserver
+        if len({port for _, port in servers}) > 1:
+            raise click.BadParameter("tutti i resolver devono usare la stessa porta",
+                                     param_hint="--resolver")
+        options.update(nameservers=[ip for ip, _ in servers], dns_port=servers[0][1])
+
+    async def resolution():
+        report = {}
+        ctx = ScanContext(**options)
+        try:
+            async with ScanEngine(ctx=ctx) as engine:
+                async for finding, status in engine.resolve(
+                        _read_targets(names_file), record_types, save=not no_save,
+                        report=report):
+                    if show_all or finding["evidence"][0]["value"]:
+                        click.echo(encode(finding))
+        finally:
+            await ctx.close()
+        return report
+
+    stats = asyncio.run(resolution())
+    statuses = ", ".join(f"{k} {v}" for k, v in sorted(stats["statuses"].items()))
+    click.echo(
+        f"[resolve] {stats['results']} risposte in {stats['elapsed']:.2f}s "
+        f"({stats['per_sec']:.0f}/s): {statuses or '-'}; {stats['queries']} query, "
+        f"{stats['retries']} ritentate, {stats['timeouts']} timeout, {stats['tcp']} via TCP",
+        err=True,
+    )
+
+
+@main.command()
+@click.option("--format", default="json", type=click.Choice(["json", "ndjson", "csv"]),
+              help="Formato di esportazione (json, ndjson o csv).")
 @click.option("--out", required=True, type=click.Path(),
               help="Percorso file di output.")
-def export(format, out):
-    """Esporta i risultati salvati dal database in JSON o CSV."""
-    export_results(out, format)
+@click.option("--gzip", "compress", is_flag=True, default=None,
+              help="Comprime l'output con gzip (implicito se --out termina in .gz).")
+@click.option("--target", help="Esporta solo i risultati di questo target.")
+@click.option("--module", help="Esporta solo i risultati di questo plugin.")
+@click.option("--since", help="Solo risultati con scanned_at >= (ISO8601).")
+@click.option("--until", help="Solo risultati con scanned_at <= (ISO8601; una data "
+                               "include l'intero giorno).")
+def export(format, out, compress, target, module, since, until):
+    """Esporta i risultati salvati dal database in JSON, NDJSON o CSV."""
+    from reconx.core.storage import export_results
+
+    export_results(out, format, compress=compress, target=target, module=module,
+                   since=since, until=until)
     click.echo(f"[CLI] Esportati i risultati in {out}")
 
 @main.command()
 def list_plugins():
     """Elenca i plugin disponibili nel sistema."""
-    import importlib
-    from pathlib import Path
-
-    plugins_dir = Path.cwd() / "plugins"
-    found = 0
-
-    for plugin_path in plugins_dir.iterdir():
-        if plugin_path.is_dir() and (plugin_path / "plugin.py").exists():
-            module_name = f"plugins.{plugin_path.name}.plugin"
-            try:
-                plugin = importlib.import_module(module_name)
-                click.echo(f"- {plugin.name} (v{plugin.version})")
-                found += 1
-            except Exception as e:
-                click.echo(f"[!] Errore caricando {plugin_path.name}: {e}")
-
-    if not found:
+    from reconx.core.registry import get_registry
+
+    # Solo metadati dall'indice: nessun modulo plugin viene importato
+    plugins = get_registry().plugins()
+    for plugin in plugins:
+        click.echo(f"- {plugin.name} (v{plugin.version})")
+
+    if not plugins:
         click.echo("Nessun plugin trovato.")
 
 
@@ -1,48 +1,182 @@
 import json
-import os
+import sqlite3
+import threading
 import time
+from collections import OrderedDict
 from pathlib import Path
+from reconx.core.finding import encode
 from reconx.core.logging import setup_logger
+from reconx.core.metrics import record_cache
 log = setup_logger("engine")
 
-CACHE_FILE = Path.cwd() / "cache.json"
+CACHE_DB = Path.cwd() / "cache.db"
 
+# Numero massimo di voci su disco, oltre il quale si eliminano le più vecchie
+MAX_ENTRIES = 100_000
+# Numero di voci tenute in memoria (LRU) davanti a SQLite
+LRU_SIZE = 1024
+# Intervallo (secondi) della pulizia periodica delle voci scadute
+PURGE_INTERVAL = 300
+# Ogni quante scritture si controlla il limite di dimensione
+_EVICT_EVERY = 100
 
-def _load_cache():
-    if CACHE_FILE.exists():
-        try:
-            with open(CACHE_FILE, "r") as f:
-                return json.load(f)
-        except json.JSONDecodeError:
-            return {}
-    return {}
 
+class Cache:
+    """
+    Cache persistente su SQLite (indicizzata per chiave) con un livello LRU
+    in memoria davanti. SQLite in modalità WAL con busy timeout permette
+    l'accesso concorrente da più processi; un thread in background elimina
+    periodicamente le voci scadute. Il limite `max_entries` su disco viene
+    verificato ogni poche scritture, eliminando le voci scritte meno di recente.
+    """
 
-def _save_cache(data):
-    with open(CACHE_FILE, "w") as f:
-        json.dump(data, f, indent=2)
+    def __init__(self, path=CACHE_DB, max_entries=MAX_ENTRIES, lru_size=LRU_SIZE,
+                 purge_interval=PURGE_INTERVAL):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.lru_size = lru_size
+        self.purge_interval = purge_interval
+        self._lru = OrderedDict()
+        self._lock = threading.RLock()
+        self._conn = None
+        self._writes = 0
+        self._stop = threading.Event()
+        self._purger = None
+
+    def _connection(self):
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None,
+                                   check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                expires REAL NOT NULL,
+                stored REAL NOT NULL
+            )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_expires ON cache (expires)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_stored ON cache (stored)")
+            self._conn = conn
+            if self.purge_interval:
+                self._purger = threading.Thread(target=self._purge_loop,
+                                                name="reconx-cache-purge", daemon=True)
+                self._purger.start()
+        return self._conn
+
+    def _remember(self, key, text, expires):
+        self._lru[key] = (text, expires)
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.lru_size:
+            self._lru.popitem(last=False)
+
+    def get(self, key: str):
+        """Restituisce il valore in cache se esiste ed è valido, altrimenti None."""
+        now = time.time()
+        with self._lock:
+            entry = self._lru.get(key)
+            if entry is None:
+                row = self._connection().execute(
+                    "SELECT value, expires FROM cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                entry = row
+                self._remember(key, *entry)
+            else:
+                self._lru.move_to_end(key)
+
+            text, expires = entry
+            if now > expires:
+                # entry scaduta
+                self._lru.pop(key, None)
+                self._connection().execute(
+                    "DELETE FROM cache WHERE key = ? AND expires <= ?", (key, now)
+                )
+                return None
+        return json.loads(text)
+
+    def set(self, key: str, value, ttl: int = 86400):
+        """Salva un valore in cache con un TTL (secondi)."""
+        now = time.time()
+        text = encode(value)
+        with self._lock:
+            self._connection().execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires, stored) VALUES (?, ?, ?, ?)",
+                (key, text, now + ttl, now),
+            )
+            self._remember(key, text, now + ttl)
+            self._writes += 1
+            if self._writes % _EVICT_EVERY == 0:
+                self.evict()
+
+    def evict(self):
+        """Riporta la cache su disco entro `max_entries` voci."""
+        with self._lock:
+            conn = self._connection()
+            excess = conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0] - self.max_entries
+            if excess > 0:
+                evicted = conn.execute(
+                    "SELECT key FROM cache ORDER BY stored LIMIT ?", (excess,)
+                ).fetchall()
+                conn.executemany("DELETE FROM cache WHERE key = ?", evicted)
+                for (key,) in evicted:
+                    self._lru.pop(key, None)
+                log.info(f"[cache] Eliminate {excess} voci (limite {self.max_entries})")
+
+    def purge_expired(self):
+        """Elimina tutte le voci scadute e restituisce quante ne ha rimosse."""
+        now = time.time()
+        with self._lock:
+            cur = self._connection().execute("DELETE FROM cache WHERE expires < ?", (now,))
+            for key in [k for k, (_, exp) in self._lru.items() if exp < now]:
+                del self._lru[key]
+        return cur.rowcount
+
+    def _purge_loop(self):
+        while not self._stop.wait(self.purge_interval):
+            try:
+                removed = self.purge_expired()
+                if removed:
+                    log.info(f"[cache] Pulizia: rimosse {removed} voci scadute")
+            except sqlite3.Error as e:
+                log.warning(f"[cache] Pulizia non riuscita: {e}")
+
+    def close(self):
+        self._stop.set()
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+            self._lru.clear()
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def _get_default():
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = Cache(CACHE_DB)
+        return _default_cache
 
 
 def get_cache(key: str):
     """Restituisce il valore in cache se esiste ed è valido."""
-    data = _load_cache()
-    entry = data.get(key)
-    if not entry:
-        return None
-
-    if time.time() > entry["expires"]:
-        # entry scaduta
-        del data[key]
-        _save_cache(data)
+    value = _get_default().get(key)
+    record_cache(value is not None)
+    if value is None:
         return None
 
     log.info(f"[cache] Hit per {key}")
-    return entry["value"]
+    return value
 
 
 def set_cache(key: str, value, ttl: int = 86400):
     """Salva un valore in cache con un TTL (secondi)."""
-    data = _load_cache()
-    data[key] = {"value": value, "expires": time.time() + ttl}
-    _save_cache(data)
+    _get_default().set(key, value, ttl)
     log.info(f"[cache] Salvato {key} (TTL {ttl}s)")
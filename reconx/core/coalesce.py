@@ -0,0 +1,142 @@
+# Fusione delle chiamate identiche in corso e cache negativa degli errori
+import asyncio
+import concurrent.futures
+import threading
+import time
+
+from reconx.core.logging import setup_logger
+from reconx.core.metrics import record_shared
+from reconx.core.settings import DEFAULT_NEGATIVE_TTL
+
+log = setup_logger("engine")
+
+
+class _Abandoned(Exception):
+    """La chiamata condivisa è stata annullata: chi attendeva riprova."""
+
+
+class Coalescer:
+    """
+    Unisce le chiamate identiche contemporanee: per ogni chiave (es.
+    (plugin, target, identità del contesto)) solo il primo chiamante esegue il lavoro, gli altri
+    ne attendono il risultato. Il risultato è condiviso tramite un
+    concurrent.futures.Future, quindi anche tra event loop in thread
+    diversi (es. la GUI e un batch nello stesso processo).
+
+    Gli esiti falliti (eccezioni, o risultati per cui `failed(result)` è
+    vero) restano in una cache negativa per `negative_ttl` secondi: in quel
+    periodo i chiamanti ricevono lo stesso esito senza interrogare di nuovo
+    la sorgente. Se il primo chiamante viene annullato (es. scadenza della
+    sua scansione), chi attendeva riprova ed esegue il lavoro da sé.
+    Le esecuzioni servite senza lavoro sono registrate nella metrica
+    `shared` del plugin in esecuzione (metrics.record_shared).
+    """
+
+    def __init__(self, negative_ttl=DEFAULT_NEGATIVE_TTL):
+        self.negative_ttl = negative_ttl
+        self.stats = {"calls": 0, "shared": 0, "negative_hits": 0}
+        self._inflight = {}
+        self._failures = {}
+        self._lock = threading.Lock()
+
+    def _remember(self, key, outcome):
+        if self.negative_ttl > 0:
+            with self._lock:
+                self._failures[key] = (time.monotonic() + self.negative_ttl, outcome)
+
+    async def run(self, key, factory, failed=None, timeout=None):
+        """
+        Esegue `factory()` (funzione che restituisce una coroutine) una sola
+        volta per tutti i chiamanti contemporanei con la stessa `key`.
+        Gli esiti falliti riusati vengono restituiti (o rilanciati, se
+        eccezioni) come la prima volta. `timeout` limita solo l'attesa del
+        risultato di un'altra chiamata.
+        """
+        while True:
+            with self._lock:
+                failure = self._failures.get(key)
+                if failure is not None and failure[0] <= time.monotonic():
+                    del self._failures[key]
+                    failure = None
+                future = None
+                if failure is None:
+                    future = self._inflight.get(key)
+                    leader = future is None
+                    if leader:
+                        future = self._inflight[key] = concurrent.futures.Future()
+                        self.stats["calls"] += 1
+                    else:
+                        self.stats["shared"] += 1
+                else:
+                    self.stats["negative_hits"] += 1
+
+            if failure is not None:
+                log.debug(f"[coalesce] Esito negativo in cache per {key}")
+                record_shared()
+                outcome = failure[1]
+                if isinstance(outcome, Exception):
+                    raise outcome
+                return outcome
+            if leader:
+                return await self._lead(key, future, factory, failed)
+
+            log.debug(f"[coalesce] Attendo la chiamata già in corso per {key}")
+            try:
+                # shield: se chi attende va in timeout la chiamata condivisa prosegue
+                waiter = asyncio.shield(asyncio.wrap_future(future))
+                result = await asyncio.wait_for(waiter, timeout)
+            except _Abandoned:
+                continue
+            except Exception:
+                record_shared()
+                raise
+            record_shared()
+            return result
+
+    async def _lead(self, key, future, factory, failed):
+        # L'esito negativo viene registrato prima di liberare la chiave,
+        # così nessun nuovo chiamante trova un intervallo scoperto
+        try:
+            result = await factory()
+        except asyncio.CancelledError:
+            self._release(key)
+            future.set_exception(_Abandoned())
+            raise
+        except Exception as e:
+            self._remember(key, e)
+            self._release(key)
+            future.set_exception(e)
+            raise
+        if failed is not None and failed(result):
+            self._remember(key, result)
+        self._release(key)
+        future.set_result(result)
+        return result
+
+    def _release(self, key):
+        with self._lock:
+            self._inflight.pop(key, None)
+
+    def reset(self):
+        """Dimentica gli esiti negativi e azzera i contatori."""
+        with self._lock:
+            self._failures.clear()
+            self.stats = dict.fromkeys(self.stats, 0)
+
+
+_coalescer = None
+
+
+def configure_coalescer(negative_ttl=DEFAULT_NEGATIVE_TTL):
+    """Sostituisce il coalescer di processo (es. da opzioni CLI)."""
+    global _coalescer
+    _coalescer = Coalescer(negative_ttl)
+    return _coalescer
+
+
+def get_coalescer():
+    """Coalescer condiviso dal processo."""
+    global _coalescer
+    if _coalescer is None:
+        _coalescer = Coalescer()
+    return _coalescer
@@ -0,0 +1,216 @@
+# Contesto condiviso passato ai plugin tramite run(target, ctx)
+import asyncio
+from reconx.core.logging import setup_logger
+
+log = setup_logger("engine")
+
+# Opzioni che regolano solo risorse e ritmo (pool, socket, limiti): non
+# cambiano i risultati dei plugin, quindi non distinguono i contesti
+_RUNTIME_OPTIONS = {
+    "rate_limiter", "workers", "http_limit", "http_limit_per_host", "http_dns_ttl",
+    "http_keepalive", "dns_sockets", "dns_inflight", "whois_concurrency",
+}
+
+
+def _freeze(value):
+    # Rappresentazione hashable di un'opzione di configurazione
+    if isinstance(value, dict):
+        return tuple(sorted((str(k), _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(_freeze(v) for v in value)
+    try:
+        hash(value)
+    except TypeError:
+        return repr(value)
+    return value
+
+
+class ScanContext:
+    """
+    Risorse condivise tra tutti i plugin e i target di un motore.
+    Le risorse sono create in modo lazy al primo utilizzo e riutilizzate
+    per tutta la vita del motore.
+
+    Opzioni riconosciute (passate come keyword):
+    - `nameservers`: lista di IP dei resolver DNS (default: /etc/resolv.conf)
+    - `dns_port`: porta dei resolver DNS (default 53)
+    - `dns_timeout`: timeout per singola query DNS in secondi (default 3,
+      2 per il resolver massivo)
+    - `dns_mode`: "resolver" (dnspython, default) o "mass" (ctx.mass_resolver)
+    - `dns_sockets`: socket UDP del resolver massivo (default 4)
+    - `dns_inflight`: query in volo del resolver massivo (default 1000)
+    - `dns_retries`: tentativi aggiuntivi del resolver massivo (default 2)
+    - `crtsh_url`: endpoint di crt.sh (default https://crt.sh/)
+    - `http_limit`: connessioni HTTP aperte in totale (default 100)
+    - `http_limit_per_host`: connessioni HTTP per host (default 10)
+    - `http_dns_ttl`: secondi di cache DNS del pool HTTP (default 300)
+    - `http_keepalive`: secondi di keep-alive delle connessioni (default 30)
+    - `workers`: thread del pool per il lavoro bloccante e i plugin con
+      executor "thread" (default 16)
+    - `whois_servers`: mappa TLD -> "host[:porta]" ("*" per tutti i TLD)
+    - `whois_concurrency`: query WHOIS contemporanee per TLD (default 2)
+    - `whois_timeout`: timeout di una query WHOIS in secondi (default 10)
+    - `rate_limiter`: RateLimiter da usare (default: quello di processo)
+    """
+
+    def __init__(self, **config):
+        self.config = config
+        self._resolver = None
+        self._mass_resolver = None
+        self._mass_loop = None
+        self._http = None
+        self._http_loop = None
+        self._executor = None
+        self._semaphores = {}
+        self._semaphore_loop = None
+        self._identity = None
+
+    def get(self, key, default=None):
+        """Restituisce un'opzione di configurazione."""
+        return self.config.get(key, default)
+
+    @property
+    def identity(self):
+        """
+        Chiave hashable delle opzioni che possono cambiare i risultati dei
+        plugin (endpoint, resolver, server WHOIS, timeout...): contesti con
+        la stessa identità possono condividere le chiamate ai plugin.
+        """
+        if self._identity is None:
+            self._identity = tuple(sorted(
+                (key, _freeze(value)) for key, value in self.config.items()
+                if key not in _RUNTIME_OPTIONS
+            ))
+        return self._identity
+
+    @property
+    def resolver(self):
+        """Resolver DNS asincrono condiviso."""
+        if self._resolver is None:
+            import dns.asyncresolver
+
+            nameservers = self.get("nameservers")
+            if nameservers:
+                resolver = dns.asyncresolver.Resolver(configure=False)
+                resolver.nameservers = list(nameservers)
+            else:
+                resolver = dns.asyncresolver.Resolver()
+            resolver.port = self.get("dns_port", 53)
+            resolver.lifetime = self.get("dns_timeout", 3)
+            self._resolver = resolver
+            log.info(f"[context] Resolver DNS pronto ({resolver.nameservers})")
+        return self._resolver
+
+    @property
+    def mass_resolver(self):
+        """
+        MassResolver condiviso per la risoluzione di grandi liste di nomi:
+        pochi socket UDP, query distribuite sui `nameservers`. Legato
+        all'event loop corrente, come la sessione HTTP.
+        """
+        loop = asyncio.get_running_loop()
+        if self._mass_resolver is None or self._mass_loop is not loop:
+            from reconx.core.massdns import MassResolver
+            from reconx.core.settings import (
+                DEFAULT_DNS_INFLIGHT,
+                DEFAULT_DNS_RETRIES,
+                DEFAULT_DNS_SOCKETS,
+                DEFAULT_DNS_TIMEOUT,
+            )
+
+            port = self.get("dns_port", 53)
+            nameservers = self.get("nameservers") or self.resolver.nameservers
+            self._mass_resolver = MassResolver(
+                [(ns, port) for ns in nameservers],
+                sockets=self.get("dns_sockets", DEFAULT_DNS_SOCKETS),
+                inflight=self.get("dns_inflight", DEFAULT_DNS_INFLIGHT),
+                timeout=self.get("dns_timeout", DEFAULT_DNS_TIMEOUT),
+                retries=self.get("dns_retries", DEFAULT_DNS_RETRIES),
+                rate_limiter=self.rate_limiter,
+            )
+            self._mass_loop = loop
+            log.info(f"[context] Resolver DNS massivo pronto ({list(nameservers)})")
+        return self._mass_resolver
+
+    @property
+    def executor(self):
+        """Pool di thread limitato per chiamate bloccanti (I/O sincrono, parsing)."""
+        if self._executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+            from reconx.core.settings import DEFAULT_WORKERS
+
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.get("workers", DEFAULT_WORKERS),
+                thread_name_prefix="reconx-worker",
+            )
+        return self._executor
+
+    def semaphore(self, key, limit):
+        """
+        Semaforo condiviso identificato da `key` (es. "whois:com"), creato al
+        primo utilizzo con `limit` permessi: limita la concorrenza verso una
+        singola risorsa esterna per tutti i target del motore. Va usato dentro
+        un event loop; se il loop cambia i semafori vengono ricreati.
+        """
+        loop = asyncio.get_running_loop()
+        if self._semaphore_loop is not loop:
+            self._semaphores = {}
+            self._semaphore_loop = loop
+        sem = self._semaphores.get(key)
+        if sem is None:
+            sem = self._semaphores[key] = asyncio.Semaphore(limit)
+        return sem
+
+    @property
+    def rate_limiter(self):
+        """Rate limiter per sorgente, condiviso da tutte le scansioni del processo."""
+        limiter = self.get("rate_limiter")
+        if limiter is None:
+            from reconx.core.ratelimit import get_rate_limiter
+
+            limiter = get_rate_limiter()
+        return limiter
+
+    async def throttle(self, source, tokens=1):
+        """Attende il proprio turno verso `source` (es. "crt.sh", "whois:com")."""
+        return await self.rate_limiter.acquire(source, tokens)
+
+    @property
+    def http(self):
+        """
+        Sessione aiohttp condivisa con pool di connessioni keep-alive, limiti
+        per host e cache DNS. Va usata dentro un event loop; se il loop cambia
+        (es. più chiamate ad asyncio.run) viene creata una nuova sessione.
+        """
+        loop = asyncio.get_running_loop()
+        if self._http is None or self._http.closed or self._http_loop is not loop:
+            import aiohttp
+
+            connector = aiohttp.TCPConnector(
+                limit=self.get("http_limit", 100),
+                limit_per_host=self.get("http_limit_per_host", 10),
+                ttl_dns_cache=self.get("http_dns_ttl", 300),
+                keepalive_timeout=self.get("http_keepalive", 30),
+            )
+            self._http = aiohttp.ClientSession(connector=connector)
+            self._http_loop = loop
+        return self._http
+
+    async def close(self):
+        """Rilascia le risorse condivise (connessioni HTTP, socket DNS, pool di thread)."""
+        if self._http is not None and not self._http.closed:
+            if self._http_loop is asyncio.get_running_loop():
+                await self._http.close()
+        self._http = None
+        self._http_loop = None
+        self._semaphores = {}
+        self._semaphore_loop = None
+        if self._mass_resolver is not None:
+            self._mass_resolver.close()
+        self._mass_resolver = None
+        self._mass_loop = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,437 @@
+# Demone di scansione: motore sempre pronto, coda di job a priorità e API HTTP/JSON
+import asyncio
+import hmac
+import itertools
+import signal
+import time
+import uuid
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+
+from aiohttp import web
+
+from reconx.core.context import ScanContext
+from reconx.core.engine import ScanEngine
+from reconx.core.finding import encode
+from reconx.core.logging import setup_logger
+from reconx.core.metrics import get_metrics
+from reconx.core.settings import (
+    DEFAULT_CONCURRENCY,
+    DEFAULT_DAEMON_BUFFER,
+    DEFAULT_DAEMON_HOST,
+    DEFAULT_DAEMON_JOBS,
+    DEFAULT_DAEMON_KEEP,
+    DEFAULT_DAEMON_PORT,
+    DEFAULT_JOB_PRIORITY,
+    DEFAULT_PLUGIN_TIMEOUT,
+    DEFAULT_SCAN_TIMEOUT,
+)
+
+log = setup_logger("engine")
+
+# Stati di un job: gli ultimi tre sono definitivi
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = {DONE, FAILED, CANCELLED}
+
+
+def _iso(ts):
+    if ts is None:
+        return None
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+class Job:
+    """
+    Scansione di una lista di target accodata al demone. I risultati sono
+    conservati come righe NDJSON già codificate, pronte per lo stream, ma
+    solo le ultime `buffer`: le righe sono numerate dall'inizio del job e
+    quelle più vecchie (comunque salvate nel database) vengono scartate.
+    Una volta concluso e letto per intero, il job libera i suoi risultati.
+    """
+
+    def __init__(self, targets, priority=DEFAULT_JOB_PRIORITY, incremental=False,
+                 concurrency=DEFAULT_CONCURRENCY, buffer=DEFAULT_DAEMON_BUFFER):
+        self.id = uuid.uuid4().hex
+        self.targets = targets
+        self.priority = priority
+        self.incremental = incremental
+        self.concurrency = concurrency
+        self.status = QUEUED
+        self.done = 0
+        self.errors = 0
+        self.error = None
+        self.findings = deque(maxlen=max(1, buffer))
+        # Righe prodotte in tutto, anche quelle già scartate
+        self.count = 0
+        self.readers = 0
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.task = None
+        self._changed = asyncio.Event()
+
+    def notify(self):
+        """Sveglia chi attende nuovi risultati o un cambio di stato."""
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    @property
+    def base(self):
+        """Numero della prima riga ancora in memoria."""
+        return self.count - len(self.findings)
+
+    def add(self, lines):
+        for line in lines:
+            self.findings.append(line)
+            self.count += 1
+        self.notify()
+
+    def lines(self, offset):
+        """Righe in memoria a partire dalla riga `offset` (non prima di `base`)."""
+        return list(itertools.islice(self.findings, max(0, offset - self.base), None))
+
+    def release(self):
+        """Libera i risultati di un job concluso e già letto."""
+        self.findings.clear()
+
+    def as_dict(self):
+        end = self.finished or time.time()
+        return {
+            "id": self.id,
+            "status": self.status,
+            "priority": self.priority,
+            "incremental": self.incremental,
+            "targets": len(self.targets),
+            "done": self.done,
+            "findings": self.count,
+            "errors": self.errors,
+            "error": self.error,
+            "created": _iso(self.created),
+            "started": _iso(self.started),
+            "finished": _iso(self.finished),
+            "elapsed": end - self.started if self.started else 0.0,
+        }
+
+
+def _error(status, message):
+    return web.json_response({"error": message}, status=status)
+
+
+class ScanDaemon:
+    """
+    Processo di lunga durata che tiene pronti motore, plugin importati,
+    pool HTTP, resolver DNS e connessione al database, ed esegue i job
+    ricevuti dall'API HTTP/JSON:
+
+    - `GET /health`: stato del demone e dei job;
+    - `POST /jobs`: accoda un job ({"targets": [...]} oppure {"target": ...},
+      più `priority`, `incremental` e `concurrency` facoltativi);
+    - `GET /jobs`, `GET /jobs/{id}`: stato dei job;
+    - `GET /jobs/{id}/results`: risultati in NDJSON, in streaming fino alla
+      fine del job (`offset` salta le prime righe, `follow=0` restituisce
+      solo quelle già pronte); per job restano in memoria al più `buffer`
+      righe, liberate dopo la prima lettura completa del job concluso
+      (410 per le righe non più disponibili, che sono nel database);
+    - `DELETE /jobs/{id}`: annulla un job in coda o in esecuzione;
+    - `GET /metrics`: metriche dei plugin nel formato di Prometheus.
+
+    Al più `jobs` job sono eseguiti contemporaneamente; gli altri attendono
+    in coda per priorità (valori più bassi prima) e ordine di arrivo.
+    Con `monitor` (dict di opzioni per monitor.Monitor, anche vuoto) il
+    demone esegue anche il monitoraggio continuo della watchlist con lo
+    stesso motore.
+    Con `token` ogni richiesta deve avere l'header
+    `Authorization: Bearer <token>`.
+    """
+
+    def __init__(self, host=DEFAULT_DAEMON_HOST, port=DEFAULT_DAEMON_PORT,
+                 jobs=DEFAULT_DAEMON_JOBS, plugin_timeout=DEFAULT_PLUGIN_TIMEOUT,
+                 scan_timeout=DEFAULT_SCAN_TIMEOUT, plugins=None, ctx=None, token=None,
+                 keep=DEFAULT_DAEMON_KEEP, buffer=DEFAULT_DAEMON_BUFFER, monitor=None):
+        self.host = host
+        self.port = port
+        self.max_jobs = max(1, jobs)
+        self.plugin_timeout = plugin_timeout
+        self.scan_timeout = scan_timeout
+        self.token = token
+        self.keep = keep
+        self.buffer = buffer
+        self.jobs = OrderedDict()
+        self.engine = None
+        self._plugins = plugins
+        self._owns_ctx = ctx is None
+        self.ctx = ctx if ctx is not None else ScanContext()
+        self._queue = None
+        # A parità di priorità i job partono in ordine di arrivo
+        self._order = itertools.count()
+        self._workers = []
+        self._runner = None
+        self._started = None
+        self._monitor_options = monitor
+        self.monitor = None
+        self._monitor_stop = None
+        self._monitor_task = None
+
+    async def start(self):
+        """Prepara le risorse condivise, avvia i worker e l'API HTTP."""
+        self.engine = ScanEngine(self._plugins, self.plugin_timeout, self.scan_timeout,
+                                 ctx=self.ctx)
+        self._warm_up()
+        self._queue = asyncio.PriorityQueue()
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.max_jobs)]
+        if self._monitor_options is not None:
+            from reconx.core.monitor import Monitor
+
+            self.monitor = Monitor(self.engine, **self._monitor_options)
+            self._monitor_stop = asyncio.Event()
+            self._monitor_task = asyncio.create_task(self.monitor.run(self._monitor_stop))
+
+        app = web.Application(middlewares=[self._auth])
+        app.add_routes([
+            web.get("/health", self._health),
+            web.get("/metrics", self._metrics),
+            web.post("/jobs", self._submit),
+            web.get("/jobs", self._list),
+            web.get("/jobs/{id}", self._status),
+            web.get("/jobs/{id}/results", self._results),
+            web.delete("/jobs/{id}", self._cancel),
+        ])
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        # Con port=0 il sistema sceglie una porta libera
+        self.port = self._runner.addresses[0][1]
+        self._started = time.monotonic()
+        log.info(f"[daemon] In ascolto su http://{self.host}:{self.port} "
+                 f"({self.max_jobs} job contemporanei, "
+                 f"{len(self.engine.plugins)} plugin pronti)")
+        return self
+
+    def _warm_up(self):
+        # Quello che ogni invocazione della CLI pagherebbe da capo: import
+        # dei plugin, sessione HTTP e resolver DNS (il database è già
+        # aperto dal motore)
+        for plugin in self.engine.plugins:
+            if hasattr(plugin, "load"):
+                plugin.load()
+        self.ctx.http
+        self.ctx.resolver
+
+    async def stop(self):
+        """Annulla i job in corso e rilascia API, worker e risorse condivise."""
+        if self._monitor_task is not None:
+            self._monitor_stop.set()
+            await asyncio.gather(self._monitor_task, return_exceptions=True)
+            self._monitor_task = None
+        running = []
+        for job in list(self.jobs.values()):
+            if job.status == QUEUED:
+                self._finish(job, CANCELLED)
+            elif job.status == RUNNING:
+                job.task.cancel()
+                running.append(job.task)
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*running, *self._workers, return_exceptions=True)
+        self._workers = []
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+        if self.engine is not None:
+            await self.engine.close()
+        if self._owns_ctx:
+            await self.ctx.close()
+        log.info("[daemon] Arrestato")
+
+    async def serve(self, ready=None):
+        """Esegue il demone fino a SIGINT o SIGTERM; `ready()` dopo l'avvio."""
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+        await self.start()
+        if ready is not None:
+            ready()
+        try:
+            await stop.wait()
+        finally:
+            await self.stop()
+
+    def submit(self, targets, priority=DEFAULT_JOB_PRIORITY, incremental=False,
+               concurrency=DEFAULT_CONCURRENCY):
+        """Accoda un job e lo restituisce."""
+        job = Job(list(targets), priority, incremental, concurrency, self.buffer)
+        self.jobs[job.id] = job
+        self._queue.put_nowait((priority, next(self._order), job))
+        log.info(f"[daemon] Job {job.id} accodato: {len(job.targets)} target, "
+                 f"priorità {priority}")
+        return job
+
+    def cancel(self, job_id):
+        """Annulla un job in coda o in esecuzione; None se sconosciuto."""
+        job = self.jobs.get(job_id)
+        if job is None:
+            return None
+        if job.status == QUEUED:
+            # Resta in coda: il worker che lo estrae lo scarta
+            self._finish(job, CANCELLED)
+        elif job.status == RUNNING:
+            job.task.cancel()
+        return job
+
+    def _finish(self, job, status):
+        job.status = status
+        job.finished = time.time()
+        job.notify()
+        log.info(f"[daemon] Job {job.id} {status}: {job.done}/{len(job.targets)} target, "
+                 f"{job.count} risultati")
+        self._forget()
+
+    def _forget(self):
+        # Conserva solo gli ultimi `keep` job conclusi (i risultati restano
+        # comunque nel database)
+        finished = [j.id for j in self.jobs.values() if j.status in FINISHED]
+        for job_id in finished[:max(0, len(finished) - self.keep)]:
+            del self.jobs[job_id]
+
+    async def _worker(self):
+        while True:
+            _, _, job = await self._queue.get()
+            if job.status != QUEUED:
+                continue
+            job.task = asyncio.create_task(self._run(job))
+            # wait() non propaga l'annullamento del job al worker
+            await asyncio.wait([job.task])
+
+    async def _run(self, job):
+        job.status = RUNNING
+        job.started = time.time()
+        job.notify()
+
+        def on_result(target, results):
+            job.done += 1
+            job.add(encode(f) for f in results)
+
+        try:
+            stats = await self.engine.scan_many(
+                job.targets, job.concurrency, on_result=on_result,
+                incremental=job.incremental,
+            )
+        except asyncio.CancelledError:
+            self._finish(job, CANCELLED)
+            raise
+        except Exception as e:
+            log.error(f"[daemon] Errore eseguendo il job {job.id}: {e}")
+            job.error = str(e)
+            self._finish(job, FAILED)
+            return
+        job.errors = stats["errors"]
+        self._finish(job, DONE)
+
+    # --- API HTTP ---
+
+    @web.middleware
+    async def _auth(self, request, handler):
+        if self.token is not None:
+            supplied = request.headers.get("Authorization", "")
+            if not hmac.compare_digest(supplied, f"Bearer {self.token}"):
+                return _error(401, "token mancante o non valido")
+        return await handler(request)
+
+    def _job(self, request):
+        job = self.jobs.get(request.match_info["id"])
+        if job is None:
+            raise web.HTTPNotFound(text='{"error": "job sconosciuto"}',
+                                   content_type="application/json")
+        return job
+
+    async def _health(self, request):
+        statuses = [job.status for job in self.jobs.values()]
+        return web.json_response({
+            "status": "ok",
+            "uptime": time.monotonic() - self._started,
+            "plugins": [p.name for p in self.engine.plugins],
+            "max_jobs": self.max_jobs,
+            "queued": statuses.count(QUEUED),
+            "running": statuses.count(RUNNING),
+            "jobs": len(statuses),
+            "monitor": self.monitor.stats if self.monitor is not None else None,
+        })
+
+    async def _metrics(self, request):
+        return web.Response(text=get_metrics().to_prometheus(), content_type="text/plain")
+
+    async def _submit(self, request):
+        try:
+            body = await request.json()
+        except ValueError:
+            return _error(400, "corpo JSON non valido")
+        if not isinstance(body, dict):
+            return _error(400, "atteso un oggetto JSON")
+        targets = body.get("targets")
+        if targets is None and body.get("target"):
+            targets = [body["target"]]
+        if (not isinstance(targets, list) or not targets
+                or not all(isinstance(t, str) and t for t in targets)):
+            return _error(400, "specificare `target` o una lista non vuota `targets`")
+        priority = body.get("priority", DEFAULT_JOB_PRIORITY)
+        concurrency = body.get("concurrency", DEFAULT_CONCURRENCY)
+        if not isinstance(priority, int) or not isinstance(concurrency, int) or concurrency < 1:
+            return _error(400, "`priority` e `concurrency` devono essere interi "
+                               "(`concurrency` almeno 1)")
+        job = self.submit(targets, priority, bool(body.get("incremental")), concurrency)
+        return web.json_response(job.as_dict(), status=202)
+
+    async def _list(self, request):
+        return web.json_response({"jobs": [job.as_dict() for job in self.jobs.values()]})
+
+    async def _status(self, request):
+        return web.json_response(self._job(request).as_dict())
+
+    async def _cancel(self, request):
+        job = self.cancel(self._job(request).id)
+        return web.json_response(job.as_dict())
+
+    async def _results(self, request):
+        job = self._job(request)
+        try:
+            offset = max(0, int(request.query.get("offset", 0)))
+        except ValueError:
+            return _error(400, "`offset` deve essere un intero")
+        follow = request.query.get("follow", "1") != "0"
+        if offset < job.base:
+            return _error(410, "risultati non più in memoria (sono salvati nel database)")
+        # Solo chi riceve tutte le righe ancora in memoria consuma il job
+        complete = offset <= job.base
+
+        response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+        await response.prepare(request)
+        job.readers += 1
+        try:
+            while True:
+                # L'evento va letto prima dei risultati, per non perdere notifiche
+                changed = job._changed
+                if offset < job.base:
+                    log.warning(f"[daemon] Job {job.id}: lettore troppo lento, "
+                                f"saltate {job.base - offset} righe")
+                    offset = job.base
+                    complete = False
+                if offset < job.count:
+                    lines = job.lines(offset)
+                    offset += len(lines)
+                    await response.write(("\n".join(lines) + "\n").encode("utf-8"))
+                    continue
+                if job.status in FINISHED or not follow:
+                    break
+                await changed.wait()
+        finally:
+            job.readers -= 1
+        if complete and job.status in FINISHED and not job.readers:
+            job.release()
+        await response.write_eof()
+        return response
@@ -0,0 +1,79 @@
+# Client del demone `reconx serve`: solo libreria standard, per non
+# appesantire l'avvio della CLI che gli delega le scansioni
+import json
+import urllib.error
+import urllib.parse
+import urllib.request
+
+from reconx.core.settings import DEFAULT_DAEMON_URL, DEFAULT_JOB_PRIORITY
+
+
+class DaemonError(Exception):
+    """Demone non raggiungibile o richiesta rifiutata."""
+
+
+class DaemonClient:
+    """Chiamate sincrone all'API HTTP/JSON del demone (vedi reconx.core.daemon)."""
+
+    def __init__(self, url=DEFAULT_DAEMON_URL, token=None, timeout=10.0):
+        self.url = url.rstrip("/")
+        self.token = token
+        self.timeout = timeout
+
+    def _open(self, method, path, body=None, timeout=None):
+        headers = {"Accept": "application/json"}
+        data = None
+        if body is not None:
+            data = json.dumps(body).encode("utf-8")
+            headers["Content-Type"] = "application/json"
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        request = urllib.request.Request(self.url + path, data=data, headers=headers,
+                                         method=method)
+        try:
+            return urllib.request.urlopen(request, timeout=timeout)
+        except urllib.error.HTTPError as e:
+            try:
+                message = json.loads(e.read()).get("error", e.reason)
+            except ValueError:
+                message = e.reason
+            raise DaemonError(f"{method} {path}: HTTP {e.code} ({message})") from None
+        except OSError as e:
+            raise DaemonError(f"demone non raggiungibile su {self.url}: {e}") from None
+
+    def _call(self, method, path, body=None):
+        with self._open(method, path, body, self.timeout) as response:
+            return json.loads(response.read())
+
+    def health(self):
+        return self._call("GET", "/health")
+
+    def submit(self, targets, priority=DEFAULT_JOB_PRIORITY, incremental=False,
+               concurrency=None):
+        """Accoda una scansione dei `targets` e restituisce lo stato del job."""
+        body = {"targets": list(targets), "priority": priority, "incremental": incremental}
+        if concurrency is not None:
+            body["concurrency"] = concurrency
+        return self._call("POST", "/jobs", body)
+
+    def jobs(self):
+        return self._call("GET", "/jobs")["jobs"]
+
+    def job(self, job_id):
+        return self._call("GET", f"/jobs/{job_id}")
+
+    def cancel(self, job_id):
+        return self._call("DELETE", f"/jobs/{job_id}")
+
+    def results(self, job_id, offset=0, follow=True):
+        """
+        Generatore dei finding del job (dict), letti dallo stream NDJSON
+        man mano che il demone li produce; con `follow` termina alla fine
+        del job.
+        """
+        query = urllib.parse.urlencode({"offset": offset, "follow": int(follow)})
+        # Nessun timeout: un job può restare a lungo senza nuovi risultati
+        with self._open("GET", f"/jobs/{job_id}/results?{query}") as response:
+            for line in response:
+                if line.strip():
+                    yield json.loads(line)
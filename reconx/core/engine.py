@@ -1,70 +1,448 @@
-import importlib
 import asyncio
 import json
-from pathlib import Path
+import logging
+import time
+import uuid
+from datetime import datetime
 from urllib.parse import urlparse
 
-from reconx.core.storage import init_db, save_findings
+from reconx.core.coalesce import get_coalescer
+from reconx.core.context import ScanContext
+from reconx.core.executors import run_plugin
+from reconx.core.expansion import ExpansionPipeline
+from reconx.core.finding import Finding, utc_timestamp
+from reconx.core.metrics import ScanMetrics, get_metrics, instrument_loop
+from reconx.core.registry import get_registry
+from reconx.core.storage import (
+    init_db,
+    latest_findings,
+    save_findings,
+    save_scan_metrics,
+)
 from reconx.core.logging import setup_logger
-from reconx.core.schema import validate_finding
+from reconx.core.schema import validate_findings
+from reconx.core.settings import (
+    DEFAULT_CONCURRENCY,
+    DEFAULT_EXPAND_DEPTH,
+    DEFAULT_EXPAND_FANOUT,
+    DEFAULT_PLUGIN_TIMEOUT,
+    DEFAULT_SCAN_TIMEOUT,
+)
 
 log = setup_logger("engine")
 
+# Finding salvati per transazione durante l'espansione dei sottodomini
+# e la risoluzione massiva
+STREAM_SAVE_BATCH = 500
 
-async def run_scan(target: str):
+
+def _discover_plugins():
+    """Plugin disponibili, dal registro condiviso (import lazy)."""
+    return get_registry().plugins()
+
+
+def _is_error(finding):
+    """Vero per i finding che registrano un errore (evidence con label "error")."""
+    return any(ev.get("label") == "error" for ev in finding.get("evidence", []))
+
+
+def has_errors(findings):
+    """Vero se tra i finding di un plugin c'è un esito di errore (anche timeout)."""
+    return any(_is_error(f) for f in findings)
+
+
+def fresh_until(findings):
     """
-    Carica ed esegue tutti i plugin su un singolo target.
-    Aggrega i risultati, li valida, li stampa e li salva in SQLite.
+    Istante (epoch) fino al quale i finding di un plugin restano validi,
+    cioè il minimo di scanned_at + meta.ttl_seconds. Restituisce None se
+    vanno rigenerati: nessun finding, TTL assente o nullo, oppure esito di
+    errore.
     """
-    # Normalizzazione input (gestisce URL completi come https://example.com)
+    if not findings:
+        return None
+    expiry = None
+    for f in findings:
+        ttl = f.get("meta", {}).get("ttl_seconds")
+        if not ttl or _is_error(f):
+            return None
+        scanned = datetime.fromisoformat(f["scanned_at"].replace("Z", "+00:00"))
+        until = scanned.timestamp() + ttl
+        expiry = until if expiry is None else min(expiry, until)
+    return expiry
+
+
+def normalize_target(target):
+    """Riduce un URL completo (es. https://example.com/x) al nome host."""
     if "://" in target:
-        parsed = urlparse(target)
-        target = parsed.hostname or target
-        log.info(f"[engine] Input normalizzato a dominio: {target}")
+        return urlparse(target).hostname or target
+    return target
+
+
+def _timeout_finding(target, plugin, seconds):
+    """Finding di errore per un plugin interrotto da una scadenza."""
+    return Finding(
+        target=target,
+        scanned_at=utc_timestamp(),
+        module=plugin.name,
+        type="plugin_timeout",
+        confidence=0.0,
+        priority=1,
+        evidence=[{"label": "error", "value": f"timeout dopo {seconds:.1f}s"}],
+        meta={"source": "engine", "ttl_seconds": 0},
+    )
 
-    log.info(f"[engine] Avvio scansione per target: {target}")
 
-    plugins_dir = Path(__file__).resolve().parent.parent / "plugins"
-    results = []
+async def _execute(plugin, target, plugin_timeout, ctx, call):
+    # Task dedicato creato con la misura attiva, così anche il
+    # tempo CPU dei suoi passi (e dei task figli) viene attribuito.
+    # I plugin "thread" e "process" girano fuori dal loop: il loro tempo
+    # risulta come attesa (io_seconds)
+    task = asyncio.ensure_future(run_plugin(plugin, target, ctx))
+    try:
+        plugin_results = await asyncio.wait_for(task, timeout=plugin_timeout)
+    except asyncio.TimeoutError:
+        call.timeouts += 1
+        log.warning(f"[engine] Timeout di {plugin.name} dopo {plugin_timeout}s")
+        return [_timeout_finding(target, plugin, plugin_timeout)]
+
+    # Validazione schema JSON dell'intero lotto
+    valid, invalid = validate_findings(plugin_results)
+    for _, error in invalid:
+        log.warning(f"[engine] Risultato non valido da {plugin.name}: {error}")
+    call.findings += len(valid)
+    call.invalid += len(invalid)
+
+    scanned_at = utc_timestamp()
+    findings = []
+    for f in valid:
+        if isinstance(f, Finding):
+            if f.scanned_at is None:
+                f.scanned_at = scanned_at
+        else:
+            f = Finding.from_dict(f, scanned_at)
+        findings.append(f)
+    return findings
+
+
+async def _run_plugin(plugin, target, plugin_timeout, ctx=None, call=None, coalescer=None):
+    """
+    Esegue un plugin con timeout e restituisce i soli risultati validi come
+    Finding; i dict restituiti dal plugin vengono convertiti e quelli senza
+    `scanned_at` ricevono un unico timestamp per l'intera esecuzione.
+    Se `call` (una metrics.PluginCall) è indicata, vi registra tempi,
+    conteggi, errori e accessi alla cache dell'esecuzione.
+
+    Con un `coalescer` le esecuzioni contemporanee dello stesso plugin
+    sullo stesso target (anche da motori diversi, purché con contesti della
+    stessa identità, vedi ScanContext.identity) condividono un'unica
+    chiamata, e gli esiti di errore recenti vengono riusati (vedi
+    reconx.core.coalesce); `call.shared` conta le esecuzioni servite così.
+    Ogni chiamante riceve la propria lista (i Finding sono condivisi).
+    """
+    log.info(f"[+] Eseguo plugin: {plugin.name}")
+    if call is None:
+        call = ScanMetrics(None, target).start(plugin.name)
+    try:
+        with call:
+            if coalescer is None:
+                findings = await _execute(plugin, target, plugin_timeout, ctx, call)
+            else:
+                findings = list(await coalescer.run(
+                    (plugin.name, target, ctx.identity if ctx is not None else None),
+                    lambda: _execute(plugin, target, plugin_timeout, ctx, call),
+                    failed=has_errors,
+                    timeout=plugin_timeout,
+                ))
+    except asyncio.TimeoutError:
+        # Attesa della chiamata condivisa oltre il proprio timeout
+        call.timeouts += 1
+        log.warning(f"[engine] Timeout di {plugin.name} dopo {plugin_timeout}s")
+        return [_timeout_finding(target, plugin, plugin_timeout)]
+    except Exception as e:
+        call.errors += 1
+        log.error(f"[engine] Errore eseguendo {plugin.name}: {e}")
+        return []
+    return findings
+
+
+class ScanEngine:
+    """
+    Motore di scansione riutilizzabile tra più target.
+    Plugin, database e impostazioni vengono inizializzati una sola volta,
+    così una scansione batch paga il setup una volta sola.
+    """
 
-    # Inizializza database
-    init_db()
+    def __init__(
+        self,
+        plugins=None,
+        plugin_timeout: float = DEFAULT_PLUGIN_TIMEOUT,
+        scan_timeout: float = DEFAULT_SCAN_TIMEOUT,
+        ctx=None,
+        coalescer=None,
+    ):
+        if plugins is None:
+            plugins = _discover_plugins()
+        self.plugins = plugins
+        self.plugin_timeout = plugin_timeout
+        self.scan_timeout = scan_timeout
+        # Contesto condiviso da tutti i plugin e da tutti i target
+        self._owns_ctx = ctx is None
+        self.ctx = ctx if ctx is not None else ScanContext()
+        # Chiamate identiche in corso condivise tra tutti i motori del processo
+        self.coalescer = coalescer if coalescer is not None else get_coalescer()
 
-    # Scansiona la cartella plugins/
-    for plugin_path in (Path.cwd() / "plugins").iterdir():
-        if plugin_path.is_dir() and (plugin_path / "plugin.py").exists():
-            module_name = f"plugins.{plugin_path.name}.plugin"
+        # Inizializza database
+        init_db()
+
+    async def close(self):
+        """Chiude le risorse condivise del contesto creato dal motore."""
+        if self._owns_ctx:
+            await self.ctx.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def scan(self, target: str, save: bool = True, incremental: bool = False,
+                   report=None):
+        """
+        Esegue tutti i plugin su un singolo target, in parallelo.
+        Ogni plugin ha a disposizione `plugin_timeout` secondi e l'intera
+        scansione `scan_timeout` secondi: allo scadere si restituiscono i
+        risultati parziali e i plugin interrotti vengono registrati come
+        finding di tipo `plugin_timeout`.
+
+        Con `incremental=True` i plugin i cui ultimi risultati salvati sono
+        ancora validi secondo il loro TTL non vengono rieseguiti: i loro
+        finding sono riletti dal database e restituiti insieme ai nuovi.
+        Se `report` è un dict, vi vengono scritti i plugin eseguiti
+        (`executed`), quelli saltati (`skipped`) e il riepilogo delle
+        metriche della scansione (`metrics`).
+
+        Le metriche di ogni plugin (tempo totale, CPU e attesa, finding,
+        scarti di validazione, errori, timeout, accessi alla cache) sono
+        aggregate nel registro di processo (metrics.get_metrics()) e, se
+        `save` è vero, salvate nella tabella scan_metrics.
+        """
+        # Normalizzazione input (gestisce URL completi come https://example.com)
+        if "://" in target:
+            target = normalize_target(target)
+            log.info(f"[engine] Input normalizzato a dominio: {target}")
+
+        log.info(f"[engine] Avvio scansione per target: {target}")
+        started = time.monotonic()
+        scan_id = uuid.uuid4().hex
+        metrics = ScanMetrics(scan_id, target)
+        instrument_loop()
+
+        plugins, reused, skipped = self.plugins, [], []
+        if incremental:
+            previous = latest_findings(target)
+            now = time.time()
+            plugins = []
+            for p in self.plugins:
+                until = fresh_until(previous.get(p.name))
+                if until is not None and until > now:
+                    reused.extend(previous[p.name])
+                    skipped.append(p.name)
+                else:
+                    plugins.append(p)
+            if skipped:
+                log.info(f"[engine] Risultati ancora validi, salto: {', '.join(skipped)}")
+            metrics.reused = skipped
+        if report is not None:
+            report["executed"] = [p.name for p in plugins]
+            report["skipped"] = skipped
+
+        # Avvia tutti i plugin contemporaneamente
+        tasks = {}
+        for p in plugins:
+            call = metrics.start(p.name)
+            task = asyncio.create_task(
+                _run_plugin(p, target, self.plugin_timeout, self.ctx, call,
+                            self.coalescer)
+            )
+            tasks[task] = (p, call)
+        results = []
+        if tasks:
             try:
-                plugin = importlib.import_module(module_name)
-            except Exception as e:
-                log.error(f"[engine] Errore caricando {module_name}: {e}")
-                continue
-
-            # Esegue il plugin
-            log.info(f"[+] Eseguo plugin: {plugin.name}")
-            if hasattr(plugin, "run"):
-                try:
-                    plugin_results = await plugin.run(target, ctx=None)
+                done, pending = await asyncio.wait(tasks, timeout=self.scan_timeout)
+            except asyncio.CancelledError:
+                # Scansione annullata (es. job cancellato nel demone):
+                # i plugin in corso non devono proseguire da soli
+                for task in tasks:
+                    task.cancel()
+                raise
+            for task in tasks:
+                if task in done:
+                    results.extend(task.result())
+                else:
+                    plugin, call = tasks[task]
+                    call.timeouts += 1
+                    task.cancel()
+                    log.warning(
+                        f"[engine] Scadenza scansione: {plugin.name} interrotto"
+                    )
+                    results.append(
+                        _timeout_finding(target, plugin, self.scan_timeout)
+                    )
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        log.info(
+            f"[engine] Scansione di {target} completata in "
+            f"{time.monotonic() - started:.2f}s"
+        )
+        metrics.finish()
+        get_metrics().record(metrics)
+        summary = metrics.summary()
+        if log.isEnabledFor(logging.INFO):
+            log.info(f"[metrics] {json.dumps(summary)}")
+        if report is not None:
+            report["metrics"] = summary
 
-                    # Validazione schema JSON per ogni risultato
-                    for r in plugin_results:
-                        try:
-                            validate_finding(r)
-                        except Exception as ve:
-                            log.warning(f"[engine] Risultato non valido da {plugin.name}: {ve}")
-                            continue
-                        results.append(r)
+        # Salva i risultati nel database SQLite (quelli riusati ci sono già)
+        if save:
+            if results:
+                save_findings(results, scan_id=scan_id)
+                log.info(f"[engine] {len(results)} risultati salvati nel database.")
+            else:
+                log.info("[engine] Nessun risultato da salvare.")
+            if metrics.calls:
+                save_scan_metrics(metrics)
+        return reused + results
 
+    async def expand(self, target, depth=DEFAULT_EXPAND_DEPTH, fanout=DEFAULT_EXPAND_FANOUT,
+                     save=True, report=None):
+        """
+        Mappa i sottodomini di `target` in un solo passaggio: i nomi trovati
+        nei certificati vengono risolti via DNS e, fino a `depth` livelli,
+        usati per nuove ricerche (vedi reconx.core.expansion).
+        Async generator: i finding sono prodotti man mano che arrivano e
+        salvati a lotti, senza accumularli in memoria. Se `report` è un
+        dict, al termine vi vengono scritte le statistiche della pipeline.
+        """
+        target = normalize_target(target)
+        pipeline = ExpansionPipeline(target, self.ctx, depth=depth, fanout=fanout)
+        scan_id = uuid.uuid4().hex
+        batch = []
+        try:
+            async for finding in pipeline.run():
+                valid, invalid = validate_findings([finding])
+                for _, error in invalid:
+                    log.warning(f"[engine] Risultato non valido in espansione: {error}")
+                if not valid:
+                    continue
+                if save:
+                    batch.append(finding)
+                    if len(batch) >= STREAM_SAVE_BATCH:
+                        save_findings(batch, scan_id=scan_id)
+                        batch = []
+                yield finding
+        finally:
+            if batch:
+                save_findings(batch, scan_id=scan_id)
+            if report is not None:
+                report.update(pipeline.stats)
+
+    async def resolve(self, names, record_types=("A",), concurrency=None, save=True,
+                      report=None):
+        """
+        Risolve un iterabile di nomi (anche milioni, letto in modo lazy) con
+        la modalità massiva di dns_basic (ctx.mass_resolver).
+        Async generator di (finding, esito); vengono salvati, a lotti, solo i
+        finding dei nomi che hanno risposte, con modulo "massdns" (distinto
+        da dns_basic, perché coprono solo `record_types`). Se `report` è un dict, al
+        termine contiene i conteggi per esito, le query inviate e le
+        risposte al secondo.
+        """
+        dns_basic = get_registry().get("dns_basic").load()
+        scan_id = uuid.uuid4().hex
+        statuses = {}
+        batch = []
+        started = time.monotonic()
+        try:
+            async for finding, status in dns_basic.resolve_many(
+                    names, self.ctx, record_types, concurrency):
+                statuses[status] = statuses.get(status, 0) + 1
+                if save and finding["evidence"][0]["value"]:
+                    batch.append(finding)
+                    if len(batch) >= STREAM_SAVE_BATCH:
+                        save_findings(batch, scan_id=scan_id)
+                        batch = []
+                yield finding, status
+        finally:
+            if batch:
+                save_findings(batch, scan_id=scan_id)
+            if report is not None:
+                elapsed = time.monotonic() - started
+                total = sum(statuses.values())
+                report.update(self.ctx.mass_resolver.stats)
+                report.update(
+                    results=total,
+                    statuses=statuses,
+                    elapsed=elapsed,
+                    per_sec=total / elapsed if elapsed else 0.0,
+                )
+
+    async def scan_many(self, targets, concurrency=DEFAULT_CONCURRENCY, on_result=None,
+                        incremental=False):
+        """
+        Scansiona un iterabile di target (anche molto lungo) con al più
+        `concurrency` target in parallelo. I target vengono letti in modo
+        lazy e i risultati salvati man mano; `on_result(target, results)`
+        viene invocata al termine di ciascun target.
+        Restituisce un riepilogo con conteggi e throughput.
+        """
+        targets = iter(targets)
+        stats = {"targets": 0, "findings": 0, "errors": 0, "skipped_plugins": 0}
+        started = time.monotonic()
+
+        async def worker():
+            # Tutti i worker condividono lo stesso iteratore (single thread)
+            for target in targets:
+                report = {}
+                try:
+                    results = await self.scan(target, incremental=incremental,
+                                              report=report)
                 except Exception as e:
-                    log.error(f"[engine] Errore eseguendo {plugin.name}: {e}")
-
-    # Salva i risultati nel database SQLite
-    if results:
-        save_findings(results)
-        log.info(f"[engine] {len(results)} risultati salvati nel database.")
-    else:
-        log.info("[engine] Nessun risultato da salvare.")
-
-    # Stampa JSON per la CLI
-    print(json.dumps(results, indent=2))
-    return results
+                    log.error(f"[engine] Errore scansionando {target}: {e}")
+                    stats["errors"] += 1
+                    results = []
+                stats["targets"] += 1
+                stats["findings"] += len(results)
+                stats["skipped_plugins"] += len(report.get("skipped", ()))
+                if on_result:
+                    on_result(target, results)
+
+        await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+
+        elapsed = time.monotonic() - started
+        stats["elapsed"] = elapsed
+        stats["targets_per_sec"] = stats["targets"] / elapsed if elapsed else 0.0
+        log.info(
+            f"[engine] Batch completato: {stats['targets']} target, "
+            f"{stats['findings']} risultati in {elapsed:.2f}s"
+        )
+        return stats
+
+
+async def run_scan(
+    target: str,
+    plugin_timeout: float = DEFAULT_PLUGIN_TIMEOUT,
+    scan_timeout: float = DEFAULT_SCAN_TIMEOUT,
+    plugins=None,
+    incremental: bool = False,
+    report=None,
+    ctx=None,
+):
+    """
+    Carica ed esegue tutti i plugin su un singolo target (vedi ScanEngine.scan).
+    Aggrega i risultati, li valida e li salva in SQLite (la stampa è
+    compito del chiamante). Restituisce una lista di Finding. Un `ctx`
+    passato dal chiamante non viene chiuso.
+    """
+    async with ScanEngine(plugins, plugin_timeout, scan_timeout, ctx=ctx) as engine:
+        return await engine.scan(target, incremental=incremental, report=report)
@@ -0,0 +1,145 @@
+# Esecuzione dei plugin secondo l'executor dichiarato: event loop, thread o processi
+import asyncio
+import atexit
+import functools
+import importlib
+import multiprocessing
+import pickle
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from reconx.core.logging import setup_logger
+from reconx.core.settings import DEFAULT_PROCESSES
+
+log = setup_logger("engine")
+
+# Valori ammessi per l'attributo `executor` dei plugin
+EXECUTORS = ("async", "thread", "process")
+
+# I processi del pool non vengono creati con fork: erediterebbero le
+# connessioni SQLite aperte (storage, cache), i lock eventualmente tenuti da
+# altri thread (pulizia della cache, logging) e il thread di scrittura dei
+# log, con rischio di stalli o database corrotti
+PROCESS_START_METHOD = "forkserver"
+
+_process_pool = None
+_process_pool_size = DEFAULT_PROCESSES
+_lock = threading.Lock()
+
+
+def configure_process_pool(size=DEFAULT_PROCESSES):
+    """
+    Imposta il numero di processi del pool condiviso (None: uno per core).
+    Un pool già avviato con una dimensione diversa viene chiuso e
+    ricreato al prossimo utilizzo.
+    """
+    global _process_pool_size
+    with _lock:
+        if size != _process_pool_size:
+            _process_pool_size = size
+            _shutdown()
+
+
+def get_process_pool():
+    """Pool di processi condiviso dal processo, creato al primo utilizzo."""
+    global _process_pool
+    with _lock:
+        if _process_pool is None:
+            _process_pool = ProcessPoolExecutor(
+                max_workers=_process_pool_size,
+                mp_context=multiprocessing.get_context(PROCESS_START_METHOD),
+            )
+            log.info(f"[executors] Pool di processi avviato "
+                     f"({_process_pool._max_workers} processi)")
+        return _process_pool
+
+
+def _shutdown():
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
+
+
+def shutdown_process_pool():
+    """Chiude il pool di processi (i lavori in coda vengono annullati)."""
+    with _lock:
+        _shutdown()
+
+
+atexit.register(shutdown_process_pool)
+
+
+def plugin_executor(plugin):
+    """Executor dichiarato dal plugin ("async" se assente)."""
+    executor = getattr(plugin, "executor", "async")
+    if executor not in EXECUTORS:
+        raise ValueError(f"executor non valido per {plugin.name}: {executor!r}")
+    return executor
+
+
+def _module(plugin):
+    # PluginSpec del registro (import lazy) oppure modulo/oggetto con run()
+    return plugin.load() if hasattr(plugin, "load") else plugin
+
+
+def _process_config(ctx):
+    """Opzioni del contesto trasferibili a un altro processo (serializzabili)."""
+    if ctx is None:
+        return None
+    config = {}
+    for key, value in ctx.config.items():
+        try:
+            pickle.dumps(value)
+        except Exception:
+            # Es. rate_limiter: nel processo figlio si usa quello di default
+            continue
+        config[key] = value
+    return config
+
+
+def _run_in_process(module_name, import_root, target, config):
+    """Eseguita nel processo figlio: importa il plugin e chiama run()."""
+    if import_root and import_root not in sys.path:
+        sys.path.insert(0, import_root)
+    module = importlib.import_module(module_name)
+    ctx = None
+    if config is not None:
+        from reconx.core.context import ScanContext
+
+        ctx = ScanContext(**config)
+    return module.run(target, ctx=ctx)
+
+
+async def run_plugin(plugin, target, ctx=None):
+    """
+    Esegue `plugin.run(target, ctx)` dove il plugin ha dichiarato:
+
+    - "async" (default): coroutine sull'event loop;
+    - "thread": funzione sincrona nel pool di thread del contesto
+      (ctx.executor), per codice bloccante;
+    - "process": funzione sincrona nel pool di processi condiviso, per
+      codice CPU-bound. Il plugin viene importato nel processo figlio per
+      nome e riceve un ScanContext costruito con le sole opzioni
+      serializzabili; risultati ed eccezioni tornano al chiamante.
+
+    Annullare l'attesa (es. per timeout) non interrompe una funzione già in
+    esecuzione in un thread o in un processo.
+    """
+    executor = plugin_executor(plugin)
+    if executor == "async":
+        return await _module(plugin).run(target, ctx=ctx)
+
+    loop = asyncio.get_running_loop()
+    if executor == "thread":
+        pool = ctx.executor if ctx is not None else None
+        call = functools.partial(_module(plugin).run, target, ctx=ctx)
+        return await loop.run_in_executor(pool, call)
+
+    module_name = getattr(plugin, "module_name", None) or _module(plugin).__name__
+    import_root = getattr(plugin, "import_root", None)
+    return await loop.run_in_executor(
+        get_process_pool(), _run_in_process, module_name, import_root, target,
+        _process_config(ctx),
+    )
@@ -0,0 +1,180 @@
+# Espansione ricorsiva dei sottodomini: certificati (crt.sh) -> DNS
+import asyncio
+import re
+
+from reconx.core.logging import setup_logger
+from reconx.core.registry import get_registry
+from reconx.core.settings import DEFAULT_EXPAND_DEPTH, DEFAULT_EXPAND_FANOUT
+
+log = setup_logger("engine")
+
+# Worker per stadio
+DEFAULT_CERT_WORKERS = 2
+DEFAULT_DNS_WORKERS = 50
+# Finding in attesa di essere consumati prima di rallentare gli stadi
+DEFAULT_OUTPUT_BUFFER = 1000
+
+_END = object()
+
+_LABEL = re.compile(r"^(?!-)[a-z0-9_-]{1,63}(?<!-)$")
+
+
+def normalise_name(name, root):
+    """
+    Normalizza un nome trovato in un certificato: minuscolo, senza
+    wildcard iniziale né punto finale. Restituisce None se il nome non è
+    un hostname valido o non appartiene al dominio `root`.
+    """
+    name = name.strip().lower().rstrip(".")
+    while name.startswith("*."):
+        name = name[2:]
+    if not name or len(name) > 253:
+        return None
+    if name != root and not name.endswith("." + root):
+        return None
+    if not all(_LABEL.match(label) for label in name.split(".")):
+        return None
+    return name
+
+
+class ExpansionPipeline:
+    """
+    Pipeline a due stadi collegati da code asincrone limitate:
+
+    - stadio certificati: cerca i certificati di un nome (crtsh_lookup) ed
+      emette i finding man mano che la risposta arriva; i nomi citati
+      vengono normalizzati, deduplicati e passati allo stadio DNS
+      (al più `fanout` nomi nuovi per ricerca);
+    - stadio DNS: risolve ogni nome (dns_basic) ed emette i finding dei
+      nomi che esistono; se la profondità lo consente il nome torna allo
+      stadio certificati per cercare livelli più profondi.
+
+    I finding escono da `run()` (async generator) appena prodotti; la coda
+    di uscita limitata rallenta gli stadi se il consumatore è più lento.
+    La coda DNS è limitata (contropressione sulla lettura dei certificati),
+    quella dei certificati no, per evitare stalli nel ciclo tra gli stadi:
+    la sua crescita è comunque limitata da `depth` e `fanout`.
+    """
+
+    def __init__(self, target, ctx, depth=DEFAULT_EXPAND_DEPTH,
+                 fanout=DEFAULT_EXPAND_FANOUT,
+                 cert_workers=DEFAULT_CERT_WORKERS, dns_workers=DEFAULT_DNS_WORKERS,
+                 output_buffer=DEFAULT_OUTPUT_BUFFER, cert_plugin=None, dns_plugin=None):
+        self.root = target.strip().lower().rstrip(".")
+        self.ctx = ctx
+        self.depth = depth
+        self.fanout = fanout
+        self.cert_workers = cert_workers
+        self.dns_workers = dns_workers
+        self.output_buffer = output_buffer
+        registry = get_registry()
+        self.cert_plugin = cert_plugin or registry.get("crtsh_lookup").load()
+        self.dns_plugin = dns_plugin or registry.get("dns_basic").load()
+        self.seen = set()
+        self.stats = {"names": 0, "resolved": 0, "certificates": 0, "findings": 0,
+                      "errors": 0, "truncated": 0}
+
+    async def _dns_put(self, name, level):
+        self._pending += 1
+        await self._dns_queue.put((name, level))
+
+    def _cert_put(self, name, level):
+        self._pending += 1
+        self._cert_queue.put_nowait((name, level))
+
+    def _done(self):
+        # Ogni nome viene accodato prima che il suo genitore sia concluso:
+        # zero lavori in sospeso significa pipeline esaurita
+        self._pending -= 1
+        if self._pending == 0:
+            self._finished = asyncio.ensure_future(self._output.put(_END))
+
+    async def _cert_worker(self):
+        while True:
+            name, level = await self._cert_queue.get()
+            try:
+                added = 0
+                async for finding, names in self.cert_plugin.stream(name, self.ctx):
+                    self.stats["certificates"] += 1
+                    await self._emit(finding)
+                    for found in names:
+                        found = normalise_name(found, self.root)
+                        if found is None or found in self.seen:
+                            continue
+                        if added >= self.fanout:
+                            self.stats["truncated"] += 1
+                            continue
+                        self.seen.add(found)
+                        added += 1
+                        await self._dns_put(found, level + 1)
+            except Exception as e:
+                self.stats["errors"] += 1
+                log.error(f"[expansion] Errore cercando certificati per {name}: {e}")
+            finally:
+                self._done()
+
+    async def _dns_worker(self):
+        while True:
+            name, level = await self._dns_queue.get()
+            try:
+                findings = await self.dns_plugin.run(name, ctx=self.ctx)
+                self.stats["names"] += 1
+                # Solo i nomi che esistono: almeno un record risolto
+                if any(ev.get("value") for f in findings for ev in f["evidence"]):
+                    self.stats["resolved"] += 1
+                    for finding in findings:
+                        await self._emit(finding)
+                    if level < self.depth:
+                        self._cert_put(name, level)
+            except Exception as e:
+                self.stats["errors"] += 1
+                log.error(f"[expansion] Errore risolvendo {name}: {e}")
+            finally:
+                self._done()
+
+    async def _emit(self, finding):
+        self.stats["findings"] += 1
+        await self._output.put(finding)
+
+    async def run(self):
+        """
+        Esegue l'espansione a partire dal target e produce i finding
+        (certificati e record DNS) man mano che gli stadi li generano.
+        """
+        self._cert_queue = asyncio.Queue()
+        self._dns_queue = asyncio.Queue(maxsize=self.dns_workers * 2)
+        self._output = asyncio.Queue(maxsize=self.output_buffer)
+        self._pending = 0
+        self._finished = None
+        self.seen.add(self.root)
+
+        log.info(f"[expansion] Avvio espansione di {self.root} "
+                 f"(profondità {self.depth}, fanout {self.fanout})")
+        workers = [asyncio.create_task(self._cert_worker())
+                   for _ in range(self.cert_workers)]
+        workers += [asyncio.create_task(self._dns_worker())
+                    for _ in range(self.dns_workers)]
+        # Il target stesso: risolto e, se la profondità lo consente,
+        # usato come punto di partenza per i certificati
+        if self.depth > 0:
+            self._cert_put(self.root, 0)
+        await self._dns_put(self.root, self.depth)
+
+        try:
+            while True:
+                finding = await self._output.get()
+                if finding is _END:
+                    break
+                yield finding
+        finally:
+            for worker in workers:
+                worker.cancel()
+            if self._finished is not None:
+                self._finished.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            log.info(
+                f"[expansion] {self.root}: {self.stats['names']} nomi risolti "
+                f"({self.stats['resolved']} esistenti), "
+                f"{self.stats['certificates']} certificati"
+            )
+
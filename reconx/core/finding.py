@@ -0,0 +1,149 @@
+# Rappresentazione compatta dei risultati e codifica JSON condivisa
+import json
+from datetime import datetime
+
+# Campi canonici, nell'ordine usato per la serializzazione
+FIELDS = ("target", "scanned_at", "module", "type", "confidence", "priority",
+          "evidence", "meta")
+_FIELD_SET = frozenset(FIELDS)
+
+
+def utc_timestamp():
+    """Timestamp ISO8601 UTC con suffisso Z (es. per `scanned_at`)."""
+    return datetime.utcnow().isoformat() + "Z"
+
+
+class Finding:
+    """
+    Risultato di un plugin con rappresentazione compatta (__slots__).
+
+    Espone anche un'interfaccia da dizionario in sola lettura/scrittura
+    (`f["module"]`, `f.get("meta")`, `"type" in f`, `dict(f)`), così il
+    codice scritto per i finding come dict continua a funzionare. Le chiavi
+    non canoniche restituite da un plugin sono conservate in `extra`.
+    """
+
+    __slots__ = FIELDS + ("extra",)
+
+    def __init__(self, target, module, type, confidence, priority, evidence, meta,
+                 scanned_at=None, extra=None):
+        self.target = target
+        self.scanned_at = scanned_at
+        self.module = module
+        self.type = type
+        self.confidence = confidence
+        self.priority = priority
+        self.evidence = evidence
+        self.meta = meta
+        self.extra = extra
+
+    @classmethod
+    def from_dict(cls, data, scanned_at=None):
+        """
+        Crea un Finding da un dict prodotto da un plugin; `scanned_at` è
+        usato se il dict non ne indica uno. Solleva KeyError se manca un
+        campo obbligatorio.
+        """
+        extra = None
+        if not _FIELD_SET.issuperset(data):
+            extra = {k: v for k, v in data.items() if k not in _FIELD_SET}
+        return cls(
+            data["target"],
+            data["module"],
+            data["type"],
+            data["confidence"],
+            data["priority"],
+            data["evidence"],
+            data["meta"],
+            data.get("scanned_at") or scanned_at,
+            extra,
+        )
+
+    def to_dict(self):
+        data = {
+            "target": self.target,
+            "scanned_at": self.scanned_at,
+            "module": self.module,
+            "type": self.type,
+            "confidence": self.confidence,
+            "priority": self.priority,
+            "evidence": self.evidence,
+            "meta": self.meta,
+        }
+        if self.scanned_at is None:
+            del data["scanned_at"]
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    # --- Interfaccia da dizionario ---
+
+    def keys(self):
+        return self.to_dict().keys()
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def __getitem__(self, key):
+        if key in _FIELD_SET:
+            value = getattr(self, key)
+            if value is not None or key != "scanned_at":
+                return value
+        elif self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key in _FIELD_SET:
+            setattr(self, key, value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __contains__(self, key):
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __eq__(self, other):
+        if isinstance(other, Finding):
+            other = other.to_dict()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    def __repr__(self):
+        return f"Finding({self.to_dict()!r})"
+
+
+def _default(obj):
+    if isinstance(obj, Finding):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+# Encoder condiviso da database, cache ed esportazione: compatto, senza il
+# controllo dei riferimenti circolari, con i Finding serializzati come dict
+_ENCODER = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False,
+                            check_circular=False, default=_default)
+
+encode = _ENCODER.encode
+
+
+def dumps(obj, indent=None):
+    """Serializza in JSON (anche Finding); con `indent` output leggibile."""
+    if indent is None:
+        return encode(obj)
+    return json.dumps(obj, indent=indent, ensure_ascii=False, default=_default)
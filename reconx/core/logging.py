@@ -1,29 +1,258 @@
+import atexit
+import itertools
+import json
 import logging
+import logging.handlers
+import os
+import queue
+import threading
+from datetime import datetime, timezone
 from pathlib import Path
 
 LOG_FILE = Path.cwd() / "reconx.log"
 
+# Rotazione del file di log: dimensione massima e file di backup conservati
+LOG_MAX_BYTES = 10 * 1024 * 1024
+LOG_BACKUPS = 5
+# Record scritti al massimo per ogni blocco del writer
+BATCH_SIZE = 512
+
+_FORMAT = "[%(asctime)s] [%(levelname)s] [%(name)s] %(message)s"
+_DATEFMT = "%Y-%m-%d %H:%M:%S"
+
+
+class JsonFormatter(logging.Formatter):
+    """Un oggetto JSON per riga (JSON Lines) con timestamp UTC, livello e logger."""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc)
+            .isoformat(timespec="milliseconds").replace("+00:00", "Z"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Campionamento per livello: con {"INFO": 10} passa un record INFO su 10.
+    I livelli non indicati passano tutti.
+    """
+
+    def __init__(self, rates=None):
+        super().__init__()
+        self.set_rates(rates)
+
+    def set_rates(self, rates):
+        self.rates = {}
+        for level, every in (rates or {}).items():
+            if isinstance(level, str):
+                level = logging.getLevelName(level.upper())
+            if not isinstance(level, int):
+                raise ValueError(f"livello di log sconosciuto: {level}")
+            if every > 1:
+                self.rates[level] = int(every)
+        self._counters = {level: itertools.count() for level in self.rates}
+
+    def filter(self, record):
+        every = self.rates.get(record.levelno)
+        if every is None:
+            return True
+        return next(self._counters[record.levelno]) % every == 0
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    # Il writer parte al primo record (anche nei processi figli dopo una fork)
+    def enqueue(self, record):
+        if _writer_pid != os.getpid():
+            _start_writer()
+        super().enqueue(record)
+
+    def prepare(self, record):
+        # Fissa il messaggio senza copiare il record (i casi con traceback
+        # seguono la strada standard)
+        if record.exc_info or record.stack_info:
+            return super().prepare(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+class _Batched:
+    # emit() non svuota il buffer a ogni record: lo fa il writer a fine blocco
+    def flush(self):
+        pass
+
+    def flush_batch(self):
+        try:
+            super().flush()
+        except (OSError, ValueError):
+            # Stream chiuso o non scrivibile (es. stderr a fine processo)
+            pass
+
+
+class _StreamHandler(_Batched, logging.StreamHandler):
+    pass
+
+
+class _RotatingFileHandler(_Batched, logging.handlers.RotatingFileHandler):
+    pass
+
+
+class _LogWriter:
+    """
+    Thread che scrive i record accodati: li preleva a blocchi e svuota i
+    buffer di console e file una volta per blocco, non per ogni riga.
+    """
+
+    _STOP = object()
+
+    def __init__(self, log_queue, handlers, batch_size=BATCH_SIZE):
+        self.queue = log_queue
+        self.handlers = handlers
+        self.batch_size = batch_size
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="reconx-log", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = False
+            for record in batch:
+                if record is self._STOP:
+                    stop = True
+                    continue
+                for handler in self.handlers:
+                    if record.levelno >= handler.level:
+                        handler.handle(record)
+            for handler in self.handlers:
+                handler.flush_batch()
+            if stop:
+                return
+
+    def stop(self):
+        """Scrive i record ancora in coda e ferma il thread."""
+        self.queue.put(self._STOP)
+        self._thread.join()
+        for handler in self.handlers:
+            handler.close()
+
+
+# Coda e handler condivisi da tutti i logger creati con setup_logger:
+# il chiamante formatta il messaggio e lo accoda, mentre la scrittura su
+# console e file avviene nel thread del writer, fuori dall'event loop.
+_queue = queue.SimpleQueue()
+_sampler = SamplingFilter()
+_handler = _QueueHandler(_queue)
+_handler.addFilter(_sampler)
+
+_lock = threading.RLock()
+_writer = None
+_writer_pid = None
+_loggers = set()
+_settings = {
+    "json_lines": False,
+    "log_file": LOG_FILE,
+    "max_bytes": LOG_MAX_BYTES,
+    "backups": LOG_BACKUPS,
+    "console": True,
+    "level": None,
+}
+
+
+def _build_handlers():
+    if _settings["json_lines"]:
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter(_FORMAT, datefmt=_DATEFMT)
+    handlers = []
+
+    # Output su console
+    if _settings["console"]:
+        handlers.append(_StreamHandler())
+
+    # Output su file con rotazione per dimensione; si apre alla prima scrittura
+    if _settings["log_file"]:
+        handlers.append(_RotatingFileHandler(
+            _settings["log_file"],
+            maxBytes=_settings["max_bytes"],
+            backupCount=_settings["backups"],
+            encoding="utf-8",
+            delay=True,
+        ))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    return handlers
+
+
+def _start_writer():
+    global _writer, _writer_pid
+    with _lock:
+        if _writer_pid == os.getpid():
+            return
+        _writer = _LogWriter(_queue, _build_handlers())
+        _writer.start()
+        _writer_pid = os.getpid()
+
+
+def flush_logging():
+    """
+    Scrive tutti i record in coda, ferma il writer e chiude i file;
+    il writer riparte da solo al record successivo.
+    """
+    global _writer, _writer_pid
+    with _lock:
+        if _writer is not None and _writer_pid == os.getpid():
+            _writer.stop()
+        _writer = None
+        _writer_pid = None
+
+
+def configure_logging(json_lines=False, log_file=LOG_FILE, max_bytes=LOG_MAX_BYTES,
+                      backups=LOG_BACKUPS, console=True, sampling=None, level=None):
+    """
+    Configura la destinazione dei log condivisa da tutti i logger ReconX.
+
+    - `json_lines`: una riga JSON per record invece del formato testuale
+    - `log_file`: file di log (None per disattivarlo), ruotato ogni
+      `max_bytes` conservando `backups` file precedenti
+    - `console`: scrive anche su stderr
+    - `sampling`: {livello: N} per tenere un record ogni N (es. {"INFO": 10})
+    - `level`: livello minimo dei logger già creati e futuri
+    """
+    with _lock:
+        flush_logging()
+        _settings.update(json_lines=json_lines, log_file=log_file, max_bytes=max_bytes,
+                         backups=backups, console=console, level=level)
+        _sampler.set_rates(sampling)
+        if level is not None:
+            for name in _loggers:
+                logging.getLogger(name).setLevel(level)
+
+
 def setup_logger(name: str = "ReconX"):
     """Crea e configura un logger centralizzato per ReconX."""
     logger = logging.getLogger(name)
 
     if not logger.handlers:
-        logger.setLevel(logging.INFO)
-
-        # Formatter uniforme
-        formatter = logging.Formatter(
-            "[%(asctime)s] [%(levelname)s] [%(name)s] %(message)s",
-            datefmt="%Y-%m-%d %H:%M:%S",
-        )
+        logger.setLevel(_settings["level"] or logging.INFO)
+        # Il logger si limita ad accodare i record (vedi _QueueHandler)
+        logger.addHandler(_handler)
+        _loggers.add(name)
 
-        # Output su console
-        ch = logging.StreamHandler()
-        ch.setFormatter(formatter)
-        logger.addHandler(ch)
+    return logger
 
-        # Output su file (rotazione base)
-        fh = logging.FileHandler(LOG_FILE, encoding="utf-8")
-        fh.setFormatter(formatter)
-        logger.addHandler(fh)
 
-    return logger
+atexit.register(flush_logging)
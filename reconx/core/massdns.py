@@ -0,0 +1,334 @@
+# Risoluzione DNS massiva: molte query contemporanee su pochi socket UDP
+import asyncio
+import ipaddress
+import itertools
+import random
+import socket
+import struct
+
+import dns.rcode
+import dns.rdata
+import dns.rdataclass
+import dns.rdatatype
+
+from reconx.core.logging import setup_logger
+from reconx.core.settings import (
+    DEFAULT_DNS_INFLIGHT,
+    DEFAULT_DNS_RETRIES,
+    DEFAULT_DNS_SOCKETS,
+    DEFAULT_DNS_TIMEOUT,
+)
+
+log = setup_logger("engine")
+
+# Sorgente del rate limiter, per resolver ("massdns:<ip>")
+RATE_SOURCE = "massdns"
+# Buffer di ricezione dei socket UDP: contiene le raffiche di risposte
+RECV_BUFFER = 4 * 1024 * 1024
+# Esiti per cui si riprova su un altro resolver
+_RETRY_RCODES = {"SERVFAIL", "REFUSED"}
+# Header senza ID (aggiunto a ogni invio): RD, una domanda
+_HEADER = struct.pack("!HHHHH", 0x0100, 1, 0, 0, 0)
+_QUESTION_TAIL = struct.Struct("!HH")
+_RR_HEADER = struct.Struct("!HHIH")
+_TC = 0x0200
+
+
+def parse_server(spec, default_port=53):
+    """Converte "ip", "ip:porta" o "[ipv6]:porta" in una tupla (ip, porta)."""
+    spec = spec.strip()
+    if spec.startswith("["):
+        host, _, port = spec[1:].partition("]")
+        port = port.lstrip(":")
+    elif spec.count(":") == 1:
+        host, _, port = spec.partition(":")
+    else:
+        host, port = spec, ""
+    ipaddress.ip_address(host)
+    return host, int(port or default_port)
+
+
+def _encode_name(name):
+    try:
+        raw = name.rstrip(".").encode("ascii")
+    except UnicodeEncodeError:
+        raw = name.rstrip(".").encode("idna")
+    labels = raw.split(b".")
+    if any(not label or len(label) > 63 for label in labels):
+        raise ValueError(f"nome DNS non valido: {name}")
+    return b"".join(bytes((len(label),)) + label for label in labels) + b"\0"
+
+
+def _skip_name(data, pos):
+    # Salta un nome in formato wire (etichette o puntatore di compressione)
+    while True:
+        length = data[pos]
+        if length == 0:
+            return pos + 1
+        if length & 0xC0 == 0xC0:
+            return pos + 2
+        pos += length + 1
+
+
+def _rdata_text(data, rdtype, pos, length):
+    if rdtype == 1 and length == 4:
+        return socket.inet_ntop(socket.AF_INET, data[pos:pos + 4])
+    if rdtype == 28 and length == 16:
+        return socket.inet_ntop(socket.AF_INET6, data[pos:pos + 16])
+    return dns.rdata.from_wire(dns.rdataclass.IN, rdtype, data, pos, length).to_text()
+
+
+def parse_response(data, question, code):
+    """
+    Analizza una risposta in formato wire senza costruire un dns.message
+    completo (è il costo dominante a migliaia di query al secondo).
+    `question` è la domanda inviata (nome wire + tipo + classe).
+    Restituisce (troncata, rcode, risposte in formato testo del tipo `code`);
+    solleva ValueError se la risposta non corrisponde alla domanda.
+    """
+    flags, qdcount, ancount = struct.unpack_from("!HHH", data, 2)
+    if not flags & 0x8000 or qdcount != 1:
+        raise ValueError("risposta DNS non valida")
+    end = 12 + len(question)
+    if data[12:end].lower() != question:
+        raise ValueError("la risposta non corrisponde alla domanda")
+    truncated = bool(flags & _TC)
+    answers = []
+    if not truncated:
+        pos = end
+        for _ in range(ancount):
+            pos = _skip_name(data, pos)
+            rdtype, _, _, length = _RR_HEADER.unpack_from(data, pos)
+            pos += _RR_HEADER.size
+            if pos + length > len(data):
+                raise ValueError("record DNS incompleto")
+            if rdtype == code:
+                answers.append(_rdata_text(data, rdtype, pos, length))
+            pos += length
+    return truncated, flags & 0x000F, answers
+
+
+class Resolution:
+    """Esito della risoluzione di un nome per un tipo di record."""
+
+    __slots__ = ("name", "rdtype", "status", "answers", "server", "attempts", "tcp")
+
+    def __init__(self, name, rdtype, status, answers=(), server=None, attempts=0, tcp=False):
+        self.name = name
+        self.rdtype = rdtype
+        # NOERROR, NXDOMAIN, SERVFAIL, ... oppure TIMEOUT / ERROR
+        self.status = status
+        self.answers = list(answers)
+        self.server = server
+        self.attempts = attempts
+        self.tcp = tcp
+
+    def __repr__(self):
+        return (f"<Resolution {self.name} {self.rdtype} {self.status} "
+                f"{self.answers!r}>")
+
+
+class _Protocol(asyncio.DatagramProtocol):
+    def __init__(self, pending):
+        self.pending = pending
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        if len(data) < 12:
+            return
+        qid = (data[0] << 8) | data[1]
+        entry = self.pending.get(qid)
+        # Solo risposte dal resolver interrogato con quell'ID
+        if entry is None or entry[0] != addr[:2]:
+            return
+        del self.pending[qid]
+        if not entry[1].done():
+            entry[1].set_result(data)
+
+    def error_received(self, exc):
+        log.debug(f"[massdns] Errore UDP: {exc}")
+
+
+def _expire(future):
+    if not future.done():
+        future.set_exception(asyncio.TimeoutError())
+
+
+class MassResolver:
+    """
+    Resolver per grandi liste di nomi. Le query sono inviate su un piccolo
+    insieme di socket UDP (per famiglia di indirizzi) e distribuite a turno
+    sui resolver configurati; le risposte sono abbinate per ID e indirizzo.
+    Ogni tentativo ha un timeout: dopo un timeout, SERVFAIL o REFUSED si
+    riprova su un altro resolver, e le risposte troncate (bit TC) sono
+    ripetute su TCP. Con `rate_limiter` ogni query attende il proprio turno
+    verso la sorgente "massdns:<ip>" (RATE_SOURCE).
+
+    Va creato e usato dentro lo stesso event loop.
+    """
+
+    def __init__(self, servers, sockets=DEFAULT_DNS_SOCKETS, inflight=DEFAULT_DNS_INFLIGHT,
+                 timeout=DEFAULT_DNS_TIMEOUT, retries=DEFAULT_DNS_RETRIES, rate_limiter=None):
+        self.servers = [parse_server(s) if isinstance(s, str) else tuple(s) for s in servers]
+        if not self.servers:
+            raise ValueError("nessun resolver DNS configurato")
+        self.sockets = sockets
+        self.inflight = inflight
+        self.timeout = timeout
+        self.retries = retries
+        self.rate_limiter = rate_limiter
+        self.stats = {"queries": 0, "timeouts": 0, "retries": 0, "tcp": 0}
+        self._inflight = asyncio.Semaphore(inflight)
+        self._next_server = itertools.cycle(range(len(self.servers)))
+        self._pools = {}
+        self._lock = asyncio.Lock()
+
+    async def _pool(self, family):
+        pool = self._pools.get(family)
+        if pool is None:
+            async with self._lock:
+                pool = self._pools.get(family)
+                if pool is None:
+                    loop = asyncio.get_running_loop()
+                    local = ("::", 0) if family == socket.AF_INET6 else ("0.0.0.0", 0)
+                    endpoints = []
+                    for _ in range(self.sockets):
+                        pending = {}
+                        transport, _ = await loop.create_datagram_endpoint(
+                            lambda pending=pending: _Protocol(pending), local_addr=local
+                        )
+                        try:
+                            transport.get_extra_info("socket").setsockopt(
+                                socket.SOL_SOCKET, socket.SO_RCVBUF, RECV_BUFFER)
+                        except OSError:
+                            pass
+                        endpoints.append((transport, pending))
+                    pool = self._pools[family] = (endpoints, itertools.cycle(endpoints))
+        return pool
+
+    async def _udp(self, query, server):
+        family = socket.AF_INET6 if ":" in server[0] else socket.AF_INET
+        _, endpoints = await self._pool(family)
+        transport, pending = next(endpoints)
+        qid = random.getrandbits(16)
+        while qid in pending:
+            qid = random.getrandbits(16)
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        pending[qid] = (server, future)
+        transport.sendto(struct.pack("!H", qid) + query, server)
+        timer = loop.call_later(self.timeout, _expire, future)
+        try:
+            return await future
+        finally:
+            timer.cancel()
+            if pending.get(qid, (None, None))[1] is future:
+                del pending[qid]
+
+    async def _tcp(self, query, server):
+        async def exchange():
+            reader, writer = await asyncio.open_connection(*server)
+            try:
+                wire = struct.pack("!H", 0) + query
+                writer.write(struct.pack("!H", len(wire)) + wire)
+                await writer.drain()
+                (length,) = struct.unpack("!H", await reader.readexactly(2))
+                return await reader.readexactly(length)
+            finally:
+                writer.close()
+
+        self.stats["tcp"] += 1
+        return await asyncio.wait_for(exchange(), self.timeout)
+
+    async def resolve(self, name, rdtype="A"):
+        """Risolve `name` per il tipo `rdtype` e restituisce una Resolution."""
+        rdtype = rdtype.upper()
+        try:
+            code = dns.rdatatype.from_text(rdtype)
+            question = _encode_name(name).lower() + _QUESTION_TAIL.pack(code, 1)
+            query = _HEADER + question
+        except Exception as e:
+            log.debug(f"[massdns] Query non valida per {name} ({rdtype}): {e}")
+            return Resolution(name, rdtype, "ERROR")
+
+        status, attempts, server = "TIMEOUT", 0, None
+        # Primo resolver a turno; ogni nuovo tentativo passa al successivo
+        first = next(self._next_server)
+        async with self._inflight:
+            for attempt in range(self.retries + 1):
+                server = self.servers[(first + attempt) % len(self.servers)]
+                attempts = attempt + 1
+                if attempt:
+                    self.stats["retries"] += 1
+                if self.rate_limiter is not None:
+                    await self.rate_limiter.acquire(f"{RATE_SOURCE}:{server[0]}")
+                self.stats["queries"] += 1
+                tcp = False
+                try:
+                    truncated, rcode, answers = parse_response(
+                        await self._udp(query, server), question, code)
+                    if truncated:
+                        tcp = True
+                        truncated, rcode, answers = parse_response(
+                            await self._tcp(query, server), question, code)
+                except (asyncio.TimeoutError, OSError, EOFError) as e:
+                    if isinstance(e, asyncio.TimeoutError):
+                        self.stats["timeouts"] += 1
+                    status = "TIMEOUT"
+                    continue
+                except Exception as e:
+                    log.debug(f"[massdns] Risposta non valida da {server[0]} per {name}: {e}")
+                    status = "ERROR"
+                    continue
+
+                status = dns.rcode.to_text(rcode)
+                if status in _RETRY_RCODES:
+                    continue
+                return Resolution(name, rdtype, status, answers, server, attempts, tcp)
+        return Resolution(name, rdtype, status, (), server, attempts)
+
+    async def resolve_many(self, names, rdtypes=("A",), concurrency=None):
+        """
+        Async generator: risolve un iterabile di nomi (anche molto lungo,
+        letto in modo lazy) per ciascun tipo in `rdtypes` e produce le
+        Resolution man mano che si completano.
+        """
+        names = iter(names)
+        output = asyncio.Queue(maxsize=1000)
+        done = object()
+
+        async def worker():
+            for name in names:
+                for rdtype in rdtypes:
+                    await output.put(await self.resolve(name, rdtype))
+
+        async def run_workers():
+            workers = concurrency or self.inflight
+            try:
+                await asyncio.gather(*(worker() for _ in range(workers)))
+            finally:
+                await output.put(done)
+
+        runner = asyncio.create_task(run_workers())
+        try:
+            while True:
+                result = await output.get()
+                if result is done:
+                    break
+                yield result
+            await runner
+        finally:
+            runner.cancel()
+
+    def close(self):
+        """Chiude i socket UDP."""
+        for endpoints, _ in self._pools.values():
+            for transport, pending in endpoints:
+                transport.close()
+                for _, future in pending.values():
+                    if not future.done():
+                        future.cancel()
+        self._pools.clear()
@@ -0,0 +1,266 @@
+# Metriche di esecuzione dei plugin: tempi, conteggi, cache ed errori
+import asyncio
+import contextvars
+import os
+import threading
+import time
+
+# Esecuzione di plugin in corso nel task corrente (ereditata dai task figli)
+_current = contextvars.ContextVar("reconx_plugin_call", default=None)
+
+# Contatori per plugin, nell'ordine usato da riepiloghi e tabella scan_metrics
+COUNTERS = (
+    "calls",
+    "wall_seconds",
+    "cpu_seconds",
+    "io_seconds",
+    "findings",
+    "invalid",
+    "errors",
+    "timeouts",
+    "cache_hits",
+    "cache_misses",
+    "shared",
+)
+
+# Nome e descrizione delle metriche Prometheus per ogni contatore
+_PROMETHEUS = {
+    "calls": ("reconx_plugin_calls_total", "Esecuzioni dei plugin."),
+    "wall_seconds": ("reconx_plugin_wall_seconds_total", "Durata delle esecuzioni."),
+    "cpu_seconds": ("reconx_plugin_cpu_seconds_total",
+                    "Tempo CPU sull'event loop speso dai plugin."),
+    "io_seconds": ("reconx_plugin_io_seconds_total",
+                   "Tempo di attesa (rete, pool di thread, altri task)."),
+    "findings": ("reconx_plugin_findings_total", "Finding validi prodotti."),
+    "invalid": ("reconx_plugin_invalid_findings_total",
+                "Finding scartati dalla validazione dello schema."),
+    "errors": ("reconx_plugin_errors_total", "Esecuzioni terminate con un'eccezione."),
+    "timeouts": ("reconx_plugin_timeouts_total", "Esecuzioni interrotte da una scadenza."),
+    "cache_hits": ("reconx_plugin_cache_hits_total", "Letture dalla cache riuscite."),
+    "cache_misses": ("reconx_plugin_cache_misses_total", "Letture dalla cache mancate."),
+    "shared": ("reconx_plugin_shared_total",
+               "Esecuzioni servite da una chiamata identica in corso o da un errore recente."),
+}
+
+
+class PluginCall:
+    """Misure di una singola esecuzione di un plugin su un target."""
+
+    def __init__(self, plugin):
+        self.plugin = plugin
+        self.started_at = time.time()
+        self.calls = 1
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.findings = 0
+        self.invalid = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.shared = 0
+
+    @property
+    def io_seconds(self):
+        """Tempo trascorso senza usare la CPU dell'event loop."""
+        return max(0.0, self.wall_seconds - self.cpu_seconds)
+
+    def as_dict(self):
+        return {field: getattr(self, field) for field in COUNTERS}
+
+    def __enter__(self):
+        self._token = _current.set(self)
+        self._wall_start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.wall_seconds = time.perf_counter() - self._wall_start
+        _current.reset(self._token)
+
+
+class _Steps:
+    """Esegue una coroutine sommando il tempo CPU di ogni suo passo."""
+
+    def __init__(self, coro, call):
+        self.coro = coro
+        self.call = call
+
+    def __await__(self):
+        coro, call = self.coro, self.call
+        value, error = None, None
+        while True:
+            started = time.thread_time()
+            try:
+                if error is not None:
+                    yielded = coro.throw(error)
+                else:
+                    yielded = coro.send(value)
+            except StopIteration as stop:
+                return stop.value
+            finally:
+                call.cpu_seconds += time.thread_time() - started
+            try:
+                value, error = (yield yielded), None
+            except BaseException as e:
+                value, error = None, e
+
+
+async def _timed(coro, call):
+    return await _Steps(coro, call)
+
+
+def _task_factory(loop, coro, **kwargs):
+    # Solo i task creati durante l'esecuzione di un plugin vengono misurati
+    context = kwargs.get("context")
+    call = context.get(_current) if context is not None else _current.get()
+    if call is not None:
+        coro = _timed(coro, call)
+    return asyncio.Task(coro, loop=loop, **kwargs)
+
+
+def instrument_loop(loop=None):
+    """
+    Installa sul loop la task factory che misura il tempo CPU dei plugin
+    (compresi i task figli, es. asyncio.gather). Non sostituisce una task
+    factory già presente: in quel caso il tempo CPU resta a zero.
+    """
+    loop = loop or asyncio.get_running_loop()
+    if loop.get_task_factory() is None:
+        loop.set_task_factory(_task_factory)
+    return loop.get_task_factory() is _task_factory
+
+
+def current_call():
+    """Esecuzione di plugin in corso nel task corrente, o None."""
+    return _current.get()
+
+
+def record_cache(hit):
+    """Registra una lettura dalla cache per il plugin in esecuzione."""
+    call = _current.get()
+    if call is not None:
+        if hit:
+            call.cache_hits += 1
+        else:
+            call.cache_misses += 1
+
+
+def record_shared():
+    """Registra un'esecuzione servita da una chiamata condivisa o dalla cache negativa."""
+    call = _current.get()
+    if call is not None:
+        call.shared += 1
+
+
+def _totals(calls):
+    totals = dict.fromkeys(COUNTERS, 0)
+    for call in calls:
+        for field in COUNTERS:
+            totals[field] += getattr(call, field)
+    return totals
+
+
+class ScanMetrics:
+    """Metriche di una scansione: una PluginCall per ogni plugin eseguito."""
+
+    def __init__(self, scan_id, target):
+        self.scan_id = scan_id
+        self.target = target
+        self.calls = []
+        self.reused = []
+        self._started = time.perf_counter()
+        self.wall_seconds = 0.0
+
+    def start(self, plugin):
+        call = PluginCall(plugin)
+        self.calls.append(call)
+        return call
+
+    def finish(self):
+        self.wall_seconds = time.perf_counter() - self._started
+
+    def summary(self):
+        """Riepilogo serializzabile in JSON."""
+        return {
+            "scan_id": self.scan_id,
+            "target": self.target,
+            "wall_seconds": round(self.wall_seconds, 6),
+            "plugins": {
+                call.plugin: {k: _round(v) for k, v in call.as_dict().items()}
+                for call in self.calls
+            },
+            "reused": list(self.reused),
+            "totals": {k: _round(v) for k, v in _totals(self.calls).items()},
+        }
+
+
+def _round(value):
+    return round(value, 6) if isinstance(value, float) else value
+
+
+class MetricsRegistry:
+    """Contatori aggregati per plugin su tutte le scansioni del processo."""
+
+    def __init__(self):
+        self.scans = 0
+        self._plugins = {}
+        self._lock = threading.Lock()
+
+    def record(self, scan):
+        """Aggiunge le misure di una ScanMetrics conclusa."""
+        with self._lock:
+            self.scans += 1
+            for call in scan.calls:
+                stats = self._plugins.setdefault(call.plugin, dict.fromkeys(COUNTERS, 0))
+                for field in COUNTERS:
+                    stats[field] += getattr(call, field)
+
+    def snapshot(self):
+        """Copia dei contatori: {"scans": N, "plugins": {nome: {contatore: valore}}}."""
+        with self._lock:
+            return {
+                "scans": self.scans,
+                "plugins": {
+                    name: {k: _round(v) for k, v in stats.items()}
+                    for name, stats in sorted(self._plugins.items())
+                },
+            }
+
+    def to_prometheus(self):
+        """Contatori nel formato testuale di Prometheus."""
+        snapshot = self.snapshot()
+        lines = [
+            "# HELP reconx_scans_total Scansioni completate.",
+            "# TYPE reconx_scans_total counter",
+            f"reconx_scans_total {snapshot['scans']}",
+        ]
+        for field in COUNTERS:
+            metric, help_text = _PROMETHEUS[field]
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} counter")
+            for name, stats in snapshot["plugins"].items():
+                lines.append(f'{metric}{{plugin="{name}"}} {stats[field]}')
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        """
+        Scrive i contatori in `path` in modo atomico (file temporaneo +
+        rename), adatto al textfile collector di node_exporter.
+        """
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp, path)
+
+    def reset(self):
+        with self._lock:
+            self.scans = 0
+            self._plugins.clear()
+
+
+_registry = MetricsRegistry()
+
+
+def get_metrics():
+    """Metriche aggregate del processo."""
+    return _registry
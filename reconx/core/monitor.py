@@ -0,0 +1,171 @@
+# Monitoraggio continuo: riscansione della watchlist guidata dai TTL dei finding
+import asyncio
+import random
+import time
+
+from reconx.core.engine import fresh_until, has_errors, normalize_target
+from reconx.core.logging import setup_logger
+from reconx.core.settings import (
+    DEFAULT_MONITOR_CONCURRENCY,
+    DEFAULT_MONITOR_JITTER,
+    DEFAULT_MONITOR_MAX_INTERVAL,
+    DEFAULT_MONITOR_MIN_INTERVAL,
+    DEFAULT_MONITOR_POLL,
+    DEFAULT_MONITOR_RETRY,
+)
+from reconx.core.storage import (
+    add_watch,
+    claim_due_watch,
+    init_db,
+    next_watch_due,
+    reschedule_watch,
+)
+
+log = setup_logger("engine")
+
+# Sorgente del rate limiter che limita le scansioni avviate dal monitoraggio
+# (es. --rate-limit monitor=2:10 per al più 2 target al secondo)
+RATE_SOURCE = "monitor"
+# Massimo numero di raddoppi dell'attesa dopo errori consecutivi (oltre
+# vale comunque max_interval; evita l'overflow con contatori molto alti)
+MAX_BACKOFF_STEPS = 32
+
+
+def watch(targets, spread=0.0):
+    """
+    Aggiunge i target alla watchlist, dovuti subito o, con `spread`,
+    distribuiti a caso nei prossimi `spread` secondi (utile per aggiungere
+    migliaia di target senza farli partire tutti insieme).
+    Restituisce quanti target non erano già presenti.
+    """
+    init_db()
+    now = time.time()
+    return add_watch(
+        (normalize_target(t), now + random.uniform(0, spread)) for t in targets
+    )
+
+
+class Monitor:
+    """
+    Scheduler che riscansiona di continuo i target della watchlist
+    (tabella `watchlist`) con un ScanEngine già pronto.
+
+    Ogni target è scansionato in modo incrementale (solo i plugin con
+    risultati scaduti) e riprogrammato alla prima scadenza dei suoi finding
+    (scanned_at + meta.ttl_seconds). I plugin in errore (eccezione, timeout
+    o finding di errore) vengono ritentati dopo `retry` secondi, raddoppiati
+    a ogni scansione fallita consecutiva; quelli senza finding o senza TTL
+    non sono un errore e vengono ripetuti dopo `min_interval`.
+    L'intervallo è limitato tra `min_interval` e `max_interval` e allungato
+    di un jitter casuale fino a `jitter` volte sé stesso, così i target
+    scansionati insieme non tornano dovuti tutti nello stesso istante.
+
+    Al più `concurrency` target sono in scansione contemporaneamente e
+    l'avvio di ogni scansione passa dal rate limiter (sorgente "monitor").
+    Lo stato è nel database: dopo un riavvio si riprende dai soli target
+    dovuti, e più processi possono servire la stessa watchlist.
+    """
+
+    def __init__(self, engine, concurrency=DEFAULT_MONITOR_CONCURRENCY,
+                 min_interval=DEFAULT_MONITOR_MIN_INTERVAL,
+                 max_interval=DEFAULT_MONITOR_MAX_INTERVAL, retry=DEFAULT_MONITOR_RETRY,
+                 jitter=DEFAULT_MONITOR_JITTER, poll=DEFAULT_MONITOR_POLL):
+        self.engine = engine
+        self.concurrency = max(1, concurrency)
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.retry = retry
+        self.jitter = jitter
+        self.poll = poll
+        # Un target preso in carico e mai riprogrammato (es. processo
+        # terminato) torna dovuto dopo questo intervallo
+        self.lease = max(2 * engine.scan_timeout, min_interval)
+        self.stats = {"scans": 0, "failures": 0, "findings": 0}
+
+    def next_due(self, results, failures, now=None, errors=()):
+        """
+        Prossima scansione (epoch) di un target a partire dai risultati
+        dell'ultima e dai plugin terminati con un'eccezione (`errors`);
+        restituisce anche se la scansione va considerata fallita.
+        """
+        now = time.time() if now is None else now
+        by_module = {}
+        for finding in results:
+            by_module.setdefault(finding["module"], []).append(finding)
+        backoff = min(self.retry * 2 ** min(failures, MAX_BACKOFF_STEPS), self.max_interval)
+        failed = False
+        due = None
+        for plugin in self.engine.plugins:
+            findings = by_module.get(plugin.name, [])
+            if plugin.name in errors or has_errors(findings):
+                failed = True
+                until = now + backoff
+            else:
+                # Nessun finding o TTL nullo: di nuovo dopo min_interval
+                until = fresh_until(findings) or now
+            due = until if due is None else min(due, until)
+        interval = min(max((due or now) - now, self.min_interval), self.max_interval)
+        return now + interval * (1 + random.uniform(0, self.jitter)), failed
+
+    async def _scan(self, target, failures):
+        report = {}
+        try:
+            await self.engine.ctx.throttle(RATE_SOURCE)
+            results = await self.engine.scan(target, incremental=True, report=report)
+            # Le eccezioni dei plugin non lasciano finding: restano nelle metriche
+            errors = {name for name, call in report["metrics"]["plugins"].items()
+                      if call["errors"]}
+        except asyncio.CancelledError:
+            # Interrotto (es. arresto): di nuovo dovuto alla ripartenza
+            reschedule_watch(target, time.time(), failures, scanned=False)
+            raise
+        except Exception as e:
+            log.error(f"[monitor] Errore scansionando {target}: {e}")
+            results = []
+            errors = {plugin.name for plugin in self.engine.plugins}
+        due, failed = self.next_due(results, failures, errors=errors)
+        failures = failures + 1 if failed else 0
+        reschedule_watch(target, due, failures)
+        self.stats["scans"] += 1
+        self.stats["failures"] += failed
+        self.stats["findings"] += len(results)
+        log.info(f"[monitor] {target}: {len(results)} risultati, prossima scansione "
+                 f"tra {due - time.time():.0f}s" + (f" ({failures} errori)" if failed else ""))
+
+    async def run(self, stop=None, once=False):
+        """
+        Esegue lo scheduler finché `stop` (asyncio.Event) non viene impostato.
+        Con `once=True` scansiona solo i target già dovuti e termina.
+        Restituisce le statistiche delle scansioni eseguite.
+        """
+        stopping = asyncio.ensure_future(stop.wait()) if stop is not None else None
+        tasks = set()
+        try:
+            while stopping is None or not stopping.done():
+                free = self.concurrency - len(tasks)
+                if free > 0:
+                    for target, failures in claim_due_watch(time.time(), free, self.lease):
+                        tasks.add(asyncio.create_task(self._scan(target, failures)))
+                if once and not tasks:
+                    break
+                # Risveglio alla prossima scadenza, alla fine di una scansione
+                # o dopo `poll` secondi (target aggiunti da altri processi)
+                wake = next_watch_due()
+                if wake is None or len(tasks) >= self.concurrency:
+                    delay = self.poll
+                else:
+                    delay = min(max(0.0, wake - time.time()), self.poll)
+                waiters = tasks | ({stopping} if stopping is not None else set())
+                if waiters:
+                    await asyncio.wait(waiters, timeout=delay,
+                                       return_when=asyncio.FIRST_COMPLETED)
+                else:
+                    await asyncio.sleep(delay)
+                tasks = {t for t in tasks if not t.done()}
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if stopping is not None:
+                stopping.cancel()
+        return self.stats
@@ -1,9 +1,12 @@
-from typing import List, Dict, Any, Protocol
+from typing import List, Dict, Any, Literal, Protocol
 
 class Plugin(Protocol):
     name: str
     version: str
     inputs_supported: set
+    # Facoltativo: dove viene eseguito run() (vedi reconx.core.executors).
+    # Con "thread" e "process" run() è una funzione sincrona.
+    executor: Literal["async", "thread", "process"]
 
     async def run(self, target: str, ctx) -> List[Dict[str, Any]]:
         ...
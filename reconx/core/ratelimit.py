@@ -0,0 +1,208 @@
+# Rate limiting per sorgente esterna (crt.sh, server WHOIS, resolver DNS)
+import asyncio
+import sqlite3
+import threading
+import time
+
+from reconx.core.logging import setup_logger
+
+log = setup_logger("engine")
+
+# Limiti di default: sorgente -> (richieste al secondo, burst).
+# "prefisso:*" vale per tutte le sorgenti con quel prefisso. Le query della
+# risoluzione massiva ("massdns:<ip>", `reconx resolve`) hanno un limite
+# proprio, più alto di quello delle scansioni ("dns:<ip>").
+DEFAULT_RATES = {
+    "crt.sh": (1.0, 5),
+    "whois:*": (2.0, 5),
+    "dns:*": (500.0, 500),
+    "massdns:*": (10000.0, 1000),
+}
+
+
+class TokenBucket:
+    """
+    Token bucket con prenotazione: ogni richiesta preleva subito un token
+    (il saldo può diventare negativo) e attende il tempo necessario a
+    ripagarlo. Le attese sono quindi servite in ordine di arrivo.
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens=1):
+        """Preleva `tokens` e restituisce i secondi da attendere prima di usarli."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= tokens
+            return max(0.0, -self.tokens / self.rate)
+
+    def refund(self, tokens=1):
+        """Restituisce token prenotati e non usati (attesa annullata)."""
+        with self._lock:
+            self.tokens = min(self.burst, self.tokens + tokens)
+
+
+class SharedTokenBucket:
+    """
+    Token bucket coordinato tra processi tramite una tabella SQLite:
+    il saldo di ogni sorgente è aggiornato in una transazione IMMEDIATE.
+    """
+
+    def __init__(self, path, source, rate, burst):
+        self.path = path
+        self.source = source
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None,
+                                   check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS rate_buckets (
+                source TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated REAL NOT NULL
+            )
+            """)
+            self._conn = conn
+        return self._conn
+
+    def reserve(self, tokens=1):
+        balance = self._update(-tokens)
+        return max(0.0, -balance / self.rate)
+
+    def refund(self, tokens=1):
+        self._update(tokens)
+
+    def _update(self, tokens):
+        # Aggiunge `tokens` (negativi per prelevare) al saldo ricaricato
+        with self._lock:
+            conn = self._connection()
+            now = time.time()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT tokens, updated FROM rate_buckets WHERE source = ?",
+                    (self.source,),
+                ).fetchone()
+                balance = self.burst
+                if row is not None:
+                    balance = min(self.burst, row[0] + max(0.0, now - row[1]) * self.rate)
+                balance = min(self.burst, balance + tokens)
+                conn.execute(
+                    "INSERT OR REPLACE INTO rate_buckets (source, tokens, updated) VALUES (?, ?, ?)",
+                    (self.source, balance, now),
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            return balance
+
+
+class RateLimiter:
+    """
+    Insieme di token bucket, uno per sorgente, condiviso da tutte le
+    scansioni del processo. Con `path` i bucket sono coordinati anche tra
+    processi diversi tramite SQLite. Le sorgenti senza limite configurato
+    non vengono rallentate.
+    """
+
+    def __init__(self, rates=None, path=None):
+        self.rates = dict(DEFAULT_RATES if rates is None else rates)
+        self.path = path
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def _rate_for(self, source):
+        if source in self.rates:
+            return self.rates[source]
+        prefix = source.split(":", 1)[0]
+        return self.rates.get(f"{prefix}:*")
+
+    def bucket(self, source):
+        """Restituisce il bucket della sorgente, o None se non è limitata."""
+        with self._lock:
+            if source not in self._buckets:
+                rate = self._rate_for(source)
+                if rate is None:
+                    bucket = None
+                elif self.path:
+                    bucket = SharedTokenBucket(self.path, source, *rate)
+                else:
+                    bucket = TokenBucket(*rate)
+                self._buckets[source] = bucket
+            return self._buckets[source]
+
+    async def acquire(self, source, tokens=1):
+        """
+        Attende finché la sorgente può ricevere `tokens` richieste. Se
+        l'attesa viene annullata (timeout del plugin, scadenza della
+        scansione, job cancellato) i token prenotati tornano al bucket,
+        così le richieste successive non ereditano il ritardo.
+        """
+        bucket = self.bucket(source)
+        if bucket is None:
+            return 0.0
+        if isinstance(bucket, SharedTokenBucket):
+            # Transazione SQLite bloccante: eseguita fuori dall'event loop
+            loop = asyncio.get_running_loop()
+            reservation = loop.run_in_executor(None, bucket.reserve, tokens)
+            try:
+                wait = await asyncio.shield(reservation)
+            except asyncio.CancelledError:
+                # La prenotazione si completa comunque nel thread: va restituita
+                def refund(future):
+                    if not future.cancelled() and future.exception() is None:
+                        self._refund(bucket, tokens)
+
+                reservation.add_done_callback(refund)
+                raise
+        else:
+            wait = bucket.reserve(tokens)
+        if wait > 0:
+            log.debug(f"[ratelimit] {source}: attesa di {wait:.2f}s")
+            try:
+                await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                self._refund(bucket, tokens)
+                raise
+        return wait
+
+    @staticmethod
+    def _refund(bucket, tokens):
+        if isinstance(bucket, SharedTokenBucket):
+            asyncio.get_running_loop().run_in_executor(None, bucket.refund, tokens)
+        else:
+            bucket.refund(tokens)
+
+
+_limiter = None
+
+
+def configure_rate_limiter(rates=None, path=None):
+    """Sostituisce il rate limiter di processo (es. da opzioni CLI)."""
+    global _limiter
+    merged = dict(DEFAULT_RATES)
+    merged.update(rates or {})
+    _limiter = RateLimiter(merged, path)
+    return _limiter
+
+
+def get_rate_limiter():
+    """Rate limiter condiviso dal processo."""
+    global _limiter
+    if _limiter is None:
+        _limiter = RateLimiter()
+    return _limiter
@@ -0,0 +1,190 @@
+# Registro centralizzato dei plugin con indice dei metadati in cache
+import ast
+import importlib
+import json
+import sys
+import threading
+from pathlib import Path
+
+from reconx.core.logging import setup_logger
+
+log = setup_logger("engine")
+
+# Cartella plugins/ del progetto, indipendente dalla working directory
+PLUGINS_DIR = Path(__file__).resolve().parent.parent.parent / "plugins"
+# Nome del file indice (nella cartella dei plugin)
+INDEX_NAME = ".index.json"
+
+_METADATA = ("name", "version", "inputs_supported")
+# Metadati facoltativi con il loro default
+_OPTIONAL = {"executor": "async"}
+
+
+def _read_metadata(path):
+    """
+    Estrae name, version, inputs_supported ed executor (facoltativo) da
+    plugin.py senza importarlo, leggendo le assegnazioni letterali di primo
+    livello. Restituisce None se i metadati non sono espressi come letterali.
+    """
+    tree = ast.parse(path.read_text(encoding="utf-8"), filename=str(path))
+    meta = {}
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and len(node.targets) == 1:
+            target = node.targets[0]
+            if isinstance(target, ast.Name) and (target.id in _METADATA
+                                                 or target.id in _OPTIONAL):
+                try:
+                    meta[target.id] = ast.literal_eval(node.value)
+                except ValueError:
+                    return None
+    if not set(_METADATA) <= set(meta):
+        return None
+    for key, default in _OPTIONAL.items():
+        meta.setdefault(key, default)
+    meta["inputs_supported"] = sorted(meta["inputs_supported"])
+    return meta
+
+
+class PluginSpec:
+    """
+    Descrive un plugin scoperto nella cartella plugins/.
+    I metadati sono disponibili senza importare il modulo, che viene
+    importato solo alla prima esecuzione (`run`) o con `load()`.
+    """
+
+    def __init__(self, registry, package, name, version, inputs_supported,
+                 executor="async"):
+        self.registry = registry
+        self.package = package
+        self.name = name
+        self.version = version
+        self.inputs_supported = set(inputs_supported)
+        # Dove viene eseguito run(): "async", "thread" o "process"
+        self.executor = executor
+        self.module_name = f"{registry.plugins_dir.name}.{package}.plugin"
+        self._module = None
+
+    def __repr__(self):
+        return f"<PluginSpec {self.name} v{self.version}>"
+
+    @property
+    def loaded(self):
+        return self._module is not None
+
+    def load(self):
+        """Importa (una sola volta) il modulo del plugin."""
+        if self._module is None:
+            self.registry._ensure_importable()
+            self._module = importlib.import_module(self.module_name)
+            log.info(f"[registry] Caricato plugin {self.name} ({self.module_name})")
+        return self._module
+
+    @property
+    def import_root(self):
+        """Cartella da aggiungere a sys.path per importare `module_name`."""
+        return str(self.registry.plugins_dir.parent)
+
+    async def run(self, target, ctx=None):
+        """Esegue il plugin sull'executor dichiarato (vedi reconx.core.executors)."""
+        from reconx.core.executors import run_plugin
+
+        return await run_plugin(self, target, ctx)
+
+
+class PluginRegistry:
+    """
+    Scopre i plugin una sola volta e mantiene un indice dei metadati su disco,
+    invalidato per singolo plugin in base all'mtime di plugin.py.
+    """
+
+    def __init__(self, plugins_dir=PLUGINS_DIR, index_file=None):
+        self.plugins_dir = Path(plugins_dir).resolve()
+        self.index_file = Path(index_file) if index_file else self.plugins_dir / INDEX_NAME
+        self._specs = None
+        self._lock = threading.Lock()
+
+    def _ensure_importable(self):
+        root = str(self.plugins_dir.parent)
+        if root not in sys.path:
+            sys.path.insert(0, root)
+
+    def _load_index(self):
+        try:
+            with open(self.index_file, "r", encoding="utf-8") as f:
+                return json.load(f).get("plugins", {})
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self, index):
+        try:
+            with open(self.index_file, "w", encoding="utf-8") as f:
+                json.dump({"plugins": index}, f, indent=2)
+        except OSError as e:
+            log.warning(f"[registry] Impossibile salvare l'indice dei plugin: {e}")
+
+    def _metadata_from_module(self, package):
+        self._ensure_importable()
+        module = importlib.import_module(f"{self.plugins_dir.name}.{package}.plugin")
+        return {
+            "name": module.name,
+            "version": module.version,
+            "inputs_supported": sorted(getattr(module, "inputs_supported", ())),
+            "executor": getattr(module, "executor", _OPTIONAL["executor"]),
+        }
+
+    def discover(self):
+        """(Ri)scansiona la cartella dei plugin aggiornando l'indice."""
+        old_index = self._load_index()
+        index = {}
+        specs = []
+        if not self.plugins_dir.is_dir():
+            log.warning(f"[registry] Cartella plugin non trovata: {self.plugins_dir}")
+        else:
+            for plugin_path in sorted(self.plugins_dir.iterdir()):
+                plugin_file = plugin_path / "plugin.py"
+                if not (plugin_path.is_dir() and plugin_file.exists()):
+                    continue
+                package = plugin_path.name
+                mtime = plugin_file.stat().st_mtime_ns
+                entry = old_index.get(package)
+                # Le voci prive dei metadati facoltativi vengono da indici
+                # precedenti: vanno rilette
+                if not entry or entry.get("mtime") != mtime or \
+                        not set(_OPTIONAL) <= set(entry):
+                    try:
+                        meta = _read_metadata(plugin_file)
+                        if meta is None:
+                            meta = self._metadata_from_module(package)
+                    except Exception as e:
+                        log.error(f"[registry] Errore leggendo {plugin_file}: {e}")
+                        continue
+                    entry = dict(meta, mtime=mtime)
+                index[package] = entry
+                specs.append(PluginSpec(self, package, entry["name"], entry["version"],
+                                        entry["inputs_supported"], entry["executor"]))
+        if index != old_index:
+            self._save_index(index)
+        self._specs = specs
+        return specs
+
+    def plugins(self):
+        """Restituisce i plugin scoperti (la scansione avviene una sola volta)."""
+        with self._lock:
+            if self._specs is None:
+                self.discover()
+            return list(self._specs)
+
+    def get(self, name):
+        """Restituisce il plugin con il nome indicato, o None."""
+        return next((p for p in self.plugins() if p.name == name), None)
+
+
+_registry = None
+
+
+def get_registry():
+    """Registro dei plugin condiviso dal processo."""
+    global _registry
+    if _registry is None:
+        _registry = PluginRegistry()
+    return _registry
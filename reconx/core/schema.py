@@ -1,5 +1,8 @@
 # Validatore schema JSON per risultati
-from jsonschema import validate, ValidationError
+from jsonschema import ValidationError
+from jsonschema.validators import validator_for
+
+from reconx.core.finding import Finding
 
 FINDING_SCHEMA = {
     "type": "object",
@@ -15,9 +18,96 @@ FINDING_SCHEMA = {
     },
 }
 
+# Validatore compilato una sola volta (lo schema viene verificato qui)
+_cls = validator_for(FINDING_SCHEMA)
+_cls.check_schema(FINDING_SCHEMA)
+_VALIDATOR = _cls(FINDING_SCHEMA)
+
+# Controlli di tipo equivalenti a quelli di jsonschema per i tipi semplici
+_TYPE_CHECKS = {
+    "string": lambda v: isinstance(v, str),
+    "number": lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+    "integer": lambda v: isinstance(v, int) and not isinstance(v, bool),
+    "array": lambda v: isinstance(v, list),
+    "object": lambda v: isinstance(v, dict),
+    "boolean": lambda v: isinstance(v, bool),
+}
+
+
+def _compile_fast_path(schema):
+    """
+    Traduce lo schema canonico in una lista di controlli Python diretti.
+    Restituisce None se lo schema usa costrutti non supportati: in quel caso
+    si usa sempre il validatore jsonschema.
+    """
+    if set(schema) - {"type", "required", "properties"} or schema.get("type") != "object":
+        return None
+    checks = []
+    properties = schema.get("properties", {})
+    for key, prop in properties.items():
+        if set(prop) != {"type"} or prop["type"] not in _TYPE_CHECKS:
+            return None
+        checks.append((key, key in schema.get("required", []), _TYPE_CHECKS[prop["type"]]))
+    if set(schema.get("required", [])) - set(properties):
+        return None
+    return checks
+
+
+_FAST_CHECKS = _compile_fast_path(FINDING_SCHEMA)
+
+
+_MISSING = object()
+
+
+def _fast_is_valid(finding):
+    if not isinstance(finding, (dict, Finding)):
+        return False
+    get = finding.get
+    for key, required, check in _FAST_CHECKS:
+        value = get(key, _MISSING)
+        if value is _MISSING:
+            if required:
+                return False
+        elif not check(value):
+            return False
+    return True
+
+
+def _error_message(finding):
+    if isinstance(finding, Finding):
+        finding = finding.to_dict()
+    error = next(_VALIDATOR.iter_errors(finding), None)
+    return error.message if error is not None else None
+
+
 def validate_finding(finding):
-    """Valida un singolo risultato secondo lo schema canonico."""
+    """Valida un singolo risultato (dict o Finding) secondo lo schema canonico."""
+    if _FAST_CHECKS is not None and _fast_is_valid(finding):
+        return
+    if isinstance(finding, Finding):
+        finding = finding.to_dict()
     try:
-        validate(instance=finding, schema=FINDING_SCHEMA)
+        _VALIDATOR.validate(finding)
     except ValidationError as e:
         raise ValueError(f"Finding non conforme allo schema: {e.message}")
+
+
+def validate_findings(findings, fast=True):
+    """
+    Valida un lotto di risultati (dict o Finding).
+    Restituisce (validi, non_validi), dove non_validi è una lista di coppie
+    (finding, messaggio di errore). Con `fast=True` si usa il percorso rapido
+    specializzato sullo schema canonico e jsonschema solo per gli scarti.
+    """
+    valid, invalid = [], []
+    use_fast = fast and _FAST_CHECKS is not None
+    for finding in findings:
+        if use_fast and _fast_is_valid(finding):
+            valid.append(finding)
+            continue
+        message = _error_message(finding)
+        if message is None:
+            valid.append(finding)
+        else:
+            invalid.append((finding, f"Finding non conforme allo schema: {message}"))
+    return valid, invalid
@@ -0,0 +1,46 @@
+# Valori di default condivisi tra engine e CLI.
+# Modulo volutamente privo di dipendenze: la CLI lo importa all'avvio.
+
+# Timeout di default (secondi): per singolo plugin e per l'intera scansione
+DEFAULT_PLUGIN_TIMEOUT = 30.0
+DEFAULT_SCAN_TIMEOUT = 60.0
+# Numero di target scansionati in parallelo in modalità batch
+DEFAULT_CONCURRENCY = 20
+# Espansione dei sottodomini: livelli di ricorsione e nomi nuovi per ricerca
+DEFAULT_EXPAND_DEPTH = 1
+DEFAULT_EXPAND_FANOUT = 1000
+# Risoluzione DNS massiva: socket UDP, query in volo, timeout per
+# tentativo (secondi) e tentativi aggiuntivi
+DEFAULT_DNS_SOCKETS = 4
+DEFAULT_DNS_INFLIGHT = 1000
+DEFAULT_DNS_TIMEOUT = 2.0
+DEFAULT_DNS_RETRIES = 2
+# Secondi per cui l'errore di un plugin su un target viene riusato
+# invece di interrogare di nuovo la sorgente (cache negativa)
+DEFAULT_NEGATIVE_TTL = 30.0
+# Pool per i plugin bloccanti ("thread") e CPU-bound ("process"):
+# thread per contesto e processi condivisi (None: uno per core)
+DEFAULT_WORKERS = 16
+DEFAULT_PROCESSES = None
+# Demone `reconx serve`: indirizzo dell'API HTTP (solo locale di default),
+# job eseguiti contemporaneamente, job conclusi conservati in memoria,
+# righe di risultati tenute in memoria per job e priorità di default (i
+# valori più bassi partono per primi)
+DEFAULT_DAEMON_HOST = "127.0.0.1"
+DEFAULT_DAEMON_PORT = 8731
+DEFAULT_DAEMON_URL = f"http://{DEFAULT_DAEMON_HOST}:{DEFAULT_DAEMON_PORT}"
+DEFAULT_DAEMON_JOBS = 4
+DEFAULT_DAEMON_KEEP = 1000
+DEFAULT_DAEMON_BUFFER = 10_000
+DEFAULT_JOB_PRIORITY = 0
+# Monitoraggio continuo (`reconx monitor`): target scansionati in parallelo,
+# limiti dell'intervallo tra due scansioni dello stesso target (secondi),
+# attesa base dopo un errore (raddoppia a ogni errore consecutivo),
+# jitter come frazione dell'intervallo e attesa massima tra due controlli
+# della watchlist
+DEFAULT_MONITOR_CONCURRENCY = 20
+DEFAULT_MONITOR_MIN_INTERVAL = 300.0
+DEFAULT_MONITOR_MAX_INTERVAL = 86400.0
+DEFAULT_MONITOR_RETRY = 600.0
+DEFAULT_MONITOR_JITTER = 0.1
+DEFAULT_MONITOR_POLL = 60.0
@@ -1,65 +1,496 @@
 # Gestione SQLite
+import hashlib
 import sqlite3
 import json
-from datetime import datetime
+import threading
+from datetime import date, datetime, timedelta
+from reconx.core.finding import Finding, encode, utc_timestamp
+from reconx.core.logging import setup_logger
+log = setup_logger("engine")
 
 DB_PATH = "reconx.db"
 
+# Connessione condivisa (una per processo) e lock per serializzarne l'uso
+_conn = None
+_conn_path = None
+_lock = threading.RLock()
+
+# Righe lette per ogni blocco durante l'esportazione
+EXPORT_CHUNK_SIZE = 5000
+EXPORT_FORMATS = ("json", "ndjson", "csv")
+
+
+def get_connection():
+    """
+    Restituisce la connessione SQLite condivisa, aprendola al primo utilizzo.
+    Il database usa il journal WAL: i lettori non bloccano lo scrittore e
+    più processi possono lavorare sullo stesso file senza "database is locked".
+    """
+    global _conn, _conn_path
+    with _lock:
+        if _conn is None or _conn_path != DB_PATH:
+            if _conn is not None:
+                _conn.close()
+            _conn = sqlite3.connect(DB_PATH, timeout=30, check_same_thread=False)
+            _conn.execute("PRAGMA journal_mode=WAL")
+            _conn.execute("PRAGMA synchronous=NORMAL")
+            _conn_path = DB_PATH
+        return _conn
+
+
+def close_db():
+    """Chiude la connessione condivisa (verrà riaperta al prossimo utilizzo)."""
+    global _conn, _conn_path
+    with _lock:
+        if _conn is not None:
+            _conn.close()
+        _conn = None
+        _conn_path = None
+
+
 def init_db():
-    conn = sqlite3.connect(DB_PATH)
+    conn = get_connection()
+    with _lock, conn:
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS findings (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            target TEXT,
+            module TEXT,
+            type TEXT,
+            confidence REAL,
+            priority INTEGER,
+            evidence TEXT,
+            meta TEXT,
+            scanned_at TEXT,
+            scan_id TEXT,
+            fingerprint TEXT,
+            first_seen TEXT,
+            last_seen TEXT,
+            seen_count INTEGER DEFAULT 1
+        )
+        """)
+        # Migrazioni per database creati da versioni precedenti
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(findings)")}
+        if "scan_id" not in columns:
+            conn.execute("ALTER TABLE findings ADD COLUMN scan_id TEXT")
+        if "fingerprint" not in columns:
+            _migrate_fingerprints(conn)
+        for column in ("target", "module", "type", "scanned_at"):
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_findings_{column} ON findings ({column})"
+            )
+        conn.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_findings_fingerprint ON findings (fingerprint)"
+        )
+        # Metriche per plugin di ogni scansione (vedi reconx.core.metrics)
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS scan_metrics (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            scan_id TEXT,
+            target TEXT,
+            plugin TEXT,
+            started_at TEXT,
+            wall_seconds REAL,
+            cpu_seconds REAL,
+            io_seconds REAL,
+            findings INTEGER,
+            invalid INTEGER,
+            errors INTEGER,
+            timeouts INTEGER,
+            cache_hits INTEGER,
+            cache_misses INTEGER,
+            shared INTEGER DEFAULT 0
+        )
+        """)
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(scan_metrics)")}
+        if "shared" not in columns:
+            conn.execute("ALTER TABLE scan_metrics ADD COLUMN shared INTEGER DEFAULT 0")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_scan_metrics_scan_id ON scan_metrics (scan_id)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_scan_metrics_plugin ON scan_metrics (plugin)")
+        # Target sorvegliati dal monitoraggio continuo (vedi reconx.core.monitor):
+        # next_due è l'istante (epoch) della prossima scansione
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS watchlist (
+            target TEXT PRIMARY KEY,
+            added_at TEXT,
+            next_due REAL,
+            last_scanned TEXT,
+            scans INTEGER DEFAULT 0,
+            failures INTEGER DEFAULT 0
+        )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_watchlist_next_due ON watchlist (next_due)")
+
+
+def _normalise(value):
+    """Forma canonica dell'evidence: chiavi e liste ordinate."""
+    if isinstance(value, dict):
+        return {k: _normalise(v) for k, v in value.items()}
+    if isinstance(value, list):
+        items = [_normalise(v) for v in value]
+        return sorted(items, key=lambda v: json.dumps(v, sort_keys=True))
+    return value
+
+
+def _fingerprint(target, module, ftype, evidence):
+    payload = json.dumps([target, module, ftype, _normalise(evidence)],
+                         sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def finding_fingerprint(finding):
+    """
+    Hash stabile che identifica un finding: target, modulo, tipo ed evidence
+    normalizzata (l'ordine dei valori non conta). Due scansioni che osservano
+    la stessa cosa producono la stessa impronta.
+    """
+    return _fingerprint(finding["target"], finding["module"], finding["type"],
+                        finding["evidence"])
+
+
+def _migrate_fingerprints(conn):
+    """
+    Aggiunge impronta e colonne first_seen/last_seen/seen_count, poi fonde i
+    duplicati esistenti in un'unica riga (la più recente) con i conteggi.
+    """
+    conn.execute("ALTER TABLE findings ADD COLUMN fingerprint TEXT")
+    conn.execute("ALTER TABLE findings ADD COLUMN first_seen TEXT")
+    conn.execute("ALTER TABLE findings ADD COLUMN last_seen TEXT")
+    conn.execute("ALTER TABLE findings ADD COLUMN seen_count INTEGER DEFAULT 1")
+
+    # Calcolo delle impronte a blocchi, per non caricare l'intera tabella
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            "SELECT id, target, module, type, evidence FROM findings "
+            "WHERE id > ? ORDER BY id LIMIT ?", (last_id, EXPORT_CHUNK_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+        conn.executemany(
+            "UPDATE findings SET fingerprint = ? WHERE id = ?",
+            [(_fingerprint(t, m, ty, json.loads(ev)), i) for i, t, m, ty, ev in rows],
+        )
+        last_id = rows[-1][0]
+
+    conn.execute("UPDATE findings SET first_seen = scanned_at, last_seen = scanned_at, seen_count = 1")
     conn.execute("""
-    CREATE TABLE IF NOT EXISTS findings (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        target TEXT,
-        module TEXT,
-        type TEXT,
-        confidence REAL,
-        priority INTEGER,
-        evidence TEXT,
-        meta TEXT,
-        scanned_at TEXT
-    )
+    CREATE TEMP TABLE _fold AS
+    SELECT fingerprint, MAX(id) AS keep, MIN(scanned_at) AS first,
+           MAX(scanned_at) AS last, COUNT(*) AS n
+    FROM findings GROUP BY fingerprint HAVING COUNT(*) > 1
+    """)
+    conn.execute("""
+    UPDATE findings SET first_seen = _fold.first, last_seen = _fold.last, seen_count = _fold.n
+    FROM _fold WHERE findings.id = _fold.keep
     """)
-    conn.close()
+    removed = conn.execute("""
+    DELETE FROM findings
+    WHERE fingerprint IN (SELECT fingerprint FROM _fold)
+      AND id NOT IN (SELECT keep FROM _fold)
+    """).rowcount
+    conn.execute("DROP TABLE _fold")
+    log.info(f"[storage] Migrazione impronte completata: fusi {removed} duplicati")
 
-def save_findings(results):
-    conn = sqlite3.connect(DB_PATH)
-    for r in results:
-        conn.execute("""
-        INSERT INTO findings (target, module, type, confidence, priority, evidence, meta, scanned_at)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            r["target"],
-            r["module"],
-            r["type"],
-            r["confidence"],
-            r["priority"],
-            json.dumps(r["evidence"]),
-            json.dumps(r["meta"]),
-            r.get("scanned_at", datetime.utcnow().isoformat() + "Z")
-        ))
-    conn.commit()
-    conn.close()
-
-def export_results(filename, fmt="json"):
-    """Esporta i risultati dal database in un file JSON o CSV."""
-    import csv
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    cur.execute("SELECT * FROM findings")
-    rows = cur.fetchall()
+
+def _finding_row(r, now, scan_id):
+    if not isinstance(r, Finding):
+        r = Finding.from_dict(r)
+    scanned_at = r.scanned_at or now
+    return (
+        r.target,
+        r.module,
+        r.type,
+        r.confidence,
+        r.priority,
+        encode(r.evidence),
+        encode(r.meta),
+        scanned_at,
+        scan_id,
+        _fingerprint(r.target, r.module, r.type, r.evidence),
+        scanned_at,
+        scanned_at,
+    )
+
+
+def save_findings(results, scan_id=None):
+    """
+    Salva i risultati (Finding o dict) in un'unica transazione con executemany.
+    I finding già presenti (stessa impronta, vedi finding_fingerprint) non
+    vengono duplicati: si aggiornano last_seen, seen_count, scanned_at e meta.
+    `scan_id` identifica la scansione che li ha prodotti (vedi latest_findings).
+    """
+    now = utc_timestamp()
+    conn = get_connection()
+    with _lock, conn:
+        conn.executemany("""
+        INSERT INTO findings (target, module, type, confidence, priority, evidence, meta,
+                              scanned_at, scan_id, fingerprint, first_seen, last_seen, seen_count)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 1)
+        ON CONFLICT (fingerprint) DO UPDATE SET
+            confidence = excluded.confidence,
+            priority = excluded.priority,
+            meta = excluded.meta,
+            scanned_at = excluded.scanned_at,
+            scan_id = excluded.scan_id,
+            last_seen = MAX(findings.last_seen, excluded.last_seen),
+            seen_count = findings.seen_count + 1
+        """, (_finding_row(r, now, scan_id) for r in results))
+
+
+def save_scan_metrics(metrics):
+    """Salva nella tabella scan_metrics una riga per plugin di una ScanMetrics."""
+    conn = get_connection()
+    with _lock, conn:
+        conn.executemany("""
+        INSERT INTO scan_metrics (scan_id, target, plugin, started_at, wall_seconds,
+                                  cpu_seconds, io_seconds, findings, invalid, errors,
+                                  timeouts, cache_hits, cache_misses, shared)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, [
+            (
+                metrics.scan_id,
+                metrics.target,
+                call.plugin,
+                datetime.utcfromtimestamp(call.started_at).isoformat() + "Z",
+                call.wall_seconds,
+                call.cpu_seconds,
+                call.io_seconds,
+                call.findings,
+                call.invalid,
+                call.errors,
+                call.timeouts,
+                call.cache_hits,
+                call.cache_misses,
+                call.shared,
+            )
+            for call in metrics.calls
+        ])
+
+
+def _row_to_finding(row):
+    return Finding(
+        target=row["target"],
+        scanned_at=row["scanned_at"],
+        module=row["module"],
+        type=row["type"],
+        confidence=row["confidence"],
+        priority=row["priority"],
+        evidence=json.loads(row["evidence"]),
+        meta=json.loads(row["meta"]),
+    )
+
+
+def latest_findings(target):
+    """
+    Restituisce, per ogni modulo, i finding dell'ultima scansione salvata per
+    `target`: {modulo: [finding, ...]}. Le righe senza scan_id (salvate da
+    versioni precedenti) non vengono considerate.
+    """
+    conn = get_connection()
+    with _lock:
+        conn.row_factory = sqlite3.Row
+        try:
+            # SQLite restituisce scan_id della riga con MAX(scanned_at)
+            latest = conn.execute("""
+            SELECT module, scan_id, MAX(scanned_at) FROM findings
+            WHERE target = ? AND scan_id IS NOT NULL GROUP BY module
+            """, (target,)).fetchall()
+            by_module = {}
+            for module, scan_id, _ in latest:
+                rows = conn.execute(
+                    "SELECT * FROM findings WHERE target = ? AND module = ? AND scan_id = ?",
+                    (target, module, scan_id),
+                ).fetchall()
+                by_module[module] = [_row_to_finding(row) for row in rows]
+        finally:
+            conn.row_factory = None
+    return by_module
+
+
+def add_watch(entries):
+    """
+    Aggiunge alla watchlist le coppie (target, next_due); i target già
+    presenti restano invariati. Restituisce quanti target sono stati aggiunti.
+    """
+    now = utc_timestamp()
+    conn = get_connection()
+    with _lock, conn:
+        before = conn.total_changes
+        conn.executemany(
+            "INSERT INTO watchlist (target, added_at, next_due) VALUES (?, ?, ?) "
+            "ON CONFLICT (target) DO NOTHING",
+            ((target, now, due) for target, due in entries),
+        )
+        return conn.total_changes - before
+
+
+def remove_watch(targets):
+    """Rimuove i target dalla watchlist e restituisce quanti erano presenti."""
+    conn = get_connection()
+    with _lock, conn:
+        before = conn.total_changes
+        conn.executemany("DELETE FROM watchlist WHERE target = ?", ((t,) for t in targets))
+        return conn.total_changes - before
+
+
+def list_watch():
+    """Target della watchlist (dict), in ordine di prossima scansione."""
+    conn = get_connection()
+    with _lock:
+        conn.row_factory = sqlite3.Row
+        try:
+            rows = conn.execute("SELECT * FROM watchlist ORDER BY next_due, target").fetchall()
+        finally:
+            conn.row_factory = None
+    return [dict(row) for row in rows]
+
+
+def claim_due_watch(now, limit, lease):
+    """
+    Prende in carico fino a `limit` target con next_due <= `now`, i più in
+    ritardo per primi, spostandone next_due a `now + lease` con un'unica
+    istruzione: altri processi sullo stesso database non li riprendono, e
+    se chi li ha presi termina senza riprogrammarli tornano dovuti allo
+    scadere del lease. Restituisce [(target, failures), ...].
+    """
+    conn = get_connection()
+    with _lock, conn:
+        return conn.execute("""
+        UPDATE watchlist SET next_due = ?
+        WHERE target IN (
+            SELECT target FROM watchlist WHERE next_due <= ? ORDER BY next_due LIMIT ?
+        )
+        RETURNING target, failures
+        """, (now + lease, now, limit)).fetchall()
+
+
+def reschedule_watch(target, next_due, failures, scanned=True):
+    """Registra la prossima scansione di un target (e, con `scanned`, quella appena fatta)."""
+    conn = get_connection()
+    with _lock, conn:
+        if scanned:
+            conn.execute(
+                "UPDATE watchlist SET next_due = ?, failures = ?, last_scanned = ?, "
+                "scans = scans + 1 WHERE target = ?",
+                (next_due, failures, utc_timestamp(), target),
+            )
+        else:
+            conn.execute("UPDATE watchlist SET next_due = ?, failures = ? WHERE target = ?",
+                         (next_due, failures, target))
+
+
+def next_watch_due():
+    """Istante (epoch) della prossima scansione in watchlist, None se è vuota."""
+    conn = get_connection()
+    with _lock:
+        return conn.execute("SELECT MIN(next_due) FROM watchlist").fetchone()[0]
+
+
+def iter_findings(target=None, module=None, since=None, until=None,
+                  chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Legge i finding dal database a blocchi di `chunk_size` righe, filtrando
+    in SQL per target, modulo e intervallo di `scanned_at` (ISO8601; un
+    `until` di sola data, es. 2025-10-15, include l'intero giorno).
+    Restituisce (colonne, generatore di righe): la memoria resta costante;
+    chiudere il generatore (close()) chiude la connessione.
+    Usa una connessione di sola lettura dedicata, così l'esportazione non
+    blocca le scritture (WAL).
+    """
+    clauses, params = [], []
+    if target:
+        clauses.append("target = ?")
+        params.append(target)
+    if module:
+        clauses.append("module = ?")
+        params.append(module)
+    if since:
+        clauses.append("scanned_at >= ?")
+        params.append(since)
+    if until:
+        try:
+            # Sola data: fino alla fine del giorno, non alla sua mezzanotte
+            day = date.fromisoformat(until) if len(until) == 10 else None
+        except ValueError:
+            day = None
+        if day is not None:
+            clauses.append("scanned_at < ?")
+            params.append((day + timedelta(days=1)).isoformat())
+        else:
+            clauses.append("scanned_at <= ?")
+            params.append(until)
+    query = "SELECT * FROM findings"
+    if clauses:
+        query += " WHERE " + " AND ".join(clauses)
+    query += " ORDER BY id"
+
+    conn = sqlite3.connect(DB_PATH, timeout=30)
+    cur = conn.execute(query, params)
     cols = [desc[0] for desc in cur.description]
-    conn.close()
-
-    if fmt == "json":
-        data = [dict(zip(cols, row)) for row in rows]
-        with open(filename, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2)
-        print(f"[storage] Esportati {len(data)} risultati in {filename} (JSON)")
-
-    elif fmt == "csv":
-        with open(filename, "w", newline="", encoding="utf-8") as f:
-            writer = csv.writer(f)
-            writer.writerow(cols)
-            writer.writerows(rows)
-        print(f"[storage] Esportati {len(rows)} risultati in {filename} (CSV)")
+
+    def rows():
+        try:
+            # Primo passo eseguito subito: da qui close() chiude la connessione
+            # anche se le righe non vengono mai lette
+            yield
+            while True:
+                chunk = cur.fetchmany(chunk_size)
+                if not chunk:
+                    break
+                yield from chunk
+        finally:
+            conn.close()
+
+    generator = rows()
+    next(generator)
+    return cols, generator
+
+
+def export_results(filename, fmt="json", compress=None, **filters):
+    """
+    Esporta i risultati dal database in un file JSON, NDJSON o CSV.
+    Le righe vengono scritte man mano che escono dal cursore; con
+    `compress=True` (o un nome file che termina in .gz) l'output è gzip.
+    `filters` accetta target, module, since e until (vedi iter_findings).
+    """
+    import csv
+    import gzip
+
+    # Verificato prima di creare il file e aprire il database
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Formato di esportazione non supportato: {fmt}")
+    if compress is None:
+        compress = str(filename).endswith(".gz")
+    opener = gzip.open if compress else open
+    newline = {"newline": ""} if fmt == "csv" else {}
+
+    cols, rows = iter_findings(**filters)
+    count = 0
+    try:
+        with opener(filename, "wt", encoding="utf-8", **newline) as f:
+            if fmt == "json":
+                f.write("[")
+                for row in rows:
+                    f.write(",\n" if count else "\n")
+                    f.write(encode(dict(zip(cols, row))))
+                    count += 1
+                f.write("\n]\n")
+
+            elif fmt == "ndjson":
+                for row in rows:
+                    f.write(encode(dict(zip(cols, row))))
+                    f.write("\n")
+                    count += 1
+
+            else:
+                writer = csv.writer(f)
+                writer.writerow(cols)
+                for row in rows:
+                    writer.writerow(row)
+                    count += 1
+    finally:
+        rows.close()
+
+    print(f"[storage] Esportati {count} risultati in {filename} ({fmt.upper()})")
+    return count
@@ -2,6 +2,7 @@ import sys
 import asyncio
 from PyQt6 import QtWidgets, QtGui, QtCore
 from reconx.core.engine import run_scan
+from reconx.core.finding import dumps
 from reconx.core.storage import export_results
 import threading
 import json
@@ -142,25 +143,20 @@ class ReconXMain(QtWidgets.QMainWindow):
 
     # --- Caricamento plugin ---
     def _load_plugins(self):
-        import pathlib
+        from reconx.core.registry import get_registry
 
-        # Percorso base del progetto (2 livelli sopra la GUI)
-        base_dir = pathlib.Path(__file__).resolve().parent.parent
-        plugins_dir = base_dir / "plugins"
+        registry = get_registry()
 
         # Verifica presenza della cartella
-        if not plugins_dir.exists():
+        if not registry.plugins_dir.exists():
             self.plugins_list.addItem("⚠️ Nessuna directory 'plugins' trovata.")
             return
 
-        found = 0
-        for d in plugins_dir.iterdir():
-            plugin_path = d / "plugin.py"
-            if plugin_path.exists():
-                self.plugins_list.addItem(f"{d.name} — ✅ Loaded")
-                found += 1
+        plugins = registry.plugins()
+        for plugin in plugins:
+            self.plugins_list.addItem(f"{plugin.name} v{plugin.version} — ✅ Loaded")
 
-        if found == 0:
+        if not plugins:
             self.plugins_list.addItem("⚠️ Nessun plugin trovato nella directory.")
 
     # --- Avvio scansione ---
@@ -260,7 +256,7 @@ class ReconXMain(QtWidgets.QMainWindow):
             return
 
         data = self.current_results[row]
-        payload = json.dumps(data, indent=2, ensure_ascii=False)
+        payload = dumps(data, indent=2)
         QtWidgets.QApplication.clipboard().setText(payload)
         self.console_output.append("[✓] JSON copiato negli appunti.\n")
 
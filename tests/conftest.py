@@ -0,0 +1,59 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from reconx.core import coalesce, storage
+
+
+@pytest.fixture(autouse=True)
+def fresh_coalescer(monkeypatch):
+    """
+    Coalescer di processo nuovo per ogni test e senza cache negativa: le
+    scansioni ripetute in un test eseguono davvero i plugin (i test della
+    cache negativa usano un Coalescer proprio).
+    """
+    monkeypatch.setattr(coalesce, "_coalescer", coalesce.Coalescer(negative_ttl=0))
+
+
+@pytest.fixture
+def isolated_db(tmp_path, monkeypatch):
+    """Database dei risultati in una cartella temporanea, chiuso a fine test."""
+    monkeypatch.setattr(storage, "DB_PATH", str(tmp_path / "reconx.db"))
+    yield
+    storage.close_db()
+
+
+def fake_plugin(name, delay=0.0, ttl=60, failing=(), run=None):
+    """
+    Plugin finto per i test del motore: registra i target in `calls`, attende
+    `delay` secondi e restituisce un finding con TTL `ttl` (l'evidenza `n`
+    conta le chiamate per quel target). Solleva ConnectionError per i target
+    in `failing` (True: per tutti). `gauge` tiene il numero massimo di
+    chiamate contemporanee; `run` sostituisce l'implementazione.
+    """
+    calls = []
+    gauge = {"active": 0, "peak": 0}
+
+    async def fake_run(target, ctx=None):
+        calls.append(target)
+        gauge["active"] += 1
+        gauge["peak"] = max(gauge["peak"], gauge["active"])
+        try:
+            await asyncio.sleep(delay)
+        finally:
+            gauge["active"] -= 1
+        if failing is True or target in failing:
+            raise ConnectionError("sorgente non disponibile")
+        return [{
+            "target": target,
+            "module": name,
+            "type": "fake",
+            "confidence": 0.5,
+            "priority": 3,
+            "evidence": [{"label": "n", "value": calls.count(target)}],
+            "meta": {"source": "test", "ttl_seconds": ttl},
+        }]
+
+    return SimpleNamespace(name=name, version="0.0.1", run=run or fake_run,
+                           calls=calls, gauge=gauge)
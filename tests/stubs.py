@@ -0,0 +1,269 @@
+# Server locali che simulano i servizi esterni usati dai plugin
+import json
+import socket
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import dns.flags
+import dns.message
+import dns.rcode
+import dns.rdatatype
+import dns.rrset
+
+
+class _DNSHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        data, sock = self.request
+        response = self.server.stub.answer(data, tcp=False)
+        if response is not None:
+            sock.sendto(response, self.client_address)
+
+
+class _DNSTCPHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        stub = self.server.stub
+        while True:
+            header = self.rfile.read(2)
+            if len(header) < 2:
+                return
+            wire = self.rfile.read(int.from_bytes(header, "big"))
+            response = stub.answer(wire, tcp=True)
+            self.wfile.write(len(response).to_bytes(2, "big") + response)
+
+
+class StubDNSServer:
+    """
+    Resolver DNS finto su UDP e TCP (127.0.0.1, stessa porta casuale).
+    `records` mappa (nome, tipo) -> lista di rdata in formato testo;
+    `default` mappa tipo -> rdata per qualunque nome non elencato;
+    i nomi assenti ricevono NXDOMAIN. `latency` ritarda ogni risposta e
+    con `truncate=True` le risposte UDP hanno il bit TC (fallback su TCP).
+    Con `threaded=False` le query UDP sono servite in sequenza da un solo
+    thread (nessun thread per query: adatto ai benchmark senza latenza).
+    """
+
+    def __init__(self, records=None, latency=0.0, default=None, truncate=False,
+                 threaded=True):
+        self.records = {
+            (n.rstrip(".").lower(), t.upper()): v
+            for (n, t), v in (records or {}).items()
+        }
+        self.names = {n for n, _ in self.records}
+        self.default = {t.upper(): v for t, v in (default or {}).items()}
+        self.latency = latency
+        self.truncate = truncate
+        self.queries = 0
+        self.tcp_queries = 0
+        udp_server = socketserver.ThreadingUDPServer if threaded else socketserver.UDPServer
+        # La porta UDP casuale può essere già occupata in TCP: si riprova
+        while True:
+            self._server = udp_server(("127.0.0.1", 0), _DNSHandler)
+            self.port = self._server.server_address[1]
+            try:
+                self._tcp_server = socketserver.ThreadingTCPServer(
+                    ("127.0.0.1", self.port), _DNSTCPHandler
+                )
+                break
+            except OSError:
+                self._server.server_close()
+        # Buffer ampio: le raffiche di query non vengono scartate dal kernel
+        self._server.socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+        self._server.daemon_threads = True
+        self._server.stub = self
+        self._tcp_server.daemon_threads = True
+        self._tcp_server.stub = self
+
+    def answer(self, wire, tcp=False):
+        query = dns.message.from_wire(wire)
+        self.queries += 1
+        if tcp:
+            self.tcp_queries += 1
+        if self.latency:
+            time.sleep(self.latency)
+        response = dns.message.make_response(query)
+        if self.truncate and not tcp:
+            response.flags |= dns.flags.TC
+            return response.to_wire()
+        question = query.question[0]
+        name = question.name.to_text().rstrip(".").lower()
+        rdtype = dns.rdatatype.to_text(question.rdtype)
+        values = self.records.get((name, rdtype))
+        if values is None and name not in self.names:
+            values = self.default.get(rdtype)
+            if not self.default:
+                response.set_rcode(dns.rcode.NXDOMAIN)
+        if values:
+            response.answer.append(
+                dns.rrset.from_text_list(question.name, 300, "IN", rdtype, values)
+            )
+        return response.to_wire()
+
+    def start(self):
+        for server in (self._server, self._tcp_server):
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        for server in (self._server, self._tcp_server):
+            server.shutdown()
+            server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class _CrtshHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def handle(self):
+        # Il client può chiudere le connessioni keep-alive in qualunque momento
+        try:
+            super().handle()
+        except ConnectionResetError:
+            pass
+
+    def do_GET(self):
+        stub = self.server.stub
+        stub.requests += 1
+        stub.connections.add(self.client_address)
+        query = parse_qs(urlparse(self.path).query)
+        target = query.get("q", ["example.com"])[0]
+        if stub.latency:
+            time.sleep(stub.latency)
+        self.send_response(stub.status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for chunk in stub.payload(target):
+            data = chunk.encode()
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.write(b"0\r\n\r\n")
+
+
+class StubCrtshServer:
+    """
+    Finto crt.sh su HTTP (127.0.0.1, porta casuale) con risposta in streaming.
+    Per ogni richiesta genera `entries` certificati sintetici distribuiti su
+    `unique_names` common_name distinti, ciascuno con `sans` nomi alternativi
+    in name_value (altN-hostM.<target>, uno per riga); `padding` allunga ogni
+    voce per simulare payload di grandi dimensioni senza tenerli in memoria.
+    """
+
+    def __init__(self, entries=100, unique_names=10, padding=0, latency=0.0, status=200,
+                 sans=0):
+        self.entries = entries
+        self.sans = sans
+        self.unique_names = unique_names
+        self.padding = padding
+        self.latency = latency
+        self.status = status
+        self.requests = 0
+        self.connections = set()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _CrtshHandler)
+        self._server.daemon_threads = True
+        self._server.stub = self
+        self.port = self._server.server_address[1]
+        self.url = f"http://127.0.0.1:{self.port}/"
+
+    def payload(self, target, batch=500):
+        yield "["
+        for start in range(0, self.entries, batch):
+            items = []
+            for i in range(start, min(start + batch, self.entries)):
+                host = f"host{i % self.unique_names}.{target}"
+                sans = [f"alt{j}-{host}" for j in range(self.sans)]
+                if self.padding:
+                    sans.append("x" * self.padding)
+                items.append(json.dumps({
+                    "id": i,
+                    "issuer_name": "C=US, O=Stub CA",
+                    "common_name": host,
+                    "name_value": "\n".join(sans),
+                    "not_after": "2030-01-01T00:00:00",
+                }))
+            yield ("," if start else "") + ",".join(items)
+        yield "]"
+
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class _WhoisHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        stub = self.server.stub
+        domain = self.rfile.readline().decode("idna").strip().lower()
+        with stub._lock:
+            stub.active += 1
+            stub.max_active = max(stub.max_active, stub.active)
+            stub.queries.append(domain)
+        try:
+            if stub.latency:
+                time.sleep(stub.latency)
+            self.wfile.write(stub.response(domain).encode())
+        finally:
+            with stub._lock:
+                stub.active -= 1
+
+
+class StubWhoisServer:
+    """
+    Finto server WHOIS su TCP (127.0.0.1, porta casuale; il protocollo è
+    quello di TCP/43). Risponde in formato "thick" con i campi letti dal
+    parser di python-whois e registra la concorrenza massima osservata.
+    """
+
+    def __init__(self, org="Stub Org", latency=0.0):
+        self.org = org
+        self.latency = latency
+        self.queries = []
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+        self._server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _WhoisHandler)
+        self._server.daemon_threads = True
+        self._server.stub = self
+        self.port = self._server.server_address[1]
+        self.address = f"127.0.0.1:{self.port}"
+
+    def response(self, domain):
+        return (
+            f"Domain Name: {domain.upper()}\r\n"
+            "Registrar: Stub Registrar\r\n"
+            "Creation Date: 1995-08-14T04:00:00Z\r\n"
+            "Registry Expiry Date: 2030-08-13T04:00:00Z\r\n"
+            f"Registrant Organization: {self.org}\r\n"
+        )
+
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
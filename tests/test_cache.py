@@ -1,7 +1,55 @@
-from reconx.core.cache import set_cache, get_cache
+import multiprocessing
+import time
+from reconx.core.cache import Cache, set_cache, get_cache
 
 def test_cache_set_and_get():
     """Verifica che il sistema di cache salvi e recuperi correttamente i dati."""
     set_cache("unit_test", {"ok": True}, ttl=5)
     value = get_cache("unit_test")
     assert value == {"ok": True}
+
+
+def test_cache_expiry_lru_and_eviction(tmp_path):
+    """Verifica scadenza, livello LRU e limite di dimensione su disco."""
+    cache = Cache(tmp_path / "cache.db", max_entries=50, lru_size=10, purge_interval=0)
+    cache.set("short", [1, 2, 3], ttl=0.2)
+    assert cache.get("short") == [1, 2, 3]
+    time.sleep(0.3)
+    assert cache.get("short") is None
+
+    for i in range(200):
+        cache.set(f"k{i}", {"i": i})
+    assert len(cache._lru) == 10
+    cache.evict()
+    count = cache._connection().execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+    assert count <= 50
+    # Le voci più recenti sopravvivono, anche fuori dalla LRU
+    assert cache.get("k199") == {"i": 199}
+    assert cache.get("k160") == {"i": 160}
+    assert cache.get("k0") is None
+
+    cache.set("gone", 1, ttl=-1)
+    assert cache.purge_expired() >= 1
+    cache.close()
+
+
+def _writer(path, worker):
+    cache = Cache(path, purge_interval=0)
+    for i in range(100):
+        cache.set(f"w{worker}:{i}", i)
+    cache.close()
+
+
+def test_cache_concurrent_processes(tmp_path):
+    """Verifica scritture concorrenti da più processi sullo stesso file."""
+    path = tmp_path / "shared.db"
+    procs = [multiprocessing.Process(target=_writer, args=(path, w)) for w in range(4)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+        assert p.exitcode == 0
+
+    cache = Cache(path, purge_interval=0)
+    assert all(cache.get(f"w{w}:99") == 99 for w in range(4))
+    cache.close()
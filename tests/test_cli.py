@@ -1,15 +1,17 @@
+import json
 import subprocess
 import sys
 
 def test_cli_scan_runs():
-    """Verifica che il comando 'scan' esegua senza errori."""
+    """Verifica che il comando 'scan' esegua senza errori e stampi i risultati in JSON."""
     result = subprocess.run(
         [sys.executable, "-m", "reconx.cli", "scan", "example.com"],
         capture_output=True,
         text=True,
     )
     assert result.returncode == 0, result.stderr
-    assert "example.com" in result.stdout or "Scansione completata" in result.stdout
+    findings = json.loads(result.stdout)
+    assert findings and {f["target"] for f in findings} == {"example.com"}
 
 
 def test_cli_list_plugins():
@@ -21,3 +23,16 @@ def test_cli_list_plugins():
     )
     assert result.returncode == 0, result.stderr
     assert "dns_basic" in result.stdout or "crtsh_lookup" in result.stdout
+
+
+def test_cli_scan_targets_file(tmp_path):
+    """Verifica la modalità batch con --targets-file su stdin."""
+    result = subprocess.run(
+        [sys.executable, "-m", "reconx.cli", "scan", "--targets-file", "-",
+         "--concurrency", "2", "--plugin-timeout", "5"],
+        input="example.com\n# commento\n\nexample.org\n",
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr
+    assert "[batch] 2 target" in result.stdout
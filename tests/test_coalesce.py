@@ -0,0 +1,124 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from reconx.core.coalesce import Coalescer
+from reconx.core.context import ScanContext
+from reconx.core.engine import ScanEngine
+from reconx.core.ratelimit import RateLimiter
+from tests.conftest import fake_plugin
+
+pytestmark = pytest.mark.usefixtures("isolated_db")
+
+
+async def _scan(plugin, coalescer, target="example.com", **options):
+    report = {}
+    async with ScanEngine([plugin], coalescer=coalescer, **options) as engine:
+        results = await engine.scan(target, report=report)
+    return results, report["metrics"]["plugins"][plugin.name]
+
+
+def test_concurrent_scans_share_one_call():
+    """Verifica che scansioni contemporanee dello stesso target condividano la chiamata."""
+    plugin = fake_plugin("slow_source", delay=0.2)
+    coalescer = Coalescer()
+
+    async def run():
+        return await asyncio.gather(
+            _scan(plugin, coalescer), _scan(plugin, coalescer),
+            _scan(plugin, coalescer, target="other.com"),
+        )
+
+    (first, m1), (second, m2), (other, _) = asyncio.run(run())
+    assert plugin.calls == ["example.com", "other.com"]
+    assert first == second and first[0]["evidence"][0]["value"] == 1
+    assert sorted([m1["shared"], m2["shared"]]) == [0, 1]
+    assert coalescer.stats == {"calls": 2, "shared": 1, "negative_hits": 0}
+
+    # Concluse le chiamate, una nuova scansione esegue di nuovo il plugin
+    asyncio.run(_scan(plugin, coalescer))
+    assert len(plugin.calls) == 3
+
+
+def test_contexts_with_different_sources_do_not_share():
+    """Verifica che solo i contesti con le stesse opzioni di risultato condividano le chiamate."""
+    plugin = fake_plugin("configured_source", delay=0.2)
+    coalescer = Coalescer()
+    first = ScanContext(crtsh_url="http://a.test/", workers=4)
+    same = ScanContext(crtsh_url="http://a.test/", workers=8, rate_limiter=RateLimiter({}))
+    other = ScanContext(crtsh_url="http://b.test/")
+
+    async def run():
+        return await asyncio.gather(*(_scan(plugin, coalescer, ctx=ctx)
+                                      for ctx in (first, same, other)))
+
+    outcomes = asyncio.run(run())
+    assert len(plugin.calls) == 2
+    assert sorted(m["shared"] for _, m in outcomes) == [0, 0, 1]
+
+
+def test_calls_are_shared_across_event_loops():
+    """Verifica la condivisione tra event loop in thread diversi (es. GUI e batch)."""
+    plugin = fake_plugin("threaded_source", delay=0.3)
+    coalescer = Coalescer()
+    results = []
+
+    def worker():
+        results.append(asyncio.run(_scan(plugin, coalescer))[0])
+
+    threads = [threading.Thread(target=worker) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.05)
+    for thread in threads:
+        thread.join()
+
+    assert plugin.calls == ["example.com"]
+    assert len(results) == 3 and all(r == results[0] for r in results)
+
+
+def test_failures_are_cached_briefly():
+    """Verifica la cache negativa: errori e timeout riusati fino alla scadenza."""
+    failing = fake_plugin("failing_source", failing=True)
+    slow = fake_plugin("hanging_source", delay=1.0)
+    coalescer = Coalescer(negative_ttl=0.3)
+
+    async def run():
+        outcomes = []
+        for _ in range(3):
+            outcomes.append(await _scan(failing, coalescer))
+        for _ in range(2):
+            outcomes.append(await _scan(slow, coalescer, plugin_timeout=0.1))
+        return outcomes
+
+    outcomes = asyncio.run(run())
+    assert failing.calls == ["example.com"]
+    assert [m["errors"] for _, m in outcomes[:3]] == [1, 1, 1]
+    assert [m["shared"] for _, m in outcomes[:3]] == [0, 1, 1]
+    # Il timeout produce un finding di errore, riusato dalla seconda scansione
+    assert slow.calls == ["example.com"]
+    assert [r[0]["type"] for r, _ in outcomes[3:]] == ["plugin_timeout"] * 2
+    assert coalescer.stats["negative_hits"] == 3
+
+    time.sleep(0.35)
+    asyncio.run(_scan(failing, coalescer))
+    assert len(failing.calls) == 2
+
+
+def test_waiters_retry_when_first_caller_is_cancelled():
+    """Verifica che chi attende riprovi se la scansione che esegue la chiamata scade."""
+    plugin = fake_plugin("cancelled_source", delay=0.3)
+    coalescer = Coalescer()
+
+    async def run():
+        short = asyncio.create_task(_scan(plugin, coalescer, scan_timeout=0.1))
+        await asyncio.sleep(0.01)
+        patient = asyncio.create_task(_scan(plugin, coalescer))
+        return await short, await patient
+
+    (short, _), (patient, metrics) = asyncio.run(run())
+    assert short[0]["type"] == "plugin_timeout"
+    assert patient[0]["type"] == "fake" and metrics["shared"] == 0
+    assert len(plugin.calls) == 2
@@ -1,5 +1,11 @@
 import asyncio
+import tracemalloc
 from plugins.crtsh_lookup import plugin
+from reconx.core import cache
+from reconx.core.cache import Cache
+from reconx.core.context import ScanContext
+from reconx.core.ratelimit import RateLimiter
+from tests.stubs import StubCrtshServer
 
 def test_crtsh_lookup_returns_certificates():
     """Verifica che il plugin crt.sh produca certificati validi."""
@@ -7,3 +13,70 @@ def test_crtsh_lookup_returns_certificates():
     assert isinstance(results, list)
     assert len(results) > 0
     assert any("certificate" in r["type"] for r in results)
+
+
+def test_crtsh_lookup_streams_large_payload():
+    """Verifica parsing incrementale e memoria limitata su un payload enorme."""
+    # ~80k voci da ~400 byte: circa 32 MB di JSON
+    with StubCrtshServer(entries=80_000, unique_names=50, padding=300) as server:
+        ctx = ScanContext(crtsh_url=server.url)
+        tracemalloc.start()
+        results = asyncio.run(plugin.run("stream-large.test", ctx))
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    names = [r["evidence"][0]["value"] for r in results]
+    assert len(names) == 50
+    assert len(set(names)) == 50
+    assert all(n.endswith(".stream-large.test") for n in names)
+    # La memoria di picco non dipende dalla dimensione della risposta
+    assert peak < 8 * 1024 * 1024
+
+
+def test_crtsh_lookup_reuses_pooled_connections():
+    """Verifica che più target riusino le connessioni del pool nel contesto."""
+    with StubCrtshServer(entries=20, unique_names=5) as server:
+        ctx = ScanContext(crtsh_url=server.url, http_limit_per_host=2)
+
+        async def scan_batch():
+            try:
+                return [await plugin.run(f"pool{i}.test", ctx) for i in range(10)]
+            finally:
+                await ctx.close()
+
+        batches = asyncio.run(scan_batch())
+
+    assert all(len(results) == 5 for results in batches)
+    assert server.requests == 10
+    assert len(server.connections) == 1
+
+
+def test_stream_keeps_san_names_from_cache(tmp_path, monkeypatch):
+    """Verifica che stream() restituisca common name e SAN anche dalla cache."""
+    monkeypatch.setattr(cache, "_default_cache", Cache(tmp_path / "cache.db"))
+
+    async def names(target, ctx):
+        return sorted([n async for _, found in plugin.stream(target, ctx) for n in found])
+
+    with StubCrtshServer(entries=6, unique_names=3, sans=2) as server:
+        ctx = ScanContext(crtsh_url=server.url, rate_limiter=RateLimiter({}))
+
+        async def run():
+            try:
+                live = await names("san.test", ctx)
+                cached = await names("san.test", ctx)
+                # Cache scritta da una normale scansione (run)
+                await plugin.run("scan.test", ctx)
+                after_run = await names("scan.test", ctx)
+                return live, cached, after_run
+            finally:
+                await ctx.close()
+
+        live, cached, after_run = asyncio.run(run())
+
+    assert live == sorted(f"{p}host{i}.san.test" for i in range(3)
+                          for p in ("", "alt0-", "alt1-"))
+    assert cached == live
+    assert after_run == [n.replace("san.test", "scan.test") for n in live]
+    # Solo le prime ricerche di ciascun target hanno interrogato crt.sh
+    assert server.requests == 2
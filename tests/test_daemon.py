@@ -0,0 +1,144 @@
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from reconx.core.daemon import ScanDaemon
+from reconx.core.daemon_client import DaemonClient, DaemonError
+from tests.conftest import fake_plugin
+
+pytestmark = pytest.mark.usefixtures("isolated_db")
+
+
+def _run_daemon(plugin, check, **options):
+    """Avvia un demone su una porta libera ed esegue `check(daemon, client)` in un thread."""
+    async def run():
+        daemon = ScanDaemon(port=0, plugins=[plugin], **options)
+        await daemon.start()
+        try:
+            client = DaemonClient(f"http://127.0.0.1:{daemon.port}", options.get("token"))
+            return await asyncio.to_thread(check, daemon, client)
+        finally:
+            await daemon.stop()
+
+    return asyncio.run(run())
+
+
+def test_job_results_are_streamed_until_done():
+    """Verifica invio, stream NDJSON dei risultati e stato finale di un job."""
+    plugin = fake_plugin("daemon_stream", delay=0.05)
+
+    def check(daemon, client):
+        assert client.health()["plugins"] == ["daemon_stream"]
+        job = client.submit(["a.example.com", "b.example.com", "c.example.com"],
+                            concurrency=1)
+        assert job["status"] in ("queued", "running") and job["targets"] == 3
+        streamed = [f["target"] for f in client.results(job["id"])]
+        return job["id"], streamed, client.job(job["id"])
+
+    job_id, streamed, status = _run_daemon(plugin, check)
+    assert streamed == ["a.example.com", "b.example.com", "c.example.com"]
+    assert status["id"] == job_id and status["status"] == "done"
+    assert (status["done"], status["findings"], status["errors"]) == (3, 3, 0)
+
+
+def test_results_memory_is_bounded_and_released_after_reading():
+    """Verifica il limite di righe in memoria per job e il rilascio dopo la lettura."""
+    plugin = fake_plugin("daemon_buffer")
+
+    def check(daemon, client):
+        job = client.submit([f"t{i}.example.com" for i in range(5)], concurrency=1)
+        while client.job(job["id"])["status"] != "done":
+            time.sleep(0.01)
+        assert len(daemon.jobs[job["id"]].findings) == 3
+        with pytest.raises(DaemonError, match="HTTP 410"):
+            list(client.results(job["id"]))
+        # Una lettura parziale non consuma il job
+        tail = list(client.results(job["id"], offset=4, follow=False))
+        assert len(daemon.jobs[job["id"]].findings) == 3
+        rest = list(client.results(job["id"], offset=2))
+        with pytest.raises(DaemonError, match="HTTP 410"):
+            list(client.results(job["id"], offset=2))
+        return tail, rest, client.job(job["id"]), len(daemon.jobs[job["id"]].findings)
+
+    tail, rest, status, kept = _run_daemon(plugin, check, buffer=3)
+    assert [f["target"] for f in tail] == ["t4.example.com"]
+    assert [f["target"] for f in rest] == ["t2.example.com", "t3.example.com", "t4.example.com"]
+    assert status["findings"] == 5 and kept == 0
+
+
+def test_queue_runs_jobs_by_priority_with_bounded_concurrency():
+    """Verifica che con un solo job alla volta la coda rispetti le priorità."""
+    plugin = fake_plugin("daemon_priority", delay=0.2)
+
+    def check(daemon, client):
+        first = client.submit(["first.example.com"])
+        while client.job(first["id"])["status"] != "running":
+            time.sleep(0.01)
+        low = client.submit(["low.example.com"], priority=5)
+        high = client.submit(["high.example.com"], priority=-1)
+        assert client.job(low["id"])["status"] == "queued"
+        assert sum(j["status"] == "running" for j in client.jobs()) == 1
+        for job in (first, low, high):
+            list(client.results(job["id"]))
+        return [client.job(j["id"])["status"] for j in (first, low, high)]
+
+    assert _run_daemon(plugin, check, jobs=1) == ["done"] * 3
+    assert plugin.calls == ["first.example.com", "high.example.com", "low.example.com"]
+
+
+def test_cancel_queued_and_running_jobs():
+    """Verifica l'annullamento di un job in esecuzione e di uno in coda."""
+    plugin = fake_plugin("daemon_cancel", delay=5.0)
+
+    def check(daemon, client):
+        running = client.submit(["slow.example.com"])
+        queued = client.submit(["never.example.com"])
+        while client.job(running["id"])["status"] != "running":
+            time.sleep(0.01)
+        assert client.cancel(queued["id"])["status"] == "cancelled"
+        client.cancel(running["id"])
+        assert list(client.results(running["id"])) == []
+        with pytest.raises(DaemonError, match="HTTP 404"):
+            client.job("sconosciuto")
+        return client.job(running["id"])["status"]
+
+    assert _run_daemon(plugin, check, jobs=1) == "cancelled"
+    assert plugin.calls == ["slow.example.com"]
+
+
+def test_token_is_required_when_configured():
+    """Verifica il rifiuto delle richieste senza token e la validazione dei job."""
+    plugin = fake_plugin("daemon_token")
+
+    def check(daemon, client):
+        with pytest.raises(DaemonError, match="HTTP 401"):
+            DaemonClient(client.url).health()
+        with pytest.raises(DaemonError, match="HTTP 400"):
+            client.submit([])
+        return client.health()["status"]
+
+    assert _run_daemon(plugin, check, token="segreto") == "ok"
+
+
+def test_cli_scan_submits_to_daemon(tmp_path):
+    """Verifica che `scan --daemon` deleghi la scansione e stampi i risultati."""
+    plugin = fake_plugin("daemon_cli")
+    targets = tmp_path / "targets.txt"
+    targets.write_text("one.example.com\n# commento\ntwo.example.com\n")
+
+    def check(daemon, client):
+        return subprocess.run(
+            [sys.executable, "-m", "reconx.cli", "scan", "--targets-file", str(targets)],
+            env={**os.environ, "RECONX_DAEMON": client.url},
+            capture_output=True, text=True, timeout=30,
+        )
+
+    result = _run_daemon(plugin, check)
+    assert result.returncode == 0, result.stderr
+    assert sorted(plugin.calls) == ["one.example.com", "two.example.com"]
+    assert result.stdout.count('"module": "daemon_cli"') == 2
+    assert "done: 2 target, 2 risultati" in result.stderr
@@ -1,5 +1,8 @@
 import asyncio
+import time
 from plugins.dns_basic import plugin
+from reconx.core.context import ScanContext
+from tests.stubs import StubDNSServer
 
 def test_dns_basic_returns_records():
     """Verifica che il plugin DNS produca record validi."""
@@ -8,3 +11,43 @@ def test_dns_basic_returns_records():
     assert len(results) > 0
     assert any(r["type"].startswith("dns_") for r in results)
     assert all("target" in r for r in results)
+
+
+def test_dns_basic_async_against_stub_server():
+    """Verifica le query parallele e non bloccanti contro un DNS locale."""
+    records = {
+        ("stub.test", "A"): ["192.0.2.10"],
+        ("stub.test", "MX"): ["10 mail.stub.test."],
+        ("stub.test", "TXT"): ['"v=spf1 -all"'],
+    }
+    with StubDNSServer(records, latency=0.3) as server:
+        ctx = ScanContext(nameservers=["127.0.0.1"], dns_port=server.port)
+
+        async def scan_with_ticker():
+            ticks = 0
+
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.05)
+                    ticks += 1
+
+            tick_task = asyncio.create_task(ticker())
+            started = time.monotonic()
+            results = await plugin.run("stub.test", ctx)
+            elapsed = time.monotonic() - started
+            tick_task.cancel()
+            return results, elapsed, ticks
+
+        results, elapsed, ticks = asyncio.run(scan_with_ticker())
+
+    by_type = {r["type"]: r["evidence"][0]["value"] for r in results}
+    assert by_type["dns_a"] == ["192.0.2.10"]
+    assert by_type["dns_mx"] == ["10 mail.stub.test."]
+    assert by_type["dns_aaaa"] == []
+    # 5 query da 0.3s in parallelo: ben sotto la somma sequenziale (1.5s)
+    assert elapsed < 1.0
+    # L'event loop resta libero durante le query
+    assert ticks >= 4
+    # Lo stesso resolver viene riutilizzato dal contesto
+    assert ctx.resolver is plugin._get_resolver(ctx)
@@ -1,5 +1,13 @@
 import asyncio
-from reconx.core.engine import run_scan
+import time
+
+import pytest
+
+from reconx.core.engine import run_scan, ScanEngine
+from tests.conftest import fake_plugin
+
+pytestmark = pytest.mark.usefixtures("isolated_db")
+
 
 def test_engine_returns_results():
     """Verifica che il motore ritorni risultati validi."""
@@ -8,3 +16,73 @@ def test_engine_returns_results():
     assert len(results) > 0
     assert any("module" in r for r in results)
     assert all("target" in r for r in results)
+
+
+def test_engine_runs_plugins_concurrently_with_deadlines():
+    """Verifica esecuzione parallela, timeout per plugin e scadenza globale."""
+    plugins = [
+        fake_plugin("fast_a", 0.2),
+        fake_plugin("fast_b", 0.2),
+        fake_plugin("slow", 5),
+        fake_plugin("too_slow", 5),
+    ]
+    started = time.monotonic()
+    results = asyncio.run(run_scan("example.com", plugin_timeout=0.5,
+                                   scan_timeout=2, plugins=plugins))
+    assert time.monotonic() - started < 1.5
+
+    by_module = {r["module"]: r for r in results}
+    assert by_module["fast_a"]["type"] == "fake"
+    assert by_module["fast_b"]["type"] == "fake"
+    assert by_module["slow"]["type"] == "plugin_timeout"
+    assert by_module["too_slow"]["type"] == "plugin_timeout"
+
+    # Scadenza globale: risultati parziali + plugin interrotti registrati
+    results = asyncio.run(run_scan("example.com", plugin_timeout=10,
+                                   scan_timeout=0.5, plugins=plugins[:3]))
+    by_module = {r["module"]: r for r in results}
+    assert by_module["fast_a"]["type"] == "fake"
+    assert by_module["slow"]["type"] == "plugin_timeout"
+    # Il plugin interrotto dalla scadenza globale è stato eseguito di nuovo
+    assert len(plugins[2].calls) == 2
+
+
+def test_engine_scan_many_reuses_engine():
+    """Verifica la scansione batch con concorrenza limitata."""
+    engine = ScanEngine(plugins=[fake_plugin("fast_a", 0.1)])
+    seen = []
+    stats = asyncio.run(engine.scan_many(
+        (f"host{i}.example.com" for i in range(10)),
+        concurrency=5,
+        on_result=lambda t, r: seen.append(t),
+    ))
+    assert stats["targets"] == 10
+    assert stats["findings"] == 10
+    assert sorted(seen) == sorted(f"host{i}.example.com" for i in range(10))
+    # 10 target da 0.1s con 5 worker: circa 0.2s, non 1s
+    assert stats["elapsed"] < 0.8
+
+
+def test_engine_incremental_skips_fresh_plugins():
+    """Verifica che la scansione incrementale rilanci solo i plugin scaduti."""
+    long_ttl = fake_plugin("long_ttl", ttl=3600)
+    short_ttl = fake_plugin("short_ttl", ttl=1)
+    engine = ScanEngine(plugins=[long_ttl, short_ttl])
+
+    asyncio.run(engine.scan("inc.example.com"))
+    assert (len(long_ttl.calls), len(short_ttl.calls)) == (1, 1)
+
+    report = {}
+    results = asyncio.run(engine.scan("inc.example.com", incremental=True, report=report))
+    assert (len(long_ttl.calls), len(short_ttl.calls)) == (1, 1)
+    assert (report["executed"], report["skipped"]) == ([], ["long_ttl", "short_ttl"])
+    assert report["metrics"]["reused"] == ["long_ttl", "short_ttl"]
+    assert sorted(r["module"] for r in results) == ["long_ttl", "short_ttl"]
+
+    time.sleep(1.1)
+    report = {}
+    results = asyncio.run(engine.scan("inc.example.com", incremental=True, report=report))
+    assert (len(long_ttl.calls), len(short_ttl.calls)) == (1, 2)
+    assert (report["executed"], report["skipped"]) == (["short_ttl"], ["long_ttl"])
+    assert list(report["metrics"]["plugins"]) == ["short_ttl"]
+    assert sorted(r["module"] for r in results) == ["long_ttl", "short_ttl"]
@@ -0,0 +1,140 @@
+import asyncio
+import json
+import os
+import threading
+
+import pytest
+
+from reconx.core import storage
+from reconx.core.context import ScanContext
+from reconx.core.engine import ScanEngine
+from reconx.core.executors import shutdown_process_pool
+from reconx.core.ratelimit import RateLimiter
+from reconx.core.registry import PluginRegistry
+
+PLUGINS = {
+    "on_loop": '''
+name = "on_loop"
+version = "1.0.0"
+inputs_supported = {"domain"}
+
+async def run(target, ctx=None):
+    return [{"target": target, "module": name, "type": "where", "confidence": 1.0,
+             "priority": 1, "evidence": [{"label": "loop", "value": True}],
+             "meta": {"source": name, "ttl_seconds": 60}}]
+''',
+    "blocking": '''
+import threading
+import time
+
+name = "blocking"
+version = "1.0.0"
+inputs_supported = {"domain"}
+executor = "thread"
+
+def run(target, ctx=None):
+    time.sleep(0.2)
+    return [{"target": target, "module": name, "type": "where", "confidence": 1.0,
+             "priority": 1,
+             "evidence": [{"label": "thread", "value": threading.current_thread().name}],
+             "meta": {"source": name, "ttl_seconds": 60}}]
+''',
+    "crunching": '''
+import os
+from reconx.core import storage
+from reconx.core.finding import Finding
+
+name = "crunching"
+version = "1.0.0"
+inputs_supported = {"domain"}
+executor = "process"
+
+def run(target, ctx=None):
+    total = sum(i * i for i in range(200_000))
+    if target.startswith("fail"):
+        raise ValueError(f"parsing fallito per {target}")
+    return [Finding(target, name, "where", 1.0, 1,
+                    [{"label": "pid", "value": os.getpid()},
+                     {"label": "marker", "value": ctx.get("marker")},
+                     {"label": "total", "value": total},
+                     {"label": "inherited_db", "value": storage._conn is not None}],
+                    {"source": name, "ttl_seconds": 60})]
+''',
+}
+
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "DB_PATH", str(tmp_path / "executors.db"))
+    plugins_dir = tmp_path / "execplugins"
+    for package, source in PLUGINS.items():
+        (plugins_dir / package).mkdir(parents=True)
+        (plugins_dir / package / "plugin.py").write_text(source)
+    yield PluginRegistry(plugins_dir)
+    storage.close_db()
+    shutdown_process_pool()
+
+
+def _evidence(findings, module):
+    [finding] = [f for f in findings if f["module"] == module]
+    return {ev["label"]: ev["value"] for ev in finding["evidence"]}
+
+
+def test_registry_reads_executor_without_import(registry):
+    """Verifica la lettura di `executor` dai metadati e l'aggiornamento degli indici vecchi."""
+    specs = {spec.name: spec for spec in registry.plugins()}
+    assert {name: spec.executor for name, spec in specs.items()} == {
+        "on_loop": "async", "blocking": "thread", "crunching": "process",
+    }
+    assert not any(spec.loaded for spec in specs.values())
+
+    # Un indice scritto prima di `executor` viene riletto
+    index_file = registry.plugins_dir / ".index.json"
+    index = json.loads(index_file.read_text())
+    for entry in index["plugins"].values():
+        del entry["executor"]
+    index_file.write_text(json.dumps(index))
+    [spec] = [s for s in PluginRegistry(registry.plugins_dir).plugins() if s.name == "blocking"]
+    assert spec.executor == "thread"
+
+
+def test_engine_dispatches_plugins_to_their_executor(registry):
+    """Verifica loop, pool di thread e pool di processi, con risultati e contesto."""
+    ticks = []
+
+    async def heartbeat():
+        # L'event loop resta libero mentre i plugin bloccanti lavorano
+        for _ in range(5):
+            ticks.append(threading.current_thread().name)
+            await asyncio.sleep(0.02)
+
+    async def run():
+        ctx = ScanContext(marker="dal contesto", rate_limiter=RateLimiter({}))
+        async with ScanEngine(registry.plugins(), ctx=ctx) as engine:
+            results, _ = await asyncio.gather(engine.scan("example.com"), heartbeat())
+            failed = await engine.scan("fail.example.com")
+        await ctx.close()
+        return results, failed
+
+    results, failed = asyncio.run(run())
+    assert _evidence(results, "on_loop") == {"loop": True}
+    assert _evidence(results, "blocking")["thread"].startswith("reconx-worker")
+    crunching = _evidence(results, "crunching")
+    assert crunching["pid"] != os.getpid()
+    # Solo le opzioni serializzabili arrivano al processo (non il rate limiter)
+    assert crunching["marker"] == "dal contesto"
+    # Processi non creati con fork: nessuna connessione SQLite ereditata
+    assert crunching["inherited_db"] is False
+    assert len(ticks) == 5
+
+    # L'eccezione del processo figlio torna al motore come errore del plugin
+    assert {f["module"] for f in failed} == {"on_loop", "blocking"}
+
+
+def test_spec_run_uses_declared_executor(registry):
+    """Verifica che PluginSpec.run esegua anche i plugin sincroni."""
+    specs = {spec.name: spec for spec in registry.plugins()}
+    results = asyncio.run(specs["blocking"].run("example.com"))
+    assert _evidence(results, "blocking")["thread"] != threading.current_thread().name
+    with pytest.raises(ValueError, match="parsing fallito"):
+        asyncio.run(specs["crunching"].run("fail.example.com"))
@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+
+from reconx.core import cache, storage
+from reconx.core.cache import Cache
+from reconx.core.context import ScanContext
+from reconx.core.engine import ScanEngine
+from reconx.core.expansion import ExpansionPipeline, normalise_name
+from reconx.core.ratelimit import RateLimiter
+from tests.stubs import StubCrtshServer, StubDNSServer
+
+# Solo la radice e host0..host3 esistono: gli altri nomi ricevono NXDOMAIN
+RECORDS = {("exp.test", "A"): ["192.0.2.1"]}
+RECORDS.update({(f"host{i}.exp.test", "A"): [f"192.0.2.{10 + i}"] for i in range(4)})
+
+
+@pytest.fixture
+def stubs(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "DB_PATH", str(tmp_path / "expansion.db"))
+    monkeypatch.setattr(cache, "_default_cache", Cache(tmp_path / "cache.db"))
+    # 40 certificati per ricerca su 8 nomi distinti: host0..host7.<nome cercato>
+    with StubCrtshServer(entries=40, unique_names=8) as crtsh, \
+            StubDNSServer(RECORDS, latency=0.01) as dns_server:
+        yield ScanContext(
+            nameservers=["127.0.0.1"],
+            dns_port=dns_server.port,
+            crtsh_url=crtsh.url,
+            rate_limiter=RateLimiter({}),
+        )
+    storage.close_db()
+
+
+def _expand(ctx, **options):
+    async def run():
+        report = {}
+        async with ScanEngine(ctx=ctx) as engine:
+            findings = [f async for f in engine.expand("exp.test", report=report, **options)]
+        await ctx.close()
+        return findings, report
+    return asyncio.run(run())
+
+
+def test_normalise_name():
+    """Verifica normalizzazione di wildcard, maiuscole e nomi fuori dominio."""
+    assert normalise_name("*.API.Exp.Test.", "exp.test") == "api.exp.test"
+    assert normalise_name("exp.test", "exp.test") == "exp.test"
+    assert normalise_name("evil-exp.test", "exp.test") is None
+    assert normalise_name("mail@exp.test", "exp.test") is None
+    assert normalise_name("a..exp.test", "exp.test") is None
+
+
+def test_expansion_resolves_certificate_names_with_fanout(stubs):
+    """Verifica che i nomi dei certificati vengano risolti rispettando il fanout."""
+    findings, report = _expand(stubs, depth=1, fanout=5)
+
+    certificates = [f for f in findings if f.type == "certificate"]
+    assert len(certificates) == 8
+    assert {f.target for f in certificates} == {"exp.test"}
+
+    # Radice + i primi 5 nomi; esistono la radice e host0..host3
+    assert report["names"] == 6 and report["truncated"] == 3
+    resolved = {f.target for f in findings if f.module == "dns_basic"}
+    assert resolved == {"exp.test"} | {f"host{i}.exp.test" for i in range(4)}
+
+    # Tutti i finding emessi sono salvati
+    count = storage.get_connection().execute("SELECT COUNT(*) FROM findings").fetchone()[0]
+    assert count == len(findings) == 8 + 5 * 5
+
+
+def test_expansion_recurses_into_resolved_names(stubs):
+    """Verifica la ricorsione: i nomi esistenti diventano nuove ricerche."""
+    findings, report = _expand(stubs, depth=2, fanout=100)
+
+    lookups = {f.target for f in findings if f.type == "certificate"}
+    assert lookups == {"exp.test"} | {f"host{i}.exp.test" for i in range(4)}
+    assert report["certificates"] == 8 + 4 * 8
+    # 8 nomi al primo livello, 8 per ciascuno dei 4 esistenti al secondo
+    assert report["names"] == 1 + 8 + 32
+    assert report["resolved"] == 5
+
+
+def test_expansion_streams_findings(stubs):
+    """Verifica che i finding escano prima che la pipeline sia conclusa."""
+    async def run():
+        pipeline = ExpansionPipeline("exp.test", stubs, depth=2, dns_workers=2,
+                                     output_buffer=1)
+        produced_at_first = None
+        count = 0
+        async for _ in pipeline.run():
+            if produced_at_first is None:
+                produced_at_first = pipeline.stats["findings"]
+            count += 1
+        await stubs.close()
+        return produced_at_first, count
+
+    produced_at_first, count = asyncio.run(run())
+    assert count == 8 + 4 * 8 + 5 * 5
+    # Coda di uscita da un elemento: gli stadi restano poco avanti al consumatore
+    assert produced_at_first <= 3
@@ -0,0 +1,81 @@
+import asyncio
+import json
+import tracemalloc
+from types import SimpleNamespace
+
+from reconx.core import storage
+from reconx.core.engine import ScanEngine
+from reconx.core.finding import Finding, dumps, encode
+
+
+def _as_dict(i, **extra):
+    return dict({
+        "target": "example.com",
+        "module": "dict_plugin",
+        "type": "fake",
+        "confidence": 0.5,
+        "priority": 3,
+        "evidence": [{"label": "i", "value": i}],
+        "meta": {"source": "test", "ttl_seconds": 60},
+    }, **extra)
+
+
+def test_dict_plugins_become_findings(tmp_path, monkeypatch):
+    """Verifica conversione dei dict, timestamp unico per esecuzione e salvataggio."""
+    monkeypatch.setattr(storage, "DB_PATH", str(tmp_path / "finding.db"))
+
+    async def run(target, ctx=None):
+        return [_as_dict(0), _as_dict(1, note="extra"), _as_dict(2, scanned_at="2025-01-01T00:00:00Z")]
+
+    plugin = SimpleNamespace(name="dict_plugin", version="0.0.1", run=run)
+
+    async def scan():
+        async with ScanEngine([plugin]) as engine:
+            return await engine.scan("example.com")
+
+    results = asyncio.run(scan())
+    assert all(isinstance(r, Finding) for r in results)
+    assert results[0].scanned_at is results[1].scanned_at
+    assert results[2]["scanned_at"] == "2025-01-01T00:00:00Z"
+    assert results[1]["note"] == "extra" and "note" not in results[0]
+    assert results[1].get("evidence") == [{"label": "i", "value": 1}]
+
+    # Round trip dal database: stessi finding (le chiavi extra non sono salvate)
+    saved = storage.latest_findings("example.com")["dict_plugin"]
+    storage.close_db()
+    expected = [r.to_dict() for r in results]
+    expected[1].pop("note")
+    assert sorted(saved, key=lambda f: f["evidence"][0]["value"]) == expected
+
+
+def test_encoder_matches_json_of_dicts():
+    """Verifica che l'encoder produca lo stesso JSON dei dict equivalenti."""
+    finding = Finding.from_dict(_as_dict(7, note="è"), "2025-01-01T00:00:00Z")
+    assert json.loads(encode([finding])) == [dict(finding)]
+    assert json.loads(dumps(finding, indent=2)) == finding.to_dict()
+    assert list(finding) == ["target", "scanned_at", "module", "type", "confidence",
+                             "priority", "evidence", "meta", "note"]
+
+
+def test_finding_is_smaller_than_dict():
+    """Verifica che un Finding occupi meno memoria del dict equivalente."""
+    def measure(build):
+        tracemalloc.start()
+        items = [build(i) for i in range(10_000)]
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        assert len(items) == 10_000
+        return size
+
+    shared = {"scanned_at": "2025-01-01T00:00:00Z", "meta": {"source": "test"}}
+
+    def as_dict(i):
+        return {"target": "example.com", "scanned_at": f"2025-01-01T00:00:{i % 60:02}Z",
+                "module": "m", "type": "t", "confidence": 0.5, "priority": 3,
+                "evidence": [], "meta": {"source": "test"}}
+
+    def as_finding(i):
+        return Finding("example.com", "m", "t", 0.5, 3, [], shared["meta"],
+                       shared["scanned_at"])
+
+    assert measure(as_finding) < measure(as_dict) * 0.6
@@ -0,0 +1,63 @@
+import json
+import logging
+
+import pytest
+
+from reconx.core.logging import configure_logging, flush_logging, setup_logger
+
+
+@pytest.fixture
+def log_file(tmp_path):
+    path = tmp_path / "reconx.log"
+    yield path
+    configure_logging()
+
+
+def test_json_lines_with_rotation(log_file):
+    """Verifica output JSON Lines scritto in background e rotazione per dimensione."""
+    configure_logging(json_lines=True, log_file=log_file, max_bytes=4096, backups=2,
+                      console=False)
+    log = setup_logger("engine")
+    for i in range(200):
+        log.info(f"[test] messaggio {i}")
+    try:
+        raise RuntimeError("boom")
+    except RuntimeError:
+        log.exception("[test] errore")
+    flush_logging()
+
+    files = sorted(log_file.parent.glob("reconx.log*"))
+    assert [f.name for f in files] == ["reconx.log", "reconx.log.1", "reconx.log.2"]
+    assert all(f.stat().st_size <= 4096 for f in files)
+
+    entries = [json.loads(line) for line in log_file.read_text().splitlines()]
+    assert entries[-1]["level"] == "ERROR"
+    assert "RuntimeError: boom" in entries[-1]["message"]
+    assert entries[-2] == {"ts": entries[-2]["ts"], "level": "INFO", "logger": "engine",
+                           "message": "[test] messaggio 199"}
+
+
+def test_sampling_per_level(log_file):
+    """Verifica che il campionamento riduca solo i livelli configurati."""
+    configure_logging(log_file=log_file, console=False, sampling={"INFO": 10})
+    log = setup_logger("engine")
+    for i in range(100):
+        log.info(f"[test] info {i}")
+    for i in range(5):
+        log.warning(f"[test] warning {i}")
+    flush_logging()
+
+    lines = log_file.read_text().splitlines()
+    assert sum("[INFO]" in line for line in lines) == 10
+    assert sum("[WARNING]" in line for line in lines) == 5
+
+
+def test_level_applies_to_existing_loggers(log_file):
+    """Verifica che il livello configurato valga anche per i logger già creati."""
+    log = setup_logger("engine")
+    configure_logging(log_file=log_file, console=False, level=logging.WARNING)
+    log.info("[test] nascosto")
+    log.warning("[test] visibile")
+    flush_logging()
+    assert log_file.read_text().count("[test]") == 1
+    configure_logging(level=logging.INFO)
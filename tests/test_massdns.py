@@ -0,0 +1,141 @@
+import asyncio
+import socket
+
+import pytest
+
+from reconx.core import storage
+from reconx.core.context import ScanContext
+from reconx.core.engine import ScanEngine
+from reconx.core.massdns import MassResolver, parse_server
+from reconx.core.ratelimit import RateLimiter
+from reconx.core.registry import get_registry
+from tests.stubs import StubDNSServer
+
+RECORDS = {
+    ("www.mass.test", "A"): ["192.0.2.1", "192.0.2.2"],
+    ("www.mass.test", "AAAA"): ["2001:db8::1"],
+    ("mass.test", "MX"): ["10 mail.mass.test."],
+}
+
+
+def _resolve_all(servers, names, rdtypes=("A",), **options):
+    async def run():
+        resolver = MassResolver(servers, **options)
+        try:
+            results = [r async for r in resolver.resolve_many(names, rdtypes)]
+        finally:
+            resolver.close()
+        return {(r.name, r.rdtype): r for r in results}, resolver.stats
+    return asyncio.run(run())
+
+
+def test_parse_server():
+    """Verifica il parsing di "ip", "ip:porta" e "[ipv6]:porta"."""
+    assert parse_server("192.0.2.53") == ("192.0.2.53", 53)
+    assert parse_server("192.0.2.53:5353") == ("192.0.2.53", 5353)
+    assert parse_server("[2001:db8::53]:5353") == ("2001:db8::53", 5353)
+    assert parse_server("2001:db8::53") == ("2001:db8::53", 53)
+    with pytest.raises(ValueError):
+        parse_server("resolver.example")
+
+
+def test_resolves_records_and_nxdomain():
+    """Verifica risposte, tipi di record e NXDOMAIN su molte query contemporanee."""
+    names = ["www.mass.test", "mass.test"] + [f"missing{i}.mass.test" for i in range(200)]
+    with StubDNSServer(RECORDS) as server:
+        results, stats = _resolve_all([("127.0.0.1", server.port)], names,
+                                      ("A", "AAAA", "MX"), sockets=2, inflight=100)
+
+    assert len(results) == len(names) * 3
+    assert sorted(results[("www.mass.test", "A")].answers) == ["192.0.2.1", "192.0.2.2"]
+    assert results[("www.mass.test", "AAAA")].answers == ["2001:db8::1"]
+    assert results[("mass.test", "MX")].answers == ["10 mail.mass.test."]
+    assert results[("mass.test", "A")].status == "NOERROR"
+    assert results[("mass.test", "A")].answers == []
+    assert results[("missing7.mass.test", "A")].status == "NXDOMAIN"
+    assert stats["queries"] == len(results) and stats["timeouts"] == 0
+
+
+def test_mass_queries_use_their_own_rate_source():
+    """Verifica che la risoluzione massiva non sia frenata dal limite "dns:*" delle scansioni."""
+    limiter = RateLimiter({"dns:*": (1.0, 1), "massdns:*": (1000.0, 100)})
+    names = [f"missing{i}.mass.test" for i in range(50)]
+    with StubDNSServer(RECORDS) as server:
+        results, stats = _resolve_all([("127.0.0.1", server.port)], names,
+                                      rate_limiter=limiter, timeout=0.5)
+
+    assert stats["queries"] == 50 and stats["timeouts"] == 0
+    assert limiter.bucket("massdns:127.0.0.1").tokens < 100
+    assert limiter.bucket("dns:127.0.0.1").tokens == 1
+
+
+def test_truncated_responses_fall_back_to_tcp():
+    """Verifica la ripetizione su TCP delle risposte con il bit TC."""
+    with StubDNSServer(RECORDS, truncate=True) as server:
+        results, stats = _resolve_all([("127.0.0.1", server.port)], ["www.mass.test"])
+        assert server.tcp_queries == 1
+
+    result = results[("www.mass.test", "A")]
+    assert result.tcp and sorted(result.answers) == ["192.0.2.1", "192.0.2.2"]
+    assert stats["tcp"] == 1
+
+
+def test_retries_on_unresponsive_resolver():
+    """Verifica timeout e nuovi tentativi su un altro resolver del pool."""
+    # Resolver che non risponde mai: un socket UDP aperto ma mai letto
+    silent = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    silent.bind(("127.0.0.1", 0))
+    dead = silent.getsockname()
+    names = [f"www{i}.mass.test" for i in range(20)]
+    try:
+        with StubDNSServer(default={"A": ["192.0.2.9"]}) as server:
+            results, stats = _resolve_all([dead, ("127.0.0.1", server.port)], names,
+                                          timeout=0.2, retries=1)
+        timed_out, dead_stats = _resolve_all([dead], names[:2], timeout=0.1, retries=1)
+    finally:
+        silent.close()
+
+    # Metà delle prime query va al resolver muto: riprovate sull'altro
+    assert all(r.status == "NOERROR" and r.answers == ["192.0.2.9"]
+               for r in results.values())
+    assert stats["timeouts"] == stats["retries"] == 10
+    assert {r.attempts for r in results.values()} == {1, 2}
+
+    assert {r.status for r in timed_out.values()} == {"TIMEOUT"}
+    assert {r.attempts for r in timed_out.values()} == {2}
+    assert dead_stats["timeouts"] == 4
+
+
+def test_engine_resolve_and_dns_basic_mass_mode(tmp_path, monkeypatch):
+    """Verifica la modalità massiva di dns_basic e il salvataggio dei soli nomi risolti."""
+    monkeypatch.setattr(storage, "DB_PATH", str(tmp_path / "massdns.db"))
+    names = ["www.mass.test", "missing.mass.test"]
+
+    async def run(server):
+        ctx = ScanContext(nameservers=["127.0.0.1"], dns_port=server.port,
+                          dns_mode="mass", rate_limiter=RateLimiter({}))
+        report, scan = {}, {}
+        dns_basic = get_registry().get("dns_basic").load()
+        async with ScanEngine(plugins=[dns_basic], ctx=ctx) as engine:
+            resolved = [item async for item in engine.resolve(names, report=report)]
+            single = await dns_basic.run("www.mass.test", ctx)
+            # I soli record A della modalità massiva non valgono come scansione completa
+            await engine.scan("www.mass.test", incremental=True, report=scan)
+        await ctx.close()
+        return resolved, report, single, scan
+
+    with StubDNSServer(RECORDS) as server:
+        resolved, report, single, scan = asyncio.run(run(server))
+
+    statuses = {f.target: status for f, status in resolved}
+    assert statuses == {"www.mass.test": "NOERROR", "missing.mass.test": "NXDOMAIN"}
+    assert report["statuses"] == {"NOERROR": 1, "NXDOMAIN": 1}
+    assert scan["executed"] == ["dns_basic"]
+    saved = storage.latest_findings("www.mass.test")["massdns"]
+    assert sorted(saved[0]["evidence"][0]["value"]) == ["192.0.2.1", "192.0.2.2"]
+    assert storage.latest_findings("missing.mass.test") == {}
+    storage.close_db()
+
+    # run() in modalità "mass": stessi tipi di record del resolver classico
+    values = {f.type: f["evidence"][0]["value"] for f in single}
+    assert values["dns_aaaa"] == ["2001:db8::1"] and values["dns_mx"] == []
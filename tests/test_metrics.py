@@ -0,0 +1,107 @@
+import asyncio
+import time
+
+import pytest
+
+from reconx.core import cache, storage
+from reconx.core.cache import Cache, get_cache, set_cache
+from reconx.core.engine import ScanEngine
+from reconx.core.metrics import MetricsRegistry, get_metrics
+from tests.conftest import fake_plugin
+
+
+def _finding(target, name, value):
+    return {
+        "target": target,
+        "module": name,
+        "type": "fake",
+        "confidence": 1.0,
+        "priority": 5,
+        "evidence": [{"label": "value", "value": value}],
+        "meta": {"source": name, "ttl_seconds": 60},
+    }
+
+
+async def _busy(target, ctx=None):
+    # CPU nel task del plugin e in un task figlio
+    async def spin():
+        end = time.thread_time() + 0.1
+        while time.thread_time() < end:
+            pass
+    await asyncio.gather(spin(), spin())
+    return [_finding(target, "busy", 1)]
+
+
+async def _waiting(target, ctx=None):
+    await asyncio.sleep(0.2)
+    return [_finding(target, "waiting", 1), {"target": target, "module": "waiting"}]
+
+
+async def _failing(target, ctx=None):
+    raise RuntimeError("boom")
+
+
+async def _hanging(target, ctx=None):
+    await asyncio.sleep(5)
+
+
+async def _cached(target, ctx=None):
+    key = f"metrics:{target}"
+    if get_cache(key) is None:
+        set_cache(key, [1], ttl=60)
+    get_cache(key)
+    return [_finding(target, "cached", 1)]
+
+
+@pytest.mark.usefixtures("isolated_db")
+def test_scan_records_per_plugin_metrics(tmp_path, monkeypatch):
+    """Verifica tempi, conteggi, errori, timeout e cache per ogni plugin."""
+    monkeypatch.setattr(cache, "_default_cache", Cache(tmp_path / "cache.db"))
+    monkeypatch.setattr("reconx.core.metrics._registry", MetricsRegistry())
+    plugins = [
+        fake_plugin("busy", run=_busy),
+        fake_plugin("waiting", run=_waiting),
+        fake_plugin("failing", run=_failing),
+        fake_plugin("hanging", run=_hanging),
+        fake_plugin("cached", run=_cached),
+    ]
+
+    async def scan():
+        report = {}
+        async with ScanEngine(plugins, plugin_timeout=0.5) as engine:
+            await engine.scan("example.com", report=report)
+        return report
+
+    summary = asyncio.run(scan())["metrics"]
+    stats = summary["plugins"]
+
+    assert stats["busy"]["cpu_seconds"] >= 0.15
+    assert stats["busy"]["findings"] == 1
+    assert stats["waiting"]["io_seconds"] >= 0.15
+    assert stats["waiting"]["cpu_seconds"] < 0.05
+    assert stats["waiting"]["invalid"] == 1
+    assert stats["failing"]["errors"] == 1
+    assert stats["hanging"]["timeouts"] == 1
+    assert stats["hanging"]["wall_seconds"] >= 0.5
+    assert (stats["cached"]["cache_misses"], stats["cached"]["cache_hits"]) == (1, 1)
+    assert summary["totals"]["calls"] == 5
+
+    # Tabella scan_metrics: una riga per plugin della scansione
+    rows = storage.get_connection().execute(
+        "SELECT plugin, findings, errors, timeouts FROM scan_metrics WHERE scan_id = ?",
+        (summary["scan_id"],),
+    ).fetchall()
+    assert sorted(rows) == [
+        ("busy", 1, 0, 0), ("cached", 1, 0, 0), ("failing", 0, 1, 0),
+        ("hanging", 0, 0, 1), ("waiting", 1, 0, 0),
+    ]
+
+    # Aggregato di processo ed esportazione Prometheus
+    registry = get_metrics()
+    assert registry.snapshot()["scans"] == 1
+    out = tmp_path / "reconx.prom"
+    registry.write_prometheus(out)
+    text = out.read_text()
+    assert "reconx_scans_total 1" in text
+    assert 'reconx_plugin_errors_total{plugin="failing"} 1' in text
+    assert 'reconx_plugin_cache_hits_total{plugin="cached"} 1' in text
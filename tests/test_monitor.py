@@ -0,0 +1,139 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from reconx.core import storage
+from reconx.core.context import ScanContext
+from reconx.core.engine import ScanEngine
+from reconx.core.finding import utc_timestamp
+from reconx.core.monitor import Monitor, watch
+from reconx.core.ratelimit import RateLimiter
+from tests.conftest import fake_plugin
+
+pytestmark = pytest.mark.usefixtures("isolated_db")
+
+
+def _finding(module, ttl, error=False):
+    label = "error" if error else "value"
+    return {"module": module, "scanned_at": utc_timestamp(), "evidence": [{"label": label}],
+            "meta": {"ttl_seconds": ttl}}
+
+
+def _watchlist():
+    return {entry["target"]: entry for entry in storage.list_watch()}
+
+
+def _run(plugins, once=True, stop_after=None, ctx=None, **options):
+    async def run():
+        stop = asyncio.Event()
+        async with ScanEngine(plugins, plugin_timeout=5, ctx=ctx) as engine:
+            monitor = Monitor(engine, **options)
+            if stop_after is not None:
+                asyncio.get_running_loop().call_later(stop_after, stop.set)
+            return await monitor.run(stop, once=once)
+
+    return asyncio.run(run())
+
+
+def test_next_due_follows_ttl_with_bounds_jitter_and_backoff():
+    """Verifica il calcolo della prossima scansione dai TTL dei finding."""
+    engine = SimpleNamespace(plugins=[SimpleNamespace(name="a"), SimpleNamespace(name="b")],
+                             scan_timeout=60)
+    monitor = Monitor(engine, min_interval=100, max_interval=10_000, retry=500, jitter=0.2)
+    now = time.time()
+
+    # La prima scadenza tra i plugin decide, con un jitter solo in avanti
+    dues = [monitor.next_due([_finding("a", 3600), _finding("b", 1200)], 0, now)
+            for _ in range(50)]
+    assert all(not failed for _, failed in dues)
+    assert all(1200 - 2 <= due - now <= 1200 * 1.2 + 1 for due, _ in dues)
+    assert len({round(due) for due, _ in dues}) > 1
+
+    # Limiti minimo e massimo
+    assert monitor.next_due([_finding("a", 10), _finding("b", 10)], 0, now)[0] - now >= 100
+    assert monitor.next_due([_finding("a", 10**6), _finding("b", 10**6)], 0, now)[0] - now \
+        <= 10_000 * 1.2
+
+    # Plugin in errore (finding di errore o eccezione): attesa crescente
+    due, failed = monitor.next_due([_finding("a", 3600), _finding("b", 60, error=True)], 0, now)
+    assert failed and 500 <= due - now <= 500 * 1.2
+    due, failed = monitor.next_due([_finding("a", 3600)], 2, now, errors={"b"})
+    assert failed and 2000 <= due - now <= 2000 * 1.2
+    # ...senza overflow anche dopo moltissimi errori consecutivi
+    due, failed = monitor.next_due([], 5000, now, errors={"a", "b"})
+    assert failed and 10_000 <= due - now <= 10_000 * 1.2
+
+    # Nessun finding o TTL nullo non è un errore: di nuovo dopo min_interval
+    due, failed = monitor.next_due([_finding("a", 3600)], 3, now)
+    assert not failed and 100 <= due - now <= 100 * 1.2
+    due, failed = monitor.next_due([_finding("a", 3600), _finding("b", 0)], 0, now)
+    assert not failed and 100 <= due - now <= 100 * 1.2
+
+
+def test_due_targets_are_scanned_and_state_survives_restart():
+    """Verifica scansione dei target dovuti, riprogrammazione e ripresa dopo un riavvio."""
+    plugin = fake_plugin("monitor_ttl", ttl=3600, failing={"down.example.com"})
+    assert watch(["ok.example.com", "https://down.example.com/login"]) == 2
+    assert watch(["ok.example.com"]) == 0
+
+    stats = _run([plugin], jitter=0.0)
+    assert stats == {"scans": 2, "failures": 1, "findings": 1}
+    assert sorted(plugin.calls) == ["down.example.com", "ok.example.com"]
+    entries = _watchlist()
+    now = time.time()
+    assert 3500 < entries["ok.example.com"]["next_due"] - now <= 3600
+    assert entries["ok.example.com"]["failures"] == 0
+    assert entries["down.example.com"]["failures"] == 1
+    assert entries["down.example.com"]["scans"] == 1
+
+    # Un nuovo processo riparte dallo stato salvato: nulla è ancora dovuto
+    assert _run([plugin])["scans"] == 0
+    assert len(plugin.calls) == 2
+
+
+def test_empty_results_are_not_failures():
+    """Verifica che un plugin senza risultati non accumuli errori né attese crescenti."""
+    async def nothing(target, ctx=None):
+        return []
+
+    plugin = fake_plugin("monitor_empty", run=nothing)
+    watch(["quiet.example.com"])
+    stats = _run([plugin], jitter=0.0, min_interval=600)
+    assert stats == {"scans": 1, "failures": 0, "findings": 0}
+    entry = _watchlist()["quiet.example.com"]
+    assert entry["failures"] == 0
+    assert 500 < entry["next_due"] - time.time() <= 600
+
+
+def test_scans_respect_concurrency_and_rate_budget():
+    """Verifica il limite di target in parallelo e di scansioni avviate al secondo."""
+    plugin = fake_plugin("monitor_budget", delay=0.1)
+    watch([f"t{i}.example.com" for i in range(6)])
+    ctx = ScanContext(rate_limiter=RateLimiter({"monitor": (10.0, 1)}))
+
+    started = time.monotonic()
+    stats = _run([plugin], ctx=ctx, concurrency=2)
+    elapsed = time.monotonic() - started
+    asyncio.run(ctx.close())
+    assert stats["scans"] == 6
+    assert plugin.gauge["peak"] == 2
+    # A 2 alla volta da 0.1s basterebbero 0.3s: decide il limite di 10 avvii al secondo
+    assert elapsed >= 0.45
+
+
+def test_continuous_run_rescans_and_releases_on_stop():
+    """Verifica le riscansioni alla scadenza del TTL e il rilascio dei target all'arresto."""
+    quick = fake_plugin("monitor_quick", ttl=1)
+    watch(["loop.example.com"])
+    stats = _run([quick], once=False, stop_after=1.6, min_interval=0.5, jitter=0.0, poll=0.2)
+    assert stats["scans"] == 2 and len(quick.calls) == 2
+
+    storage.remove_watch(["loop.example.com"])
+    slow = fake_plugin("monitor_slow", delay=5)
+    watch(["slow.example.com"])
+    stats = _run([slow], once=False, stop_after=0.3)
+    assert stats["scans"] == 0 and slow.calls == ["slow.example.com"]
+    # Interrotta a metà: di nuovo dovuta al prossimo avvio
+    assert _watchlist()["slow.example.com"]["next_due"] <= time.time()
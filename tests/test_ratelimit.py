@@ -0,0 +1,62 @@
+import asyncio
+import time
+
+import pytest
+
+from reconx.core.ratelimit import RateLimiter, TokenBucket
+
+
+def test_token_bucket_burst_then_rate():
+    """Verifica burst iniziale e ritmo costante dopo l'esaurimento."""
+    bucket = TokenBucket(rate=10, burst=3)
+    waits = [bucket.reserve() for _ in range(5)]
+    assert waits[:3] == [0.0, 0.0, 0.0]
+    assert 0.05 < waits[3] <= 0.1
+    assert 0.15 < waits[4] <= 0.2
+
+
+def test_rate_limiter_per_source_and_shared_between_processes(tmp_path):
+    """Verifica bucket per sorgente e coordinamento tramite SQLite."""
+    rates = {"slow": (20, 2), "whois:*": (20, 1)}
+    path = str(tmp_path / "rates.db")
+    # Due limiter sullo stesso file simulano due processi distinti
+    first, second = RateLimiter(rates, path), RateLimiter(rates, path)
+
+    async def hammer():
+        started = time.monotonic()
+        await asyncio.gather(*(
+            limiter.acquire("slow") for limiter in (first, second) for _ in range(5)
+        ))
+        slow_elapsed = time.monotonic() - started
+
+        started = time.monotonic()
+        await asyncio.gather(*(first.acquire("fast") for _ in range(100)))
+        fast_elapsed = time.monotonic() - started
+        return slow_elapsed, fast_elapsed
+
+    slow_elapsed, fast_elapsed = asyncio.run(hammer())
+    # 10 richieste, burst 2, 20/s condivisi: almeno 8/20 = 0.4s
+    assert slow_elapsed >= 0.35
+    # Sorgente senza limite configurato: nessuna attesa
+    assert fast_elapsed < 0.1
+    # I prefissi "sorgente:*" valgono per tutti gli host
+    assert first.bucket("whois:whois.verisign-grs.com") is not None
+    assert first.bucket("other") is None
+
+
+def test_cancelled_waits_give_tokens_back(tmp_path):
+    """Verifica che le attese annullate non lascino debito ai chiamanti successivi."""
+    local = RateLimiter({"crt.sh": (1, 1)})
+    shared = RateLimiter({"crt.sh": (1, 1)}, str(tmp_path / "rates.db"))
+
+    async def run(limiter):
+        await limiter.acquire("crt.sh")
+        for _ in range(20):
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(limiter.acquire("crt.sh"), 0.01)
+        await asyncio.sleep(0.05)
+        return await asyncio.wait_for(limiter.acquire("crt.sh"), 2)
+
+    # Senza restituzione l'attesa sarebbe di circa 20s (20 token a 1/s)
+    assert asyncio.run(run(local)) < 1.0
+    assert asyncio.run(run(shared)) < 1.0
@@ -0,0 +1,66 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+from reconx.core.registry import PluginRegistry
+
+PLUGIN_SRC = '''
+name = "fake_plugin"
+version = "{version}"
+inputs_supported = {{"domain"}}
+
+async def run(target, ctx=None):
+    return [{{"target": target, "module": name}}]
+'''
+
+
+def test_registry_lists_without_import_and_loads_lazily(tmp_path):
+    """Verifica indice in cache, invalidazione per mtime e import lazy."""
+    plugins_dir = tmp_path / "regplugins"
+    plugin_file = plugins_dir / "fake" / "plugin.py"
+    plugin_file.parent.mkdir(parents=True)
+    plugin_file.write_text(PLUGIN_SRC.format(version="1.0.0"))
+
+    registry = PluginRegistry(plugins_dir)
+    [spec] = registry.plugins()
+    assert (spec.name, spec.version, spec.inputs_supported) == ("fake_plugin", "1.0.0", {"domain"})
+    assert not spec.loaded
+    assert "regplugins.fake.plugin" not in sys.modules
+
+    index = json.loads((plugins_dir / ".index.json").read_text())
+    assert index["plugins"]["fake"]["version"] == "1.0.0"
+
+    # Un nuovo registro riusa l'indice; una modifica al file lo invalida
+    plugin_file.write_text(PLUGIN_SRC.format(version="2.0.0"))
+    stat = plugin_file.stat()
+    os.utime(plugin_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    [spec] = PluginRegistry(plugins_dir).plugins()
+    assert spec.version == "2.0.0"
+
+    results = asyncio.run(spec.run("example.com"))
+    assert spec.loaded
+    assert results == [{"target": "example.com", "module": "fake_plugin"}]
+
+
+def test_list_plugins_outside_repo_root(tmp_path):
+    """'list-plugins' funziona da un'altra cwd e non importa i plugin."""
+    root = Path(__file__).resolve().parent.parent
+    code = (
+        "import sys; from reconx.cli import main\n"
+        "try:\n    main(['list-plugins'])\n"
+        "except SystemExit:\n    pass\n"
+        "print('aiohttp' in sys.modules, 'whois' in sys.modules)\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=tmp_path,
+        env=dict(os.environ, PYTHONPATH=str(root)),
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr
+    assert "dns_basic" in result.stdout
+    assert "crtsh_lookup" in result.stdout
+    assert result.stdout.strip().endswith("False False")
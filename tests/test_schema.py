@@ -0,0 +1,49 @@
+import time
+import pytest
+from reconx.core.schema import validate_finding, validate_findings
+
+
+def _finding(**overrides):
+    finding = {
+        "target": "example.com",
+        "module": "dummy",
+        "type": "test_type",
+        "confidence": 0.9,
+        "priority": 5,
+        "evidence": [{"label": "x", "value": "y"}],
+        "meta": {"source": "test", "ttl_seconds": 100},
+    }
+    finding.update(overrides)
+    return finding
+
+
+def test_validate_findings_splits_valid_and_invalid():
+    """Verifica la validazione in blocco e la coerenza dei due percorsi."""
+    bad = [
+        _finding(confidence="alta"),
+        _finding(confidence=True),
+        _finding(evidence={"label": "x"}),
+        {k: v for k, v in _finding().items() if k != "meta"},
+        "non un dict",
+    ]
+    good = [_finding(), _finding(priority=1.5, extra="ok")]
+
+    for fast in (True, False):
+        valid, invalid = validate_findings(good + bad, fast=fast)
+        assert valid == good
+        assert [f for f, _ in invalid] == bad
+        assert all("non conforme" in msg for _, msg in invalid)
+
+    with pytest.raises(ValueError):
+        validate_finding(bad[0])
+    validate_finding(good[0])
+
+
+def test_validate_findings_is_fast():
+    """Il percorso rapido deve costare pochi microsecondi per finding."""
+    findings = [_finding() for _ in range(20000)]
+    started = time.perf_counter()
+    valid, _ = validate_findings(findings)
+    per_finding = (time.perf_counter() - started) / len(findings)
+    assert len(valid) == len(findings)
+    assert per_finding < 20e-6
@@ -0,0 +1,41 @@
+import re
+import subprocess
+import sys
+import pytest
+
+# Budget di import (millisecondi) per ogni invocazione della CLI
+IMPORT_BUDGET_MS = 250
+
+# Moduli pesanti che non devono essere importati per help/list-plugins
+HEAVY_MODULES = {"jsonschema", "aiohttp", "dns", "whois", "sqlite3", "asyncio"}
+
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+\d+ \|(\s*)(\S+)")
+
+
+def _import_profile(args):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "reconx.cli", *args],
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr
+    total_us, modules = 0, set()
+    for match in _LINE.finditer(result.stderr):
+        total_us += int(match.group(1))
+        modules.add(match.group(3).split(".")[0])
+    return total_us / 1000, modules
+
+
+@pytest.mark.parametrize("args", [
+    ["--help"],
+    ["scan", "--help"],
+    ["export", "--help"],
+    ["serve", "--help"],
+    ["list-plugins"],
+])
+def test_cli_import_time_budget(args):
+    """Verifica che l'avvio della CLI resti entro il budget di import."""
+    total_ms, modules = _import_profile(args)
+    assert "click" in modules
+    assert not modules & HEAVY_MODULES, f"import pesanti: {modules & HEAVY_MODULES}"
+    assert total_ms < IMPORT_BUDGET_MS, f"{' '.join(args)}: {total_ms:.0f}ms"
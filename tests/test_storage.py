@@ -1,5 +1,7 @@
 import sqlite3
 import json
+import pytest
+from reconx.core import storage
 from reconx.core.storage import init_db, save_findings
 from datetime import datetime
 from pathlib import Path
@@ -27,3 +29,154 @@ def test_database_creation_and_insertion(tmp_path):
     count = cur.fetchone()[0]
     conn.close()
     assert count > 0
+
+
+def test_bulk_save_uses_shared_wal_connection(tmp_path, monkeypatch):
+    """Verifica connessione condivisa, WAL, indici e inserimento in blocco."""
+    monkeypatch.setattr(storage, "DB_PATH", str(tmp_path / "bulk.db"))
+    storage.init_db()
+    conn = storage.get_connection()
+    assert storage.get_connection() is conn
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    indexes = {row[1] for row in conn.execute("PRAGMA index_list(findings)")}
+    for column in ("target", "module", "type", "scanned_at"):
+        assert f"idx_findings_{column}" in indexes
+
+    sample = [{
+        "target": f"t{i}.com",
+        "module": "dummy",
+        "type": "test_type",
+        "confidence": 1.0,
+        "priority": 5,
+        "evidence": [{"label": "i", "value": i}],
+        "meta": {"source": "test", "ttl_seconds": 100},
+    } for i in range(1000)]
+    storage.save_findings(sample)
+    assert conn.execute("SELECT COUNT(*) FROM findings").fetchone()[0] == 1000
+    storage.close_db()
+
+
+def test_streaming_filtered_export(tmp_path, monkeypatch):
+    """Verifica l'esportazione a blocchi con filtri, NDJSON e gzip."""
+    import csv
+    import gzip
+
+    monkeypatch.setattr(storage, "DB_PATH", str(tmp_path / "export.db"))
+    monkeypatch.setattr(storage, "EXPORT_CHUNK_SIZE", 7)
+    storage.init_db()
+    storage.save_findings([{
+        "target": "a.com" if i % 2 else "b.com",
+        "module": "dummy",
+        "type": "test_type",
+        "confidence": 1.0,
+        "priority": 5,
+        "evidence": [{"label": "i", "value": i}],
+        "meta": {"source": "test", "ttl_seconds": 100},
+        "scanned_at": f"2025-10-{i + 1:02d}T00:00:00Z",
+    } for i in range(20)])
+
+    out = tmp_path / "all.json"
+    assert storage.export_results(out, "json") == 20
+    assert len(json.loads(out.read_text())) == 20
+
+    out = tmp_path / "a.ndjson.gz"
+    count = storage.export_results(out, "ndjson", target="a.com",
+                                   since="2025-10-05", until="2025-10-15")
+    with gzip.open(out, "rt") as f:
+        rows = [json.loads(line) for line in f]
+    assert count == len(rows) == 5
+    assert all(r["target"] == "a.com" for r in rows)
+
+    out = tmp_path / "b.csv"
+    assert storage.export_results(out, "csv", target="b.com") == 10
+    with open(out, newline="") as f:
+        assert len(list(csv.reader(f))) == 11
+
+    # `until` di sola data include l'intero giorno (il 14 è di a.com)
+    out = tmp_path / "until.ndjson"
+    assert storage.export_results(out, "ndjson", target="a.com", until="2025-10-14") == 7
+    assert storage.export_results(out, "ndjson", target="a.com",
+                                  until="2025-10-13T23:59:59Z") == 6
+
+    # Formato non valido: nessun file creato
+    out = tmp_path / "bad.xml"
+    with pytest.raises(ValueError, match="non supportato"):
+        storage.export_results(out, "xml")
+    assert not out.exists()
+    storage.close_db()
+
+
+def _sample(value, scanned_at):
+    return {
+        "target": "dup.com",
+        "module": "dns_basic",
+        "type": "dns_a",
+        "confidence": 0.9,
+        "priority": 5,
+        "evidence": [{"label": "A", "value": value}],
+        "meta": {"source": "test", "ttl_seconds": 100},
+        "scanned_at": scanned_at,
+    }
+
+
+def test_upsert_deduplicates_findings(tmp_path, monkeypatch):
+    """Verifica impronta stabile e upsert con first_seen/last_seen/seen_count."""
+    monkeypatch.setattr(storage, "DB_PATH", str(tmp_path / "dedup.db"))
+    storage.init_db()
+    first = _sample(["1.1.1.1", "2.2.2.2"], "2025-10-01T00:00:00Z")
+    # Stessa evidence in ordine diverso: stessa impronta
+    again = _sample(["2.2.2.2", "1.1.1.1"], "2025-10-02T00:00:00Z")
+    other = _sample(["3.3.3.3"], "2025-10-02T00:00:00Z")
+    assert storage.finding_fingerprint(first) == storage.finding_fingerprint(again)
+
+    storage.save_findings([first])
+    storage.save_findings([again, other])
+
+    rows = storage.get_connection().execute(
+        "SELECT evidence, first_seen, last_seen, seen_count FROM findings ORDER BY id"
+    ).fetchall()
+    assert len(rows) == 2
+    assert rows[0][1:] == ("2025-10-01T00:00:00Z", "2025-10-02T00:00:00Z", 2)
+    assert rows[1][3] == 1
+    storage.close_db()
+
+
+def test_migration_folds_existing_duplicates(tmp_path, monkeypatch):
+    """Verifica la migrazione di un database esistente con righe duplicate."""
+    path = tmp_path / "legacy.db"
+    conn = sqlite3.connect(path)
+    conn.execute("""
+    CREATE TABLE findings (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, target TEXT, module TEXT, type TEXT,
+        confidence REAL, priority INTEGER, evidence TEXT, meta TEXT, scanned_at TEXT
+    )
+    """)
+    for day, value in [(1, "a"), (2, "a"), (3, "b"), (4, "a")]:
+        f = _sample([value], f"2025-10-0{day}T00:00:00Z")
+        conn.execute(
+            "INSERT INTO findings (target, module, type, confidence, priority, evidence, meta, scanned_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (f["target"], f["module"], f["type"], f["confidence"], f["priority"],
+             json.dumps(f["evidence"]), json.dumps(f["meta"]), f["scanned_at"]),
+        )
+    conn.commit()
+    conn.close()
+
+    monkeypatch.setattr(storage, "DB_PATH", str(path))
+    storage.init_db()
+    rows = storage.get_connection().execute(
+        "SELECT evidence, first_seen, last_seen, seen_count FROM findings ORDER BY id"
+    ).fetchall()
+    assert len(rows) == 2
+    by_value = {json.loads(r[0])[0]["value"][0]: r[1:] for r in rows}
+    assert by_value["a"] == ("2025-10-01T00:00:00Z", "2025-10-04T00:00:00Z", 3)
+    assert by_value["b"] == ("2025-10-03T00:00:00Z", "2025-10-03T00:00:00Z", 1)
+
+    # Dopo la migrazione, un nuovo salvataggio aggiorna la riga esistente
+    storage.save_findings([_sample(["a"], "2025-10-05T00:00:00Z")])
+    count = storage.get_connection().execute(
+        "SELECT seen_count FROM findings WHERE last_seen = '2025-10-05T00:00:00Z'"
+    ).fetchone()[0]
+    assert count == 4
+    storage.close_db()
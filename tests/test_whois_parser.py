@@ -1,5 +1,8 @@
 import asyncio
+import time
 from plugins.whois_parser import plugin
+from reconx.core.context import ScanContext
+from tests.stubs import StubWhoisServer
 
 def test_whois_parser_returns_data():
     """Verifica che il plugin WHOIS produca risultati coerenti."""
@@ -9,3 +12,73 @@ def test_whois_parser_returns_data():
     first = results[0]
     assert "whois_record" in first["type"]
     assert "evidence" in first
+
+
+def test_whois_parser_per_registry_limits_off_loop():
+    """Verifica pool di worker, limiti per TLD e loop non bloccato."""
+    with StubWhoisServer("Com Org", latency=0.3) as com, \
+            StubWhoisServer("Net Org", latency=0.3) as net:
+        ctx = ScanContext(
+            whois_servers={"com": com.address, "net": net.address},
+            whois_concurrency=2,
+        )
+        stamp = time.time_ns()
+        com_targets = [f"c{i}-{stamp}.com" for i in range(6)]
+        net_targets = [f"n{i}-{stamp}.net" for i in range(2)]
+
+        async def scan():
+            finished = {}
+            ticks = 0
+
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.05)
+                    ticks += 1
+
+            async def one(target):
+                results = await plugin.run(target, ctx)
+                finished[target] = time.monotonic() - started
+                return results
+
+            tick_task = asyncio.create_task(ticker())
+            started = time.monotonic()
+            try:
+                results = await asyncio.gather(*(one(t) for t in com_targets + net_targets))
+            finally:
+                tick_task.cancel()
+                await ctx.close()
+            return results, finished, ticks
+
+        results, finished, ticks = asyncio.run(scan())
+
+    registrants = [r[0]["evidence"][0]["value"] for r in results]
+    assert registrants == ["Com Org"] * 6 + ["Net Org"] * 2
+    # .com limitato a 2 query contemporanee: 3 turni da 0.3s
+    assert com.max_active == 2
+    assert max(finished[t] for t in com_targets) >= 0.85
+    # .net non aspetta la coda di .com
+    assert max(finished[t] for t in net_targets) < 0.6
+    # L'event loop resta libero durante le query
+    assert ticks >= 10
+
+
+def test_context_semaphores_follow_the_event_loop():
+    """Verifica che i semafori condivisi vengano ricreati a ogni nuovo event loop."""
+    ctx = ScanContext()
+
+    async def contend():
+        limit = ctx.semaphore("whois:com", 1)
+        assert ctx.semaphore("whois:com", 1) is limit
+
+        async def hold():
+            async with limit:
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(hold(), hold())
+        return limit
+
+    # Con lo stesso semaforo il secondo asyncio.run fallirebbe ("bound to a
+    # different event loop")
+    first = asyncio.run(contend())
+    assert asyncio.run(contend()) is not first